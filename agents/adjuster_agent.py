@@ -6,22 +6,16 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.tools import FunctionTool
-from google.genai import types
+from google.adk.tools import FunctionTool, ToolContext
 
+from agents.convergence_agent import TRACE_KEY, iteration_trace
+from services.model_factory import get_model
 from tools.task_tools import update_task
-
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
+from tools.calendar_tools import check_time_conflicts_batch
+from tools.schedule_planner import compare_schedule_candidates, plan_schedule
 
 
-def exit_loop() -> str:
+def exit_loop(tool_context: ToolContext) -> str:
     """
     結束優化迴圈
     
@@ -30,12 +24,17 @@ def exit_loop() -> str:
     Returns:
         確認訊息
     """
+    # 迴圈在 convergence_agent 之前結束，本輪的耗時與評分變化在這裡記錄
+    trace = iteration_trace(tool_context.state, tool_context.invocation_id, "adjuster_agent")
+    if trace is not None:
+        tool_context.state[TRACE_KEY] = trace
+    tool_context.actions.escalate = True
     return "已結束優化迴圈，排程已最佳化！"
 
 
 # 建立 Adjuster Agent
 adjuster_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="adjuster_agent",
     description="排程調整專家，根據評審建議調整任務優先級和排程",
     instruction="""你是一位排程調整專家，根據 Critic 的評估結果調整任務排程。
@@ -51,12 +50,19 @@ adjuster_agent = LlmAgent(
 
 可用工具:
 1. update_task: 更新任務優先級、截止日期等
-2. exit_loop: 當排程已最佳化時呼叫此函式結束迴圈
+2. check_time_conflicts_batch: 一次檢查所有建議時段是否與既有事件或彼此衝突
+3. plan_schedule: 將未完成任務一次排入工作時間的空檔，取得完整的時間區塊排程建議
+   (含會延遲與無法排入的任務)，不需逐一推算
+4. compare_schedule_candidates: 一次比較多個調整方案 (調整順序、限制每日工時、提升過期任務優先級、
+   延後 low 任務)，回傳成本最低的幾個方案與建議的優先級調整/延後任務
+5. exit_loop: 當排程已最佳化時呼叫此函式結束迴圈
 
 工作流程:
 1. 讀取 critic_feedback
 2. 如果 is_optimal 為 true → 呼叫 exit_loop() 結束迴圈
-3. 如果有問題 → 根據 issues 進行調整
+3. 如果有問題 → 先呼叫 plan_schedule 取得排程建議，再根據 issues 與建議進行調整
+   (有超載或過期問題時，可用 compare_schedule_candidates 比較延後與提升優先級的方案)
+   (建議多個新時段時，先用 check_time_conflicts_batch 一次驗證)
 4. 輸出調整結果
 
 輸出格式:
@@ -69,6 +75,9 @@ adjuster_agent = LlmAgent(
 ```""",
     tools=[
         update_task,
+        check_time_conflicts_batch,
+        plan_schedule,
+        compare_schedule_candidates,
         FunctionTool(func=exit_loop)  # Day 1 概念: exit_loop 結束迴圈
     ],
     output_key="adjustment_results"
@@ -4,8 +4,6 @@ Course Concept: Day 1 - LlmAgent
 import sys
 import os
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.genai import types
 from dotenv import load_dotenv
 
 load_dotenv()  # 加載 .env 文件中的 API Key
@@ -13,26 +11,23 @@ load_dotenv()  # 加載 .env 文件中的 API Key
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+from services.model_factory import get_model
 from tools.calendar_tools import (
     add_event,
     query_events,
     update_event,
     delete_event,
     get_today_schedule,
-    check_time_conflict
-)
-
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
+    check_time_conflict,
+    check_slots_available,
+    find_free_slots,
+    check_time_conflicts_batch
 )
+from tools.snapshot_tools import get_daily_snapshot
 
 # 建立 Calendar Agent
 calendar_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="calendar_agent",
     description="日程管理專家，負責行事曆事件的新增、查詢、修改、刪除",
     instruction="""你是一位專業的日程管理助理，負責協助用戶管理行事曆。
@@ -44,11 +39,21 @@ calendar_agent = LlmAgent(
 4. delete_event: 刪除事件
 5. get_today_schedule: 取得今日日程
 6. check_time_conflict: 檢查時間衝突
+7. check_slots_available: 一次檢查同一天多個候選時段是否空閒
+8. find_free_slots: 查詢日期範圍內工作時間中的空閒時段
+9. check_time_conflicts_batch: 批次檢查多個提案時段 (可跨日期) 的衝突
+10. get_daily_snapshot: 一次取得某天的事件、截止/過期任務、提醒、衝突與空閒時段
 
 工作原則:
 - 新增事件前先檢查時間衝突
 - 提供清晰的時間資訊（日期、時間、地點）
 - 如有衝突，主動提醒並建議替代時間
+- 有多個候選時段時，使用 check_slots_available 一次檢查
+- 週期性會議使用 add_event 的 recurrence (daily/weekly/monthly) 搭配 count/until 建立一筆週期事件，不要逐場新增
+- 週期場次 ID 格式為 EVT-XXX@YYYY-MM-DD，用於只修改或取消單一場次
+- 一次安排多個事件時，使用 check_time_conflicts_batch 取代逐一呼叫 check_time_conflict
+- 需要找可排入的時間時，直接使用 find_free_slots，不要反覆查詢日程猜測
+- 查詢某天整體行程時使用 get_daily_snapshot，不要分別查詢事件、任務、提醒與衝突
 - 使用繁體中文回應
 
 輸出格式:
@@ -61,7 +66,11 @@ calendar_agent = LlmAgent(
         update_event,
         delete_event,
         get_today_schedule,
-        check_time_conflict
+        check_time_conflict,
+        check_slots_available,
+        find_free_slots,
+        check_time_conflicts_batch,
+        get_daily_snapshot
     ],
     output_key="calendar_results"  # 將結果儲存到 session state
 )
\ No newline at end of file
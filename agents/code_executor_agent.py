@@ -6,11 +6,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
 from google.adk.code_executors import BuiltInCodeExecutor
-from google.genai import types
 from dotenv import load_dotenv
 
+from services.model_factory import get_model
 # 導入任務工具函數，讓代碼執行時可以訪問
 from tools.task_tools import (
     get_task_statistics,
@@ -19,17 +18,9 @@ from tools.task_tools import (
 
 load_dotenv()
 
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
 # 建立 Code Executor Agent (僅用於代碼執行，不使用 tools)
 code_executor_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="code_executor_agent",
     description="專業的 Python 代碼執行代理，負責執行複雜的計算和分析代碼",
     instruction="""你是一位專業的 Python 代碼執行專家。你的唯一職責是生成並執行 Python 代碼來完成計算和分析任務。
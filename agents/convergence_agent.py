@@ -0,0 +1,157 @@
+"""Convergence Agent - 優化迴圈收斂檢查 (LoopAgent 的一部分)
+Course Concept: Day 1 - Custom Agent (BaseAgent), LoopAgent
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from config.settings import Settings
+from tools.calendar_tools import CALENDAR_INDEX
+from tools.schedule_rules import evaluate_schedule, schedule_score
+from tools.task_tools import TASK_INDEX
+
+# 每輪開始時的指紋與分數
+ITERATION_START_KEY = "optimization_iteration_start"
+# 每輪的耗時與變化
+TRACE_KEY = "optimization_trace"
+
+
+def state_fingerprint() -> List[int]:
+    """任務與日程的狀態指紋 (兩個索引的異動版本)"""
+    len(TASK_INDEX)  # 確保索引已載入，version 才會反映之後的異動
+    len(CALENDAR_INDEX)
+    return [TASK_INDEX.version, CALENDAR_INDEX.version]
+
+
+def iteration_trace(state, invocation_id: str, stopped_by: Optional[str] = None) -> Optional[List[Dict]]:
+    """
+    計算本輪的耗時與評分變化，附加到 optimization_trace 之後
+
+    除了 convergence_agent，在迴圈中途結束的代理 (評審判定已最佳化、adjuster_agent 呼叫 exit_loop)
+    也以此記錄最後一輪，optimization_trace 才不會少了結束的那一輪。
+
+    Args:
+        state: session state (或 tool_context.state)
+        invocation_id: 目前的 invocation ID
+        stopped_by: 結束迴圈的代理名稱 (選填)
+
+    Returns:
+        新的 optimization_trace；本輪開始紀錄不屬於這次執行時回傳 None
+    """
+    start = state.get(ITERATION_START_KEY)
+    if not start or start.get("invocation_id") != invocation_id:
+        return None
+    score = schedule_score(evaluate_schedule())
+    entry = {
+        "iteration": start["iteration"],
+        "latency_ms": round((time.time() - start["started_at"]) * 1000, 1),
+        "changed": state_fingerprint() != start["fingerprint"],
+        "score_before": start["score"],
+        "score_after": score,
+        "score_delta": score - start["score"],
+        "stopped_by": stopped_by
+    }
+    return list(state.get(TRACE_KEY) or []) + [entry]
+
+
+def _state_event(
+    ctx: InvocationContext,
+    author: str,
+    state_delta: dict,
+    text: Optional[str] = None,
+    escalate: bool = False
+) -> Event:
+    content = None
+    if text:
+        content = types.Content(role="model", parts=[types.Part(text=text)])
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=author,
+        branch=ctx.branch,
+        content=content,
+        actions=EventActions(state_delta=state_delta, escalate=escalate)
+    )
+
+
+class IterationStartAgent(BaseAgent):
+    """
+    記錄每輪開始的時間、狀態指紋與規則評分 (放在迴圈的第一個)
+
+    第一輪同時清除上一次規劃留下的 optimization_trace。
+    """
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        previous = ctx.session.state.get(ITERATION_START_KEY) or {}
+        first = previous.get("invocation_id") != ctx.invocation_id
+        state_delta = {
+            ITERATION_START_KEY: {
+                "invocation_id": ctx.invocation_id,
+                "iteration": 1 if first else previous.get("iteration", 0) + 1,
+                "started_at": time.time(),
+                "fingerprint": state_fingerprint(),
+                "score": schedule_score(evaluate_schedule())
+            }
+        }
+        if first:
+            state_delta[TRACE_KEY] = []
+        yield _state_event(ctx, self.name, state_delta)
+
+
+class ConvergenceAgent(BaseAgent):
+    """
+    在 adjuster_agent 之後檢查本輪的效果 (放在迴圈的最後一個)
+
+    以下情況發出 escalate 結束迴圈，每輪的耗時、評分變化寫入 optimization_trace:
+    - 本輪沒有改變任何任務或日程
+    - 規則評分變差 (升高)
+    - 規則評分持平的輪數超過 Settings.OPTIMIZATION_STALL_TOLERANCE (預設 0，評分沒有改善就結束，
+      不多花一輪 LLM 評審與調整)
+    """
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        trace = iteration_trace(ctx.session.state, ctx.invocation_id)
+        if trace is None:
+            return
+
+        entry = trace[-1]
+        flat = 0
+        for previous in reversed(trace):
+            if not previous["changed"] or previous["score_delta"] != 0:
+                break
+            flat += 1
+
+        reason = None
+        if not entry["changed"]:
+            reason = "本輪沒有調整任何任務或日程"
+        elif entry["score_delta"] > 0:
+            reason = "排程評分變差"
+        elif flat > Settings.OPTIMIZATION_STALL_TOLERANCE:
+            reason = "排程評分沒有再改善" if flat == 1 else f"連續 {flat} 輪評分沒有改善"
+        text = None
+        if reason:
+            entry["stopped_by"] = self.name
+            text = f"優化迴圈在第 {entry['iteration']} 輪結束: {reason} (評分 {entry['score_after']})"
+        yield _state_event(ctx, self.name, {TRACE_KEY: trace}, text, escalate=reason is not None)
+
+
+iteration_start_agent = IterationStartAgent(
+    name="iteration_start_agent",
+    description="記錄每輪優化開始時的狀態指紋與排程評分"
+)
+
+convergence_agent = ConvergenceAgent(
+    name="convergence_agent",
+    description="檢查本輪調整是否改變排程並改善評分，沒有進展時結束優化迴圈"
+)
@@ -6,20 +6,12 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.genai import types
 
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
+from services.model_factory import get_model
 
 # 建立 Critic Agent
 critic_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="critic_agent",
     description="排程評審專家，負責評估當前任務排程是否合理",
     instruction="""你是一位嚴格的排程評審專家，負責評估任務排程的合理性。
@@ -34,6 +26,7 @@ critic_agent = LlmAgent(
 輸入格式 (從 session state 讀取):
 - calendar_results: 今日日程
 - task_results: 任務清單
+- rule_feedback: 規則預先檢查的結果 (若有)，其中的問題都是依資料計算的確定結果
 
 輸出格式:
 請以 JSON 格式輸出評估結果:
@@ -0,0 +1,122 @@
+"""Direct Query Agent - 直接查詢代理 (每日規劃流水線的第一步)
+Course Concept: Day 1 - Custom Agent (BaseAgent), ParallelAgent
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+from typing import AsyncGenerator, Dict
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from tools.calendar_tools import get_today_schedule
+from tools.task_tools import list_tasks, get_task_statistics
+from tools.reminder_tools import get_upcoming_reminders
+
+# 每日規劃最多列出的未完成任務數 (依優先級、截止日排序)
+MAX_TASKS = 30
+# 即將到來的提醒範圍 (小時)
+REMINDER_HOURS = 24
+
+
+def query_calendar() -> Dict:
+    """今日日程 (只保留規劃需要的欄位)"""
+    result = get_today_schedule()
+    return {
+        "count": result.get("count", 0),
+        "events": [
+            {
+                "id": event["id"],
+                "title": event["title"],
+                "start_time": event["start_time"],
+                "end_time": event["end_time"],
+                "location": event.get("location", "")
+            }
+            for event in result.get("events", [])
+        ]
+    }
+
+
+def query_tasks() -> Dict:
+    """未完成任務與任務統計"""
+    result = list_tasks(limit=MAX_TASKS)
+    return {
+        "open_count": result["total"],
+        "tasks": [
+            {
+                "id": task["id"],
+                "title": task["title"],
+                "priority": task["priority"],
+                "status": task["status"],
+                "due_date": task["due_date"],
+                "estimated_hours": task["estimated_hours"]
+            }
+            for task in result["tasks"]
+        ],
+        "statistics": get_task_statistics()
+    }
+
+
+def query_reminders() -> Dict:
+    """未來 REMINDER_HOURS 小時內的提醒"""
+    result = get_upcoming_reminders(REMINDER_HOURS)
+    return {
+        "count": result["count"],
+        "reminders": [
+            {
+                "id": reminder["id"],
+                "title": reminder["title"],
+                "reminder_time": reminder["reminder_time"],
+                "related_id": reminder["related_id"],
+                "time_until": reminder["time_until"]
+            }
+            for reminder in result["reminders"]
+        ]
+    }
+
+
+# state key → 查詢函式
+QUERIES = {
+    "calendar_results": query_calendar,
+    "task_results": query_tasks,
+    "reminder_results": query_reminders
+}
+
+
+class DirectQueryAgent(BaseAgent):
+    """
+    不呼叫 LLM 的並行查詢
+
+    在執行緒中同時呼叫日程、任務、提醒的查詢工具，
+    將精簡的結果以 JSON 寫入 calendar_results/task_results/reminder_results，
+    與 query_parallel 寫入的 state key 相同，可直接替換。
+    """
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        results = await asyncio.gather(*(asyncio.to_thread(query) for query in QUERIES.values()))
+        state_delta = {
+            key: json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+            for key, result in zip(QUERIES, results)
+        }
+        # 同時輸出為事件內容，讓後續的 analysis_agent 在對話紀錄中看到查詢結果
+        text = "\n".join(f"{key}: {value}" for key, value in state_delta.items())
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(state_delta=state_delta)
+        )
+
+
+direct_query_agent = DirectQueryAgent(
+    name="direct_query_agent",
+    description="直接並行呼叫查詢工具取得今日日程、未完成任務與即將到來的提醒，不需呼叫 LLM"
+)
@@ -0,0 +1,178 @@
+"""Intent Router Agent - 意圖路由代理 (根代理)
+Course Concept: Day 1 - Custom Agent (BaseAgent), Multi-Agent 路由
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+from datetime import date, timedelta
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
+from pydantic import model_validator
+
+from tools.snapshot_tools import get_daily_snapshot
+from tools.task_tools import list_tasks
+
+# 超過此長度的訊息通常包含多個要求，交給協調代理判斷
+MAX_ROUTED_LENGTH = 30
+# 列出任務時最多顯示的數量
+MAX_LISTED_TASKS = 20
+
+# 意圖 → 規則 (任一符合即視為該意圖)
+INTENT_RULES: List[Tuple[str, List[str]]] = [
+    ("daily_plan", [r"(今日|今天|每日|明天|明日)的?規劃", r"規劃(一下)?(今天|今日|明天|明日)", r"幫我(安排|規劃)(今天|今日|明天|明日)"]),
+    ("daily_overview", [r"(今天|今日|明天|明日|後天)的?(有)?(什麼|哪些)?(行程|日程|安排)", r"(今天|今日|明天|明日|後天)要做什麼"]),
+    ("task_statistics", [r"任務(的)?(統計|分析|完成率)", r"分析(我的)?任務", r"燃盡圖"]),
+    ("list_tasks", [r"(列出|顯示|查看|看看)?(所有|全部)?的?(待辦|未完成)(任務|事項|清單)", r"任務清單"]),
+]
+
+# 出現這些字詞代表要修改資料或有額外條件，不直接路由
+BLOCKING_PATTERNS = [r"新增|建立|刪除|取消|修改|更新|改成|改為|設定|提醒我|標記|完成了|延後|提前", r"TSK-|EVT-|REM-"]
+
+# 日期字詞 → 相對天數
+DAY_OFFSETS = {"後天": 2, "明天": 1, "明日": 1}
+
+
+def classify_intent(text: str) -> Optional[str]:
+    """
+    以關鍵字規則判斷訊息的意圖
+
+    Args:
+        text: 用戶訊息
+
+    Returns:
+        唯一符合的意圖 (daily_plan/daily_overview/task_statistics/list_tasks)；
+        沒有符合、符合多個或訊息可能要求修改資料時回傳 None
+    """
+    text = text.strip()
+    if not text or len(text) > MAX_ROUTED_LENGTH:
+        return None
+    if any(re.search(pattern, text) for pattern in BLOCKING_PATTERNS):
+        return None
+    matched = [
+        intent for intent, patterns in INTENT_RULES
+        if any(re.search(pattern, text) for pattern in patterns)
+    ]
+    return matched[0] if len(matched) == 1 else None
+
+
+def _target_date(text: str) -> str:
+    offset = next((days for word, days in DAY_OFFSETS.items() if word in text), 0)
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def format_daily_snapshot(snapshot: Dict) -> str:
+    """將 get_daily_snapshot 的結果整理成回覆文字"""
+    lines = [f"📅 {snapshot['date']} 行程總覽", ""]
+    lines.append("行程:")
+    if snapshot["events"]:
+        for event in snapshot["events"]:
+            location = f" @ {event['location']}" if event["location"] else ""
+            lines.append(f"- {event['start_time']}-{event['end_time']} {event['title']}{location}")
+    else:
+        lines.append("- 沒有安排事件")
+
+    if snapshot["due_tasks"]:
+        lines.append("")
+        lines.append("當日截止的任務:")
+        for task in snapshot["due_tasks"]:
+            lines.append(f"- [{task['priority']}] {task['title']} ({task['id']})")
+    if snapshot["overdue_count"]:
+        lines.append("")
+        lines.append(f"過期任務 ({snapshot['overdue_count']} 個):")
+        for task in snapshot["overdue_tasks"]:
+            lines.append(f"- [{task['priority']}] {task['title']} - 截止: {task['due_date']}")
+    if snapshot["reminders"]:
+        lines.append("")
+        lines.append("提醒:")
+        for reminder in snapshot["reminders"]:
+            lines.append(f"- {reminder['reminder_time'][-5:]} {reminder['title']}")
+    if snapshot["conflicts"]:
+        lines.append("")
+        lines.append("⚠️ 時間衝突:")
+        for conflict in snapshot["conflicts"]:
+            lines.append(
+                f"- {conflict['start_time']}-{conflict['end_time']} "
+                f"{' 與 '.join(conflict['event_ids'])} 重疊"
+            )
+    if snapshot["free_slots"]:
+        lines.append("")
+        lines.append("空閒時段: " + "、".join(
+            f"{slot['start_time']}-{slot['end_time']}" for slot in snapshot["free_slots"]
+        ))
+    return "\n".join(lines)
+
+
+def format_task_list(result: Dict) -> str:
+    """將 list_tasks 的結果整理成回覆文字"""
+    if not result["tasks"]:
+        return "目前沒有待辦任務 🎉"
+    lines = [f"📋 待辦任務 (共 {result['total']} 個，依優先級排序)", ""]
+    for i, task in enumerate(result["tasks"], 1):
+        due = f" - 截止: {task['due_date']}" if task["due_date"] else ""
+        lines.append(f"{i}. [{task['priority']}] {task['title']} ({task['id']}){due}")
+    if result["total"] > len(result["tasks"]):
+        lines.append(f"... 另有 {result['total'] - len(result['tasks'])} 個任務")
+    return "\n".join(lines)
+
+
+class IntentRouterAgent(BaseAgent):
+    """
+    在協調代理之前以規則判斷明確的意圖
+
+    - daily_overview / list_tasks: 直接呼叫工具並整理回覆，不需呼叫 LLM
+    - daily_plan: 直接執行每日規劃流水線
+    - task_statistics: 直接交給任務代理
+    - 其他或無法確定的訊息: 交給協調代理 (sub_agents 的第一個)
+
+    planning_agent 與 task_agent 也必須列在 sub_agents 中，
+    代理樹 (transfer_to_agent、find_agent) 才會與實際執行的代理一致。
+    """
+
+    # 每日規劃流水線與任務代理 (皆為 sub_agents)
+    planning_agent: BaseAgent
+    task_agent: BaseAgent
+
+    @model_validator(mode="after")
+    def _check_routed_agents(self) -> "IntentRouterAgent":
+        for agent in (self.planning_agent, self.task_agent):
+            if not any(agent is sub_agent for sub_agent in self.sub_agents):
+                raise ValueError(f"{agent.name} 必須是 {self.name} 的 sub_agents")
+        return self
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        text = ""
+        if ctx.user_content and ctx.user_content.parts:
+            text = "".join(part.text or "" for part in ctx.user_content.parts)
+        intent = classify_intent(text)
+
+        if intent == "daily_overview":
+            yield self._reply(ctx, format_daily_snapshot(get_daily_snapshot(_target_date(text))))
+            return
+        if intent == "list_tasks":
+            yield self._reply(ctx, format_task_list(list_tasks(limit=MAX_LISTED_TASKS)))
+            return
+
+        if intent == "daily_plan":
+            agent = self.planning_agent
+        elif intent == "task_statistics":
+            agent = self.task_agent
+        else:
+            agent = self.sub_agents[0]
+        async for event in agent.run_async(ctx):
+            yield event
+
+    def _reply(self, ctx: InvocationContext, text: str) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)])
+        )
@@ -6,9 +6,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.genai import types
 
+from services.model_factory import get_model
 from tools.reminder_tools import (
     set_reminder,
     list_reminders,
@@ -17,17 +16,9 @@ from tools.reminder_tools import (
     complete_reminder
 )
 
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
 # 建立 Reminder Agent
 reminder_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="reminder_agent",
     description="提醒管理專家，負責設定、查詢、管理各種提醒通知",
     instruction="""你是一位專業的提醒助理，負責協助用戶管理提醒通知。
@@ -0,0 +1,65 @@
+"""Rule Critic Agent - 規則式排程評審代理 (LoopAgent 的一部分)
+Course Concept: Day 1 - Custom Agent (BaseAgent), LoopAgent
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from agents.convergence_agent import TRACE_KEY, iteration_trace
+from tools.schedule_rules import evaluate_schedule
+
+
+class RuleCriticAgent(BaseAgent):
+    """
+    不呼叫 LLM 的排程評審
+
+    以 evaluate_schedule 計算評估結果寫入 session state，
+    排程已最佳化時發出 escalate 結束 LoopAgent 迴圈。
+    """
+
+    # 評估結果寫入的 state key
+    output_key: str = "critic_feedback"
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        feedback = evaluate_schedule()
+        text = json.dumps(feedback, ensure_ascii=False, indent=2)
+        state_delta = {self.output_key: text}
+        if feedback["is_optimal"]:
+            # 迴圈在 convergence_agent 之前結束，本輪的耗時與評分在這裡記錄
+            trace = iteration_trace(ctx.session.state, ctx.invocation_id, self.name)
+            if trace is not None:
+                state_delta[TRACE_KEY] = trace
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            actions=EventActions(
+                state_delta=state_delta,
+                escalate=feedback["is_optimal"]
+            )
+        )
+
+
+# 取代 LLM 評審 (CRITIC_MODE=rules)
+rule_critic_agent = RuleCriticAgent(
+    name="rule_critic_agent",
+    description="以規則計算排程評估結果，排程已最佳化時結束優化迴圈"
+)
+
+# LLM 評審前的預先檢查 (CRITIC_MODE=precheck)，結果另存為 rule_feedback 供 critic_agent 參考
+rule_precheck_agent = RuleCriticAgent(
+    name="rule_precheck_agent",
+    description="以規則預先檢查排程，已最佳化時直接結束優化迴圈，不需呼叫 LLM 評審",
+    output_key="rule_feedback"
+)
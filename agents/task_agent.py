@@ -6,10 +6,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
 from google.adk.tools.agent_tool import AgentTool
-from google.genai import types
 
+from services.model_factory import get_model
 from tools.task_tools import (
     create_task,
     list_tasks,
@@ -19,21 +18,19 @@ from tools.task_tools import (
     get_task_statistics,
     get_tasks_for_analysis
 )
+from tools.task_analytics import (
+    get_task_completion_rate,
+    get_hours_breakdown,
+    get_overdue_histogram,
+    get_burndown
+)
 from agents.code_executor_agent import code_executor_agent
 from dotenv import load_dotenv
 
 load_dotenv()  # 加載 .env 文件中的 API Key
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
 # 建立 Task Agent (含 CodeExecutor)
 task_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="task_agent",
     description="任務管理專家，負責任務的建立、追蹤、分析，可使用 Python 代碼進行統計分析",
     instruction="""你是一位專業的任務管理助理，負責協助用戶管理待辦事項。
@@ -47,11 +44,15 @@ task_agent = LlmAgent(
 6. get_task_statistics: 取得任務統計
 7. get_tasks_for_analysis: 取得任務資料供分析
 
+內建分析工具 (直接計算，優先使用):
+- get_task_completion_rate: 整體與各優先級的完成率
+- get_hours_breakdown: 未完成任務的工時 (依優先級、依截止週)
+- get_overdue_histogram: 過期任務依過期天數的分布
+- get_burndown: 每日剩餘工時的燃盡圖資料
+
 特殊能力 - 代碼執行 (透過 code_executor_agent):
-當需要進行複雜分析時，你可以使用 code_executor_agent 來執行 Python 代碼:
-- 計算任務完成率
-- 分析優先級分佈
-- 預估總工時
+內建分析工具無法回答的複雜分析，才使用 code_executor_agent 執行 Python 代碼:
+- 自訂條件的統計
 - 生成視覺化圖表數據
 
 使用方式:
@@ -71,6 +72,10 @@ task_agent = LlmAgent(
         delete_task,
         get_task_statistics,
         get_tasks_for_analysis,
+        get_task_completion_rate,
+        get_hours_breakdown,
+        get_overdue_histogram,
+        get_burndown,
         AgentTool(agent=code_executor_agent)  # Day 2 概念: 透過 AgentTool 使用代碼執行器
     ],
     output_key="task_results"
@@ -14,7 +14,23 @@ class Settings:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
     # Model Configuration
-    DEFAULT_MODEL = "gemini-2.5-flash-lite"
+    DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gemini-2.5-flash-lite")
+    # 全域限流 (所有代理共用，0 = 不限制) 與共用 Client 的 HTTP 連線上限
+    MODEL_REQUESTS_PER_MINUTE = float(os.getenv("MODEL_REQUESTS_PER_MINUTE", 15))
+    MODEL_TOKENS_PER_MINUTE = float(os.getenv("MODEL_TOKENS_PER_MINUTE", 250000))
+    MODEL_MAX_CONNECTIONS = int(os.getenv("MODEL_MAX_CONNECTIONS", 10))
+    # 模型呼叫的重試策略 (退避時間加倍、以 MAX_DELAY 為上限，JITTER 為隨機縮短的比例)
+    MODEL_RETRY_ATTEMPTS = int(os.getenv("MODEL_RETRY_ATTEMPTS", 4))
+    MODEL_RETRY_INITIAL_DELAY = float(os.getenv("MODEL_RETRY_INITIAL_DELAY", 1))
+    MODEL_RETRY_MAX_DELAY = float(os.getenv("MODEL_RETRY_MAX_DELAY", 8))
+    MODEL_RETRY_JITTER = float(os.getenv("MODEL_RETRY_JITTER", 0.5))
+    # 每次請求與每輪對話的時間上限 (秒，0 = 不限制)
+    MODEL_REQUEST_TIMEOUT_SECONDS = float(os.getenv("MODEL_REQUEST_TIMEOUT_SECONDS", 30))
+    MODEL_TURN_DEADLINE_SECONDS = float(os.getenv("MODEL_TURN_DEADLINE_SECONDS", 120))
+    # 對沖請求: 超過近期延遲的百分位數仍未完成時再送出一次相同的請求
+    MODEL_HEDGE_ENABLED = os.getenv("MODEL_HEDGE_ENABLED", "false").lower() == "true"
+    MODEL_HEDGE_PERCENTILE = float(os.getenv("MODEL_HEDGE_PERCENTILE", 95))
+    MODEL_HEDGE_MIN_SAMPLES = int(os.getenv("MODEL_HEDGE_MIN_SAMPLES", 20))
     
     # Context Compaction 設定
     COMPACTION_INTERVAL = int(os.getenv("COMPACTION_INTERVAL", 5))
@@ -24,8 +40,43 @@ class Settings:
     WORK_START_HOUR = int(os.getenv("WORK_START_HOUR", 9))
     WORK_END_HOUR = int(os.getenv("WORK_END_HOUR", 18))
     
+    # 儲存設定 (memory/sqlite/journal)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+    STORAGE_PATH = os.getenv("STORAGE_PATH", "data/schedule.db")
+    JOURNAL_DIR = os.getenv("JOURNAL_DIR", "data/journal")
+    SNAPSHOT_INTERVAL = int(os.getenv("SNAPSHOT_INTERVAL", 10000))
+    
+    # 意圖路由 (明確的請求不經過協調代理的 LLM 判斷)
+    INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+    
+    # 每日規劃的查詢階段 (direct: 直接呼叫查詢工具；llm: 三個 LlmAgent 並行查詢)
+    QUERY_MODE = os.getenv("QUERY_MODE", "direct")
+    
+    # 讀取工具快取的結果數上限 (每個工具，0 = 不快取)
+    TOOL_CACHE_SIZE = int(os.getenv("TOOL_CACHE_SIZE", 256))
+    
     # LoopAgent 設定
     MAX_OPTIMIZATION_ITERATIONS = int(os.getenv("MAX_OPTIMIZATION_ITERATIONS", 3))
+    # 有調整但評分持平時還能再繼續的輪數 (0 = 評分沒有改善就結束迴圈)
+    OPTIMIZATION_STALL_TOLERANCE = int(os.getenv("OPTIMIZATION_STALL_TOLERANCE", 0))
+    
+    # 排程評審設定
+    # rules: 只用規則評審；precheck: 規則判定已最佳化時跳過 LLM 評審；llm: 只用 LLM 評審
+    CRITIC_MODE = os.getenv("CRITIC_MODE", "precheck")
+    MAX_DAILY_HOURS = float(os.getenv("MAX_DAILY_HOURS", 8))
+    
+    # 排程規劃引擎的搜尋時間上限 (毫秒)
+    PLANNER_TIME_BUDGET_MS = int(os.getenv("PLANNER_TIME_BUDGET_MS", 500))
+    # 多候選排程平行評分的工作行程數 (0 = CPU 核心數)
+    OPTIMIZER_WORKERS = int(os.getenv("OPTIMIZER_WORKERS", 0))
+    
+    # 模型回應快取 (資料與問題都沒有改變時直接回傳先前的回應)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 256))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 600))
+    # 磁碟層目錄 (以純文字保存完整對話內容，預設關閉；例如 data/response_cache)
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "")
+    RESPONSE_CACHE_DISK_SIZE = int(os.getenv("RESPONSE_CACHE_DISK_SIZE", 2048))
     
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
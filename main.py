@@ -6,13 +6,14 @@ Course Concepts:
 - Day 4: LoggingPlugin, Callbacks
 """
 import asyncio
+import contextlib
 import os
+import threading
 import uuid
 import sys
 from dotenv import load_dotenv
 
 from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.models.google_llm import Gemini
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
@@ -23,25 +24,25 @@ from google.adk.apps.app import App, EventsCompactionConfig
 from google.genai import types
 #from google.adk.core.events_compaction_config import EventsCompactionConfig
 
-from workflows.query_workflow import query_parallel
+from services.model_factory import get_model
+from workflows.query_workflow import query_stage
 from workflows.optimize_workflow import optimization_loop
 from agents.task_agent import task_agent
+from agents.intent_router_agent import IntentRouterAgent
+from tools.snapshot_tools import get_daily_snapshot
+from tools.schedule_planner import warm_up_optimizer
 from callbacks.habit_callbacks import learn_user_habits
+from services.reminder_dispatcher import ReminderDispatcher
+from plugins.response_cache import ResponseCachePlugin
+from plugins.turn_deadline import TurnDeadlinePlugin
+from config.settings import Settings
 
 # 載入環境變數
 load_dotenv()
 
-# 重試配置
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
 
 analysis_agent = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="analysis_agent",
     description="分析日程和任務資料，生成每日摘要和建議",
     instruction="""你是一位分析專家，負責整合日程、任務、提醒資訊並提供建議。
@@ -86,7 +87,7 @@ daily_planning_pipeline = SequentialAgent(
     name="daily_planning_pipeline",
     description="每日規劃流水線: 查詢 → 分析 → 優化",
     sub_agents=[
-        query_parallel,      # Step 1: ParallelAgent 並行查詢
+        query_stage,         # Step 1: 並行查詢 (direct_query_agent 或 ParallelAgent)
         analysis_agent,      # Step 2: 分析整合
         optimization_loop    # Step 3: LoopAgent 迭代優化
     ]
@@ -94,7 +95,7 @@ daily_planning_pipeline = SequentialAgent(
 
 
 coordinator = LlmAgent(
-    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
+    model=get_model(),
     name="schedule_coordinator",
     description="智慧日程管理協調中心，整合日程、任務、提醒管理功能",
     instruction="""你是智慧日程管理助手，負責協助用戶管理時間和任務。
@@ -109,8 +110,11 @@ coordinator = LlmAgent(
 
 3. 【任務分析】使用 task_agent 進行任務統計分析
 
+4. 【每日總覽】使用 get_daily_snapshot 一次取得某天的事件、截止/過期任務、提醒、衝突與空閒時段
+
 路由規則:
-- "今日行程" / "今天要做什麼" → daily_planning_pipeline
+- "今天有什麼行程" / "明天的行程" → get_daily_snapshot (一次呼叫即可回答，不需再查詢其他工具)
+- "今日規劃" / "幫我安排今天" → daily_planning_pipeline
 - "分析任務" / "任務統計" → task_agent (CodeExecutor)
 - "我的習慣" / "偏好設定" → preload_memory
 
@@ -123,28 +127,55 @@ coordinator = LlmAgent(
 記憶功能:
 - 系統會自動學習你的使用習慣
 - 可以根據習慣提供個人化建議""",
-    sub_agents=[
-        daily_planning_pipeline,  
-    ],
+    # 啟用意圖路由時每日規劃流水線改掛在 schedule_router 下 (一個代理只能有一個父代理)，
+    # 協調代理仍可用 transfer_to_agent 轉交給同層的 daily_planning_pipeline
+    sub_agents=[] if Settings.INTENT_ROUTER_ENABLED else [daily_planning_pipeline],
     tools=[
         preload_memory_tool,               
+        get_daily_snapshot,
         AgentTool(agent=task_agent)        
     ],
-    after_agent_callback=learn_user_habits  
+    # 啟用意圖路由時由根代理 schedule_router 負責學習習慣，避免重複記錄
+    after_agent_callback=None if Settings.INTENT_ROUTER_ENABLED else learn_user_habits
 )
 
 
+if Settings.INTENT_ROUTER_ENABLED:
+    # 任務統計直接交給任務代理；task_agent 已是 parallel_query 的子代理，另建一個實例
+    task_statistics_agent = task_agent.clone(update={"name": "task_statistics_agent"})
+
+    # 意圖路由: 明確的請求直接交給工具/代理，其餘交給協調代理
+    # (路由執行的代理都是 sub_agents，transfer_to_agent 與 find_agent 看到的樹與實際執行一致)
+    root_agent = IntentRouterAgent(
+        name="schedule_router",
+        description="以規則判斷明確的意圖並直接處理，無法確定時交給協調代理",
+        sub_agents=[coordinator, daily_planning_pipeline, task_statistics_agent],
+        planning_agent=daily_planning_pipeline,
+        task_agent=task_statistics_agent,
+        after_agent_callback=learn_user_habits
+    )
+else:
+    root_agent = coordinator
+
+
 session_service = InMemorySessionService()
 memory_service = InMemoryMemoryService()
 
 
 logging_plugin = LoggingPlugin()
+plugins = [logging_plugin]
+if Settings.RESPONSE_CACHE_ENABLED:
+    # Day 4 概念: Plugin 在模型呼叫前查詢快取，命中時不呼叫模型
+    plugins.append(ResponseCachePlugin())
+if Settings.MODEL_TURN_DEADLINE_SECONDS > 0:
+    # 每輪對話的模型呼叫截止時間，重試策略據此限制逾時與重試
+    plugins.append(TurnDeadlinePlugin())
 
 
 app = App(
     name="smart_schedule_manager",
-    root_agent=coordinator,
-    plugins=[logging_plugin],  
+    root_agent=root_agent,
+    plugins=plugins,
     events_compaction_config=EventsCompactionConfig(
         compaction_interval=int(os.getenv("COMPACTION_INTERVAL", 5)),
         overlap_size=int(os.getenv("OVERLAP_SIZE", 2))
@@ -158,6 +189,9 @@ runner = Runner(
     memory_service=memory_service
 )
 
+# 提醒派送服務 (與 Runner 在同一個事件迴圈中執行)
+reminder_dispatcher = ReminderDispatcher()
+
 
 async def main():
     """主程式執行流程"""
@@ -187,9 +221,51 @@ async def main():
     
     print(f"[System] 會話已建立: {session_id}\n")
     
+    # 預先啟動多候選排程評分的子行程，第一次比較時不必等待啟動
+    warm_up_optimizer()
+
+    # 啟動提醒派送，提醒時間到時會直接顯示
+    await reminder_dispatcher.start()
+    
+    try:
+        await _conversation_loop(user_id, session_id)
+    finally:
+        await reminder_dispatcher.stop()
+
+
+def _read_input(prompt: str) -> asyncio.Future:
+    """
+    在背景執行緒等待輸入，讓事件迴圈可以繼續派送提醒
+
+    使用 daemon 執行緒，程式結束時不必等使用者按下 Enter。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result, error):
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def read():
+        try:
+            result, error = input(prompt), None
+        except Exception as e:
+            result, error = None, e
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(settle, result, error)
+
+    threading.Thread(target=read, daemon=True).start()
+    return future
+
+
+async def _conversation_loop(user_id: str, session_id: str):
+    """對話迴圈"""
     while True:
         try:
-            user_input = input("\n您: ").strip()
+            user_input = (await _read_input("\n您: ")).strip()
             
             if user_input.lower() in ['exit', 'quit', '結束', '離開']:
                 print("\n感謝使用智慧日程管理助手，祝您有充實的一天！")
@@ -245,4 +321,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # asyncio.run 收到 Ctrl+C 時取消主工作 (提醒派送等清理照常執行)，結束後再拋出 KeyboardInterrupt
+        print("\n\n系統已中斷，再見！")
\ No newline at end of file
@@ -0,0 +1 @@
+# Schedule Manager - Plugins Module
@@ -0,0 +1,262 @@
+"""模型回應快取 Plugin
+Course Concept: Day 4 - Plugins (before_model_callback / after_model_callback)
+
+同樣的問題在資料沒有改變時會得到同樣的模型回應，
+因此以「模型 + 代理 + 系統指示 + 對話內容 + 指示中引用的 session state + 資料表版本」為鍵
+保存最終回應，命中時在 before_model_callback 直接回傳，不再呼叫模型。
+
+- 記憶體層: LRU，超過 RESPONSE_CACHE_SIZE 時淘汰最久未使用的項目
+- 磁碟層: RESPONSE_CACHE_DIR 下每個鍵一個 JSON 檔，重新啟動後仍可命中，
+  檔案數超過 RESPONSE_CACHE_DISK_SIZE 時刪除最舊的檔案
+- 兩層都以 RESPONSE_CACHE_TTL_SECONDS 判斷過期
+- 資料表的資料狀態識別 (generation) 與目前的分鐘在任何異動或時間前進後改變，舊的回應自然不會再被取用
+  (工具會讀取「現在」計算剩餘時間、尚未觸發的提醒等，只以日序為鍵可能回傳過時的時間)；
+  sqlite/journal 後端的識別跨行程一致，memory 後端每次啟動都不同，
+  重新啟動後不會取用資料已不同的舊回應
+- 過期的磁碟檔案在查詢與整理時刪除；磁碟層保存完整的對話內容 (純文字)，預設關閉
+- 取用先前的回應會改變助手的行為，整個 Plugin 預設關閉 (RESPONSE_CACHE_ENABLED=true 時啟用)
+"""
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+import time
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+from config.settings import Settings
+from tools.calendar_tools import CALENDAR_DATABASE
+from tools.records import now_minutes
+from tools.reminder_tools import REMINDERS_DATABASE
+from tools.task_tools import TASKS_DATABASE
+
+# 超過上限時一次多刪除的比例，避免每次寫入都掃描目錄
+DISK_PRUNE_RATIO = 0.1
+
+
+def store_fingerprint() -> Tuple[str, str, str, int]:
+    """日程/任務/提醒資料表的資料狀態識別與目前的分鐘戳記"""
+    return (
+        CALENDAR_DATABASE.generation,
+        TASKS_DATABASE.generation,
+        REMINDERS_DATABASE.generation,
+        now_minutes()
+    )
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _dump(value) -> object:
+    """將 pydantic 物件轉成可穩定序列化的資料"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, (list, tuple)):
+        return [_dump(item) for item in value]
+    return value
+
+
+class ResponseCachePlugin(BasePlugin):
+    """
+    LlmAgent 模型呼叫的回應快取
+
+    只保存完整 (非串流片段)、沒有錯誤且有內容的回應。
+    """
+
+    def __init__(
+        self,
+        name: str = "response_cache",
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        directory: Optional[str] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Plugin 名稱
+            max_entries: 記憶體層上限，預設 Settings.RESPONSE_CACHE_SIZE
+            ttl_seconds: 回應保存秒數，預設 Settings.RESPONSE_CACHE_TTL_SECONDS
+            directory: 磁碟層目錄，預設 Settings.RESPONSE_CACHE_DIR (空字串表示不使用磁碟層，預設值)
+            max_disk_entries: 磁碟層上限，預設 Settings.RESPONSE_CACHE_DISK_SIZE
+        """
+        super().__init__(name=name)
+        self.max_entries = Settings.RESPONSE_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_seconds = Settings.RESPONSE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.directory = Settings.RESPONSE_CACHE_DIR if directory is None else directory
+        self.max_disk_entries = Settings.RESPONSE_CACHE_DISK_SIZE if max_disk_entries is None else max_disk_entries
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._prune_disk()
+
+        # 鍵 → (到期時間, 回應的 JSON 資料)
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        # (invocation_id, 代理名稱) → 等待模型回應的鍵
+        self._pending: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---- 鍵 ----
+
+    def cache_key(self, callback_context: CallbackContext, llm_request: LlmRequest) -> str:
+        """計算請求的快取鍵"""
+        config = llm_request.config
+        instruction = _dump(config.system_instruction) if config else None
+        instruction_text = json.dumps(instruction, ensure_ascii=False, sort_keys=True)
+        # 只納入系統指示中提到的 state，其他 state (例如計時資料) 不影響回應
+        state = callback_context.state.to_dict()
+        relevant_state = {key: state[key] for key in sorted(state) if key in instruction_text}
+        tools = [
+            declaration.name
+            for tool in (config.tools or [] if config else [])
+            for declaration in (getattr(tool, "function_declarations", None) or [])
+        ]
+        payload = {
+            "model": llm_request.model,
+            "agent": callback_context.agent_name,
+            "instruction": instruction,
+            "contents": _dump(llm_request.contents),
+            "tools": tools,
+            "state": relevant_state,
+            "stores": store_fingerprint()
+        }
+        text = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # ---- 記憶體層與磁碟層 ----
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key: str, expires_at: float, data: Dict):
+        with self._lock:
+            self._entries[key] = (expires_at, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """取得未過期的回應資料 (記憶體層 → 磁碟層)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.directory:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+            if stored is not None:
+                if stored.get("expires_at", 0) > now:
+                    self._remember(key, stored["expires_at"], stored["response"])
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return stored["response"]
+                _remove_quietly(self._path(key))
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, key: str, data: Dict):
+        """保存回應資料到記憶體層與磁碟層"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, data)
+        if not self.directory:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "response": data}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """刪除過期的檔案 (寫入時間 + TTL 已過)，仍超過上限時再刪除最舊的檔案"""
+        try:
+            files = [
+                (entry.stat().st_mtime, entry.path)
+                for entry in os.scandir(self.directory) if entry.name.endswith(".json")
+            ]
+        except OSError:
+            return
+        expired_before = time.time() - self.ttl_seconds
+        live = []
+        for mtime, path in files:
+            if mtime <= expired_before:
+                _remove_quietly(path)
+            else:
+                live.append((mtime, path))
+        if len(live) <= self.max_disk_entries:
+            return
+        live.sort()
+        excess = len(live) - self.max_disk_entries + int(self.max_disk_entries * DISK_PRUNE_RATIO)
+        for _, path in live[:excess]:
+            _remove_quietly(path)
+
+    def stats(self) -> Dict:
+        """快取統計"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    # ---- Plugin callbacks ----
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        key = self.cache_key(callback_context, llm_request)
+        data = self.lookup(key)
+        if data is not None:
+            return LlmResponse.model_validate(data)
+        with self._lock:
+            self._pending[(callback_context.invocation_id, callback_context.agent_name)] = key
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        with self._lock:
+            key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if key is None or llm_response.error_code or not llm_response.content:
+            return None
+        data = llm_response.model_dump(mode="json", exclude_none=True)
+        # 用量資訊屬於原本那次呼叫，命中快取時不應重複計算
+        data.pop("usage_metadata", None)
+        self.store(key, data)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        with self._lock:
+            self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
@@ -0,0 +1,55 @@
+"""每輪對話截止時間 Plugin
+Course Concept: Day 4 - Plugins (before_run_callback / before_model_callback)
+
+每輪對話開始時記錄截止時間 (現在 + MODEL_TURN_DEADLINE_SECONDS)，
+每次模型呼叫前設定到 services.retry_policy 的 context，
+重試策略據此縮短請求逾時，剩餘時間不足時不再重試。
+"""
+from typing import Dict, Optional
+import time
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config.settings import Settings
+from services.retry_policy import set_turn_deadline
+
+
+class TurnDeadlinePlugin(BasePlugin):
+    """為每輪對話 (invocation) 設定模型呼叫的截止時間"""
+
+    def __init__(self, name: str = "turn_deadline", seconds: Optional[float] = None):
+        """
+        Args:
+            name: Plugin 名稱
+            seconds: 每輪對話的時間上限，預設 Settings.MODEL_TURN_DEADLINE_SECONDS
+        """
+        super().__init__(name=name)
+        self.seconds = Settings.MODEL_TURN_DEADLINE_SECONDS if seconds is None else seconds
+        # invocation_id → 截止時間 (time.monotonic())
+        self._deadlines: Dict[str, float] = {}
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        deadline = time.monotonic() + self.seconds
+        self._deadlines[invocation_context.invocation_id] = deadline
+        set_turn_deadline(deadline)
+        return None
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        # 並行代理在各自的 task 中執行，呼叫模型前再設定一次
+        deadline = self._deadlines.get(callback_context.invocation_id)
+        if deadline is not None:
+            set_turn_deadline(deadline)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._deadlines.pop(invocation_context.invocation_id, None)
+        set_turn_deadline(None)
@@ -0,0 +1 @@
+# Schedule Manager - Services Module
@@ -0,0 +1,166 @@
+"""模型工廠
+所有代理都由 get_model() 取得模型，同一個模型名稱共用同一個 Gemini 實例:
+- 共用同一個 google-genai Client 與其 HTTP 連線池 (上限 MODEL_MAX_CONNECTIONS)，
+  各代理的請求重複使用已建立的連線
+- 每次模型呼叫前先經過全域限流器 MODEL_RATE_LIMITER (每分鐘請求數/token 數)，
+  ParallelAgent 同時展開多個代理時依序排隊，不會一起撞上 429
+- 重試、逾時與對沖請求由 MODEL_RETRY_POLICY 處理 (SDK 本身不重試)，
+  超過截止時間時回傳 DEADLINE_EXCEEDED 錯誤回應，不讓單一呼叫拖住整個流水線
+"""
+from typing import AsyncGenerator, Dict, List, Optional
+import json
+import threading
+
+import httpx
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from config.settings import Settings
+from services.rate_limiter import MODEL_RATE_LIMITER
+from services.retry_policy import MODEL_RETRY_POLICY, DeadlineExceeded
+
+# 預估 token 數時每個 token 約對應的字元數 (中英混合取保守值)
+CHARS_PER_TOKEN = 3
+
+# SDK 只送出一次，重試交給 MODEL_RETRY_POLICY
+retry_config = types.HttpRetryOptions(attempts=1)
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """
+    以請求的系統指示、對話內容與工具宣告估算輸入 token 數
+
+    只用於限流的預約，實際用量在回應後以 usage_metadata 修正。
+    """
+    chars = 0
+    config = llm_request.config
+    if config and config.system_instruction:
+        chars += len(str(config.system_instruction))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_call or part.function_response:
+                chars += len(json.dumps(
+                    part.model_dump(mode="json", exclude_none=True), ensure_ascii=False
+                ))
+    if config and config.tools:
+        for tool in config.tools:
+            for declaration in getattr(tool, "function_declarations", None) or []:
+                chars += len(declaration.name or "") + len(declaration.description or "")
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+def _used_tokens(responses: List[LlmResponse]) -> int:
+    usages = [response.usage_metadata for response in responses if response.usage_metadata]
+    return max((usage.total_token_count or 0 for usage in usages), default=0)
+
+
+class PooledGemini(Gemini):
+    """先經過全域限流器與重試策略再呼叫 Gemini 的模型"""
+
+    def pooled_http_options(self) -> types.HttpOptions:
+        """
+        共用 Client 的 HTTP 設定
+
+        以 ADK 為 Gemini 建立的設定為基礎 (追蹤標頭、base_url、api_version、retry_options)，
+        只加上連線池上限，不覆蓋 ADK 原本的設定。
+        """
+        base_url, api_version = self._base_url_and_api_version
+        if api_version is None:
+            api_version = self._configured_api_version()
+        limits = httpx.Limits(
+            max_connections=Settings.MODEL_MAX_CONNECTIONS,
+            max_keepalive_connections=Settings.MODEL_MAX_CONNECTIONS
+        )
+        options = {
+            "headers": self._tracking_headers(),
+            "retry_options": self.retry_options,
+            "base_url": base_url,
+            "client_args": {"limits": limits},
+            "async_client_args": {"limits": limits}
+        }
+        if api_version:
+            options["api_version"] = api_version
+        return types.HttpOptions(**options)
+
+    async def _generate_once(self, llm_request: LlmRequest, estimated: int) -> List[LlmResponse]:
+        """送出一次非串流請求 (已在限流器預約 estimated 個 token)，完成後以實際用量修正"""
+        # 重試與對沖請求各自使用一份對話內容，避免同時修改同一個 list
+        request = llm_request.model_copy(update={"contents": list(llm_request.contents)})
+        responses = []
+        async for llm_response in super().generate_content_async(request, stream=False):
+            responses.append(llm_response)
+        MODEL_RATE_LIMITER.settle(estimated, _used_tokens(responses))
+        return responses
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimated = estimate_tokens(llm_request)
+
+        if stream:
+            # 串流回應已經部分輸出後無法重試，只經過限流器
+            await MODEL_RATE_LIMITER.acquire(estimated)
+            responses = []
+            async for llm_response in super().generate_content_async(llm_request, stream):
+                responses.append(llm_response)
+                yield llm_response
+            MODEL_RATE_LIMITER.settle(estimated, _used_tokens(responses))
+            return
+
+        try:
+            # 每次請求 (含重試與對沖請求) 都先在限流器預約
+            responses = await MODEL_RETRY_POLICY.execute(
+                lambda: self._generate_once(llm_request, estimated),
+                reserve=lambda max_wait: MODEL_RATE_LIMITER.reserve(estimated, max_wait)
+            )
+        except DeadlineExceeded as error:
+            yield LlmResponse(error_code="DEADLINE_EXCEEDED", error_message=str(error))
+            return
+        for llm_response in responses:
+            yield llm_response
+
+
+# 模型名稱 → 共用的模型實例
+_MODELS: Dict[str, PooledGemini] = {}
+_LOCK = threading.Lock()
+
+
+def get_model(model: Optional[str] = None) -> PooledGemini:
+    """
+    取得共用的模型實例
+
+    Args:
+        model: 模型名稱，預設 Settings.DEFAULT_MODEL
+
+    Returns:
+        同一個模型名稱每次回傳同一個實例 (共用 Client、連線池與限流器)
+    """
+    name = model or Settings.DEFAULT_MODEL
+    with _LOCK:
+        if name not in _MODELS:
+            model_instance = PooledGemini(model=name, retry_options=retry_config)
+            # Client 第一次使用時才建立，此時 client_kwargs 的 http_options 已包含 ADK 的設定
+            model_instance.client_kwargs = {
+                **(model_instance.client_kwargs or {}),
+                "http_options": model_instance.pooled_http_options()
+            }
+            _MODELS[name] = model_instance
+        return _MODELS[name]
+
+
+def model_stats() -> Dict:
+    """
+    取得模型工廠、限流器與重試策略的統計
+
+    Returns:
+        {"models": 已建立的模型名稱, "rate_limiter": 限流統計, "retry_policy": 重試統計}
+    """
+    return {
+        "models": sorted(_MODELS),
+        "rate_limiter": MODEL_RATE_LIMITER.stats(),
+        "retry_policy": MODEL_RETRY_POLICY.stats()
+    }
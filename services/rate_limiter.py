@@ -0,0 +1,159 @@
+"""模型呼叫的全域限流器
+所有代理的模型呼叫共用同一個限流器，同時限制每分鐘請求數與每分鐘 token 數。
+
+採用預約式的權杖桶: 取用時直接扣除 (可以扣成負數)，不足的部分換算成等待時間，
+後到的呼叫排在前面的預約之後，並行代理同時送出請求時會依序平均分散在時間軸上，
+而不是一起送出後再一起收到 429。
+token 數在呼叫前以請求內容估算，回應的 usage_metadata 回來後再補差額。
+"""
+from typing import Dict, Optional
+import asyncio
+import threading
+import time
+
+from config.settings import Settings
+
+
+class TokenBucket:
+    """
+    預約式權杖桶
+
+    - rate_per_minute: 每分鐘補充的數量，0 表示不限制
+    - capacity: 桶的容量 (允許的瞬間用量)，預設為每分鐘的數量
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = rate_per_minute if capacity is None else capacity
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_minute <= 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_minute / 60)
+
+    def wait_time(self, amount: float) -> float:
+        """取用 amount 個權杖需要等待的秒數 (只計算，不扣除)"""
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            tokens = self.tokens - min(amount, self.capacity)
+        return 0.0 if tokens >= 0 else -tokens * 60 / self.rate_per_minute
+
+    def reserve(self, amount: float) -> float:
+        """
+        預約取用 amount 個權杖
+
+        Returns:
+            需要等待的秒數 (0 表示可以立即使用)
+        """
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            # 單次用量超過容量時只扣到容量，避免永遠等不到
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens * 60 / self.rate_per_minute
+
+    def adjust(self, amount: float):
+        """歸還 (正數) 或追加扣除 (負數) 權杖"""
+        if self.unlimited or not amount:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    每分鐘請求數 + 每分鐘 token 數的限流器
+
+    Example:
+        estimate = 1200
+        await MODEL_RATE_LIMITER.acquire(estimate)
+        ... 呼叫模型 ...
+        MODEL_RATE_LIMITER.settle(estimate, usage.total_token_count)
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def reserve(self, tokens: int, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        預約一次請求與 tokens 個 token
+
+        Args:
+            tokens: 預估的 token 數
+            max_wait: 可接受的最長等待秒數，超過時不預約 (選填)
+
+        Returns:
+            需要等待的秒數；超過 max_wait 時回傳 None
+        """
+        with self._lock:
+            if max_wait is not None:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if wait > max_wait:
+                    self.rejected += 1
+                    return None
+            wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+            self.acquired += 1
+            if wait > 0:
+                self.delayed += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return wait
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        等到可以送出請求為止
+
+        Args:
+            tokens: 預估的 token 數
+
+        Returns:
+            實際等待的秒數
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated: int, actual: int):
+        """以實際用量修正預估的 token 數"""
+        if actual:
+            self.tokens.adjust(estimated - actual)
+
+    def stats(self) -> Dict:
+        """限流統計"""
+        return {
+            "requests_per_minute": self.requests.rate_per_minute,
+            "tokens_per_minute": self.tokens.rate_per_minute,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3)
+        }
+
+
+# 全域限流器 (所有代理共用)
+MODEL_RATE_LIMITER = RateLimiter(
+    Settings.MODEL_REQUESTS_PER_MINUTE,
+    Settings.MODEL_TOKENS_PER_MINUTE
+)
@@ -0,0 +1,185 @@
+"""提醒派送服務
+在主程式的事件迴圈中執行的背景工作: 依 REMINDER_QUEUE 的最早提醒時間睡眠，
+時間到才醒來派送，不做輪詢；新增更早的提醒時由佇列通知提早醒來。
+同一分鐘到期的提醒合併為一次通知，派送後標記為 delivered。
+啟動前就已過時間的提醒不逐一當成新提醒跳出，只在啟動時彙總通知一次。
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import contextlib
+import itertools
+import traceback
+
+from tools.records import now_minutes, stamp_datetime, stamp_string
+from tools.reminder_queue import ReminderQueue
+from tools.reminder_tools import REMINDER_QUEUE, REMINDERS_DATABASE
+
+# 過期彙總最多列出的標題數量
+OVERDUE_TITLES_SHOWN = 5
+
+
+def print_reminders(fire_at: int, reminders: List[Dict]):
+    """預設的通知方式: 在終端機印出同一分鐘到期的提醒"""
+    titles = "、".join(reminder["title"] for reminder in reminders)
+    print(f"\n[提醒] {stamp_string(fire_at)} {titles}", flush=True)
+
+
+def print_overdue_reminders(reminders: List[Dict]):
+    """預設的過期彙總方式: 在終端機印出一行過期提醒的數量與標題"""
+    shown = OVERDUE_TITLES_SHOWN
+    titles = "、".join(reminder["title"] for reminder in reminders[:shown])
+    if len(reminders) > shown:
+        titles += " 等"
+    print(f"\n[提醒] 啟動前已過時間的提醒 {len(reminders)} 則: {titles}", flush=True)
+
+
+class ReminderDispatcher:
+    """
+    提醒派送器
+
+    Example:
+        dispatcher = ReminderDispatcher()
+        await dispatcher.start()
+        ...
+        await dispatcher.stop()
+    """
+
+    # 每次最多取出的到期提醒數量，大量到期時分批處理並讓出事件迴圈
+    BATCH_SIZE = 500
+    # 單次睡眠上限 (秒)，避免系統時間調整後睡過頭
+    MAX_SLEEP_SECONDS = 3600
+
+    def __init__(
+        self,
+        queue: Optional[ReminderQueue] = None,
+        store=None,
+        notify: Optional[Callable[[int, List[Dict]], None]] = None,
+        notify_overdue: Optional[Callable[[List[Dict]], None]] = None
+    ):
+        """
+        Args:
+            queue: 提醒佇列，預設為 REMINDER_QUEUE
+            store: 提醒資料表，預設為 REMINDERS_DATABASE
+            notify: 通知函式 (提醒時間, 同一分鐘到期的提醒清單)，預設印出到終端機
+            notify_overdue: 啟動時彙總過期提醒的函式 (過期提醒清單)，預設印出到終端機
+        """
+        self.queue = queue if queue is not None else REMINDER_QUEUE
+        self.store = store if store is not None else REMINDERS_DATABASE
+        self.notify = notify or print_reminders
+        self.notify_overdue = notify_overdue or print_overdue_reminders
+        self.delivered_count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """在目前的事件迴圈啟動派送工作"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        if self._task is None:
+            self.queue.add_listener(self.wake)
+        self._task = self._loop.create_task(self._run(), name="reminder-dispatcher")
+
+    async def stop(self):
+        """停止派送工作"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    def wake(self):
+        """喚醒派送工作重新計算睡眠時間 (可在任何執行緒呼叫)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        # 第一次讀取佇列時才載入 active 提醒，放到執行緒中進行，
+        # 啟動與使用者輸入不必等待載入 (載入期間其他查詢會在佇列的鎖上等待)
+        await asyncio.to_thread(self.queue.next_fire_at)
+        await self._summarize_overdue(now_minutes())
+        while True:
+            # 先清除喚醒旗標再讀取佇列，避免漏掉讀取期間新增的提醒
+            self._wake.clear()
+            due = self.queue.pop_due(now_minutes(), self.BATCH_SIZE)
+            if due:
+                self._dispatch(due)
+                await asyncio.sleep(0)
+                continue
+            await self._sleep_until(self.queue.next_fire_at())
+
+    async def _summarize_overdue(self, started_at: int):
+        """
+        將早於啟動時間的提醒標記為 delivered，並只彙總通知一次
+
+        Args:
+            started_at: 啟動時的分鐘戳記 (這一分鐘起到期的提醒照常派送)
+        """
+        overdue = []
+        while True:
+            due = self.queue.pop_due(started_at - 1, self.BATCH_SIZE)
+            if not due:
+                break
+            for _, reminders in self._deliver(due):
+                overdue.extend(reminders)
+            await asyncio.sleep(0)
+        if not overdue:
+            return
+        try:
+            self.notify_overdue(overdue)
+        except Exception:
+            traceback.print_exc()
+
+    async def _sleep_until(self, fire_at: Optional[int]):
+        """睡到提醒時間或被喚醒；沒有提醒時只等待喚醒"""
+        timeout = None
+        if fire_at is not None:
+            seconds = (stamp_datetime(fire_at) - datetime.now()).total_seconds()
+            timeout = min(max(seconds, 0), self.MAX_SLEEP_SECONDS)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wake.wait(), timeout)
+
+    def _deliver(self, due: List[Tuple[int, str]]) -> List[Tuple[int, List[Dict]]]:
+        """
+        將到期提醒標記為 delivered
+
+        Returns:
+            依分鐘分組的 (提醒時間, 提醒清單)，已被取消或完成的提醒不包含在內
+        """
+        delivered_at = datetime.now().isoformat()
+        groups = []
+        for fire_at, group in itertools.groupby(due, key=lambda item: item[0]):
+            reminders = []
+            for _, reminder_id in group:
+                reminder = self.store.get(reminder_id)
+                # 派送前可能已被取消或完成
+                if reminder is None or reminder.status != "active":
+                    continue
+                reminder.status = "delivered"
+                reminder.delivered_at = delivered_at
+                self.store[reminder_id] = reminder
+                reminders.append(reminder.to_dict())
+
+            if reminders:
+                self.delivered_count += len(reminders)
+                groups.append((fire_at, reminders))
+        return groups
+
+    def _dispatch(self, due: List[Tuple[int, str]]):
+        """將到期提醒依分鐘分組通知，並標記為 delivered"""
+        for fire_at, reminders in self._deliver(due):
+            try:
+                self.notify(fire_at, reminders)
+            except Exception:
+                # 通知失敗不應停止派送工作
+                traceback.print_exc()
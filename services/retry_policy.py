@@ -0,0 +1,302 @@
+"""模型呼叫的重試策略
+取代 SDK 內建的指數重試 (exp_base=7 時最後一次會睡上幾分鐘)，讓一輪對話的尾端延遲有上限:
+- 每次請求的逾時 MODEL_REQUEST_TIMEOUT_SECONDS
+- 每輪對話的截止時間 MODEL_TURN_DEADLINE_SECONDS (由 TurnDeadlinePlugin 在每輪開始時設定)，
+  剩餘時間不足時不再重試
+- 退避時間以 MODEL_RETRY_MAX_DELAY 為上限並加上隨機抖動，避免並行的代理同時重試
+- MODEL_HEDGE_ENABLED 時，請求超過近期延遲的 p95 (MODEL_HEDGE_PERCENTILE) 仍未完成，
+  就再送出一個相同的請求，採用先完成的結果並取消另一個；
+  對沖請求同樣經過限流器預約，排隊時間超過剩餘時間時不送出
+"""
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from collections import deque
+import asyncio
+import contextvars
+import random
+import threading
+import time
+
+import httpx
+from google.genai import errors
+
+from config.settings import Settings
+
+T = TypeVar("T")
+
+# 可重試的 HTTP 狀態碼
+RETRYABLE_STATUS_CODES = (429, 500, 503, 504)
+# 計算延遲百分位數時保留的最近樣本數
+LATENCY_WINDOW = 200
+
+# 目前這一輪對話的截止時間 (time.monotonic()，None 表示沒有限制)
+_TURN_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "turn_deadline", default=None
+)
+
+
+class DeadlineExceeded(Exception):
+    """請求逾時且已沒有時間重試，或這一輪對話已超過截止時間"""
+
+
+def set_turn_deadline(deadline: Optional[float]):
+    """設定目前這一輪對話的截止時間 (time.monotonic())"""
+    _TURN_DEADLINE.set(deadline)
+
+
+def remaining_turn_seconds() -> Optional[float]:
+    """這一輪對話剩餘的秒數，沒有截止時間時回傳 None"""
+    deadline = _TURN_DEADLINE.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """逾時、連線錯誤與 RETRYABLE_STATUS_CODES 的 API 錯誤可以重試"""
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError))
+
+
+class LatencyTracker:
+    """保存最近 LATENCY_WINDOW 次成功請求的延遲 (秒)"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """延遲的百分位數，沒有樣本時回傳 None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+
+class RetryPolicy:
+    """
+    有截止時間、退避上限、抖動與對沖請求的重試策略
+
+    Example:
+        result = await MODEL_RETRY_POLICY.execute(
+            lambda: call_model(request),
+            reserve=lambda max_wait: limiter.reserve(tokens, max_wait)
+        )
+    """
+
+    def __init__(
+        self,
+        attempts: int,
+        initial_delay: float,
+        max_delay: float,
+        jitter: float,
+        request_timeout: float,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20
+    ):
+        """
+        Args:
+            attempts: 最多嘗試次數 (含第一次)
+            initial_delay: 第一次重試前的等待秒數，之後每次加倍
+            max_delay: 單次等待的上限秒數
+            jitter: 抖動比例 (0~1)，實際等待時間在 delay * (1 - jitter) 到 delay 之間
+            request_timeout: 每次請求的逾時秒數，0 表示不限制
+            hedge_enabled: 是否送出對沖請求
+            hedge_percentile: 超過近期延遲的此百分位數時送出對沖請求
+            hedge_min_samples: 樣本數達到此數量後才啟用對沖
+        """
+        self.attempts = max(1, attempts)
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.request_timeout = request_timeout
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            attempts=Settings.MODEL_RETRY_ATTEMPTS,
+            initial_delay=Settings.MODEL_RETRY_INITIAL_DELAY,
+            max_delay=Settings.MODEL_RETRY_MAX_DELAY,
+            jitter=Settings.MODEL_RETRY_JITTER,
+            request_timeout=Settings.MODEL_REQUEST_TIMEOUT_SECONDS,
+            hedge_enabled=Settings.MODEL_HEDGE_ENABLED,
+            hedge_percentile=Settings.MODEL_HEDGE_PERCENTILE,
+            hedge_min_samples=Settings.MODEL_HEDGE_MIN_SAMPLES
+        )
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def backoff(self, retry: int) -> float:
+        """第 retry 次重試前的等待秒數 (指數增加、有上限、加上抖動)"""
+        delay = min(self.max_delay, self.initial_delay * 2 ** (retry - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def hedge_delay(self) -> Optional[float]:
+        """送出對沖請求前等待的秒數，未啟用或樣本不足時回傳 None"""
+        if not self.hedge_enabled or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def _timeout(self) -> Optional[float]:
+        """這次請求可用的秒數 (請求逾時與這一輪剩餘時間取較小者)"""
+        remaining = remaining_turn_seconds()
+        timeout = self.request_timeout if self.request_timeout > 0 else None
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    async def _attempt(
+        self,
+        call: Callable[[], Awaitable[T]],
+        timeout: Optional[float],
+        reserve: Optional[Callable[[Optional[float]], Optional[float]]]
+    ) -> T:
+        """執行一次請求，超過 p95 延遲時送出對沖請求，整體不超過 timeout"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = None if timeout is None else start + timeout
+        hedge_delay = self.hedge_delay()
+        primary = asyncio.ensure_future(call())
+        started: Dict[asyncio.Future, float] = {primary: start}
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                waits = []
+                if deadline is not None:
+                    waits.append(deadline - loop.time())
+                if hedge_delay is not None:
+                    waits.append(start + hedge_delay - loop.time())
+                wait = max(0.0, min(waits)) if waits else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        self.latency.record(loop.time() - started[task])
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+                if done:
+                    continue
+                if deadline is not None and loop.time() >= deadline:
+                    self._count("timeouts")
+                    raise asyncio.TimeoutError()
+                if hedge_delay is not None:
+                    # 對沖請求同樣要在限流器預約，排隊時間超過剩餘時間就不送出
+                    hedge_delay = None
+                    remaining = None if deadline is None else deadline - loop.time()
+                    hedge_wait = 0.0 if reserve is None else reserve(remaining)
+                    if hedge_wait is None:
+                        self._count("hedges_skipped")
+                        continue
+                    hedge = asyncio.ensure_future(self._delayed(call, hedge_wait))
+                    started[hedge] = loop.time() + hedge_wait
+                    pending.add(hedge)
+                    self._count("hedges")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _delayed(call: Callable[[], Awaitable[T]], wait: float) -> T:
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return await call()
+
+    async def execute(
+        self,
+        call: Callable[[], Awaitable[T]],
+        reserve: Optional[Callable[[Optional[float]], Optional[float]]] = None
+    ) -> T:
+        """
+        依策略執行請求
+
+        Args:
+            call: 建立一次請求的函式 (重試與對沖時會再次呼叫)
+            reserve: 每次送出請求前的預約函式 (例如限流器)，參數為可接受的最長等待秒數
+                (None 表示一定預約)，回傳需要等待的秒數，超過上限時回傳 None；
+                一般請求的等待時間不計入請求逾時
+
+        Returns:
+            第一個成功的結果
+
+        Raises:
+            DeadlineExceeded: 最後一次失敗是逾時，或這一輪對話已沒有剩餘時間
+            其他例外: 不可重試的錯誤，或重試次數用完時的最後一個錯誤
+        """
+        self._count("calls")
+        last_error: Optional[BaseException] = None
+        for attempt in range(1, self.attempts + 1):
+            if reserve is not None:
+                wait = reserve(None)
+                if wait:
+                    await asyncio.sleep(wait)
+            timeout = self._timeout()
+            if timeout is not None and timeout <= 0:
+                last_error = asyncio.TimeoutError()
+                break
+            try:
+                return await self._attempt(call, timeout, reserve)
+            except Exception as error:
+                if not is_retryable(error):
+                    raise
+                last_error = error
+            if attempt == self.attempts:
+                break
+            delay = self.backoff(attempt)
+            remaining = remaining_turn_seconds()
+            if remaining is not None and delay >= remaining:
+                last_error = asyncio.TimeoutError()
+                break
+            self._count("retries")
+            await asyncio.sleep(delay)
+
+        if isinstance(last_error, asyncio.TimeoutError):
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded("模型回應逾時，已超過請求或本輪對話的時間上限")
+        raise last_error
+
+    def stats(self) -> Dict:
+        """重試統計"""
+        p95 = self.latency.percentile(95)
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "hedges_skipped": self.hedges_skipped,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "latency_p95_seconds": round(p95, 3) if p95 is not None else None
+        }
+
+
+# 全域重試策略 (所有代理共用，延遲樣本也共用)
+MODEL_RETRY_POLICY = RetryPolicy.from_settings()
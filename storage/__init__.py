@@ -0,0 +1 @@
+# Schedule Manager - Storage Module
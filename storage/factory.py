@@ -0,0 +1,43 @@
+"""儲存後端選擇
+依 Settings.STORAGE_BACKEND 建立資料表:
+- memory: 記憶體 dict (預設，重新啟動即清空)
+- sqlite: SQLite 檔案 (Settings.STORAGE_PATH)
+- journal: 快照 + 追加式日誌 (Settings.JOURNAL_DIR)，啟動時只重播快照後的日誌
+"""
+from typing import Dict, Optional
+
+from config.settings import Settings
+from storage.journal_store import JournalTable
+from storage.memory_store import MemoryTable
+from storage.sqlite_store import SQLiteStore
+
+_sqlite_stores: Dict[str, SQLiteStore] = {}
+
+
+def open_table(name: str, record_type: Optional[type] = None, backend: Optional[str] = None):
+    """
+    開啟資料表
+
+    Args:
+        name: 資料表名稱 (events/tasks/reminders)
+        record_type: 紀錄類別 (需提供 from_dict/to_dict)，持久化後端以此序列化
+        backend: 儲存後端 (memory/sqlite/journal)，預設使用 Settings.STORAGE_BACKEND
+
+    Returns:
+        行為與 dict 相同的資料表物件
+    """
+    backend = (backend or Settings.STORAGE_BACKEND).lower()
+
+    if backend == "memory":
+        return MemoryTable(name, record_type)
+
+    if backend == "sqlite":
+        path = Settings.STORAGE_PATH
+        if path not in _sqlite_stores:
+            _sqlite_stores[path] = SQLiteStore(path)
+        return _sqlite_stores[path].table(name, record_type)
+
+    if backend == "journal":
+        return JournalTable(Settings.JOURNAL_DIR, name, Settings.SNAPSHOT_INTERVAL, record_type)
+
+    raise ValueError(f"不支援的儲存後端: {backend} (可用: memory/sqlite/journal)")
@@ -0,0 +1,449 @@
+"""快照 + 追加式日誌儲存後端
+每次寫入只追加一筆日誌；累積一定筆數後在背景寫出緊湊的二進位快照並輪替日誌。
+啟動時以 mmap 開啟最新快照 (不解碼任何資料)，只重播快照之後的日誌，
+因此啟動時間與資料總量無關，只與尚未寫入快照的日誌筆數有關。
+
+快照格式 (little-endian):
+    header: magic(8) | next_generation(u64) | count(u32) | key_width(u32)
+    目錄:   count × [key(key_width, 右補 0) | offset(u64) | length(u32)]，依 key 排序
+    資料:   各筆資料的 JSON (UTF-8)
+
+日誌格式 (每筆):
+    length(u32) | op(u8) | key_length(u16) | key | payload(JSON，刪除時為空)
+
+檔名帶有世代編號 ({name}.{generation}.snapshot / {name}.{generation}.journal)，
+快照不覆寫仍被 mmap 開啟的舊檔，重播已寫入快照的日誌也不影響結果。
+{name}.id 保存資料表的識別，與世代編號、目前日誌的筆數組成跨行程一致的資料狀態識別。
+指定 record_type 時，寫入以 to_dict() 序列化，讀出以 from_dict() 還原為紀錄物件。
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from collections.abc import MutableMapping
+import copy
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import traceback
+import uuid
+
+SNAPSHOT_MAGIC = b"SMSNAP01"
+_HEADER = struct.Struct("<8sQII")
+_ENTRY_TAIL = struct.Struct("<QI")
+_RECORD_HEADER = struct.Struct("<IBH")
+
+# 日誌以 u16 記錄 key 長度
+MAX_KEY_BYTES = 0xFFFF
+
+_OP_PUT = 1
+_OP_DELETE = 2
+
+# 刪除標記 (overlay 中代表該 key 已刪除)
+_DELETED = None
+
+
+class _SnapshotReader:
+    """以 mmap 讀取快照，依需要二分搜尋目錄並解碼單筆資料"""
+
+    def __init__(self, path: Optional[str]):
+        self.count = 0
+        self.key_width = 0
+        self.next_generation = 0
+        self._file = None
+        self._map = None
+        self._entry_size = 0
+        self._data_start = 0
+
+        if not path or not os.path.exists(path) or os.path.getsize(path) < _HEADER.size:
+            return
+
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.next_generation, self.count, self.key_width = _HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"快照格式錯誤: {path}")
+        self._entry_size = self.key_width + _ENTRY_TAIL.size
+        self._data_start = _HEADER.size + self.count * self._entry_size
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+
+    def _key_at(self, position: int) -> bytes:
+        start = _HEADER.size + position * self._entry_size
+        return self._map[start:start + self.key_width].rstrip(b"\0")
+
+    def _find(self, key: str) -> int:
+        """二分搜尋 key 在目錄中的位置，找不到時回傳 -1"""
+        target = key.encode("utf-8")
+        if self.count == 0 or len(target) > self.key_width:
+            return -1
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == target:
+            return lo
+        return -1
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) >= 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        position = self._find(key)
+        if position < 0:
+            return None
+        return self._load(position)
+
+    def _load(self, position: int) -> Dict:
+        start = _HEADER.size + position * self._entry_size + self.key_width
+        offset, length = _ENTRY_TAIL.unpack_from(self._map, start)
+        begin = self._data_start + offset
+        return json.loads(self._map[begin:begin + length])
+
+    def keys(self) -> Iterator[str]:
+        for position in range(self.count):
+            yield self._key_at(position).decode("utf-8")
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        for position in range(self.count):
+            yield self._key_at(position).decode("utf-8"), self._load(position)
+
+
+def _remove_quietly(path: str):
+    """刪除檔案；檔案仍被其他程序開啟而無法刪除時留待下次啟動清理"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_snapshot(path: str, items: List[Tuple[str, Dict]], next_generation: int):
+    """寫出快照 (先寫暫存檔再原子更名)"""
+    items.sort(key=lambda item: item[0])
+    encoded = [(key.encode("utf-8"), json.dumps(value, ensure_ascii=False).encode("utf-8")) for key, value in items]
+    key_width = max((len(key) for key, _ in encoded), default=0)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, next_generation, len(encoded), key_width))
+        offset = 0
+        for key, data in encoded:
+            f.write(key.ljust(key_width, b"\0"))
+            f.write(_ENTRY_TAIL.pack(offset, len(data)))
+            offset += len(data)
+        for _, data in encoded:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class JournalTable(MutableMapping):
+    """
+    快照 + 日誌資料表 (ID → 資料)
+
+    行為與 dict 相同；取出的資料是副本，修改後需重新寫回 table[id] = record。
+    查詢順序: 目前日誌的變更 → 正在寫入快照的變更 → 快照。
+    version 在每次寫入/刪除時遞增，供快取判斷資料是否改變。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        name: str,
+        snapshot_interval: int = 10000,
+        record_type: Optional[type] = None
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.record_type = record_type
+        self.snapshot_interval = snapshot_interval
+        self.version = 0
+        self._directory = directory
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+
+        # 使用最新的快照，較舊的快照與未完成的暫存檔一併清理
+        snapshots = self._paths("snapshot")
+        for path in snapshots[:-1] + glob.glob(os.path.join(directory, f"{name}.*.tmp")):
+            _remove_quietly(path)
+        self._snapshot = _SnapshotReader(snapshots[-1] if snapshots else None)
+        self._frozen: Dict[str, Optional[Dict]] = {}
+        self._overlay: Dict[str, Optional[Dict]] = {}
+        self._length = self._snapshot.count
+        self._instance = self._read_instance()
+
+        # 重播快照之後的日誌 (較舊的日誌已包含在快照中)
+        generation = self._snapshot.next_generation
+        records = 0
+        for path in self._paths("journal"):
+            journal_generation = self._generation_of(path)
+            if journal_generation < self._snapshot.next_generation:
+                _remove_quietly(path)
+                continue
+            records = self._replay(path)
+            generation = max(generation, journal_generation)
+
+        self._generation = generation
+        # 目前日誌的筆數 (較舊的日誌在輪替後不再改變)
+        self._journal_records = records
+        self._journal = open(self._path(generation, "journal"), "ab")
+        self._pending = len(self._overlay)
+
+    # ---- 日誌 ----
+
+    def _path(self, generation: int, kind: str) -> str:
+        return os.path.join(self._directory, f"{self.name}.{generation:08d}.{kind}")
+
+    def _paths(self, kind: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self._directory, f"{self.name}.*.{kind}")))
+
+    @staticmethod
+    def _generation_of(path: str) -> int:
+        return int(os.path.basename(path).split(".")[-2])
+
+    def _read_instance(self) -> str:
+        """讀取 (必要時建立) 資料表識別；目錄被清空重建後識別不同"""
+        path = os.path.join(self._directory, f"{self.name}.id")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                instance = f.read().strip()
+            if instance:
+                return instance
+        except OSError:
+            pass
+        instance = uuid.uuid4().hex
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(instance)
+        return instance
+
+    @property
+    def generation(self) -> str:
+        """
+        資料狀態的識別 (跨行程一致)
+
+        資料 = 快照 + 目前世代之前的日誌 (已不再改變) + 目前日誌的前 N 筆，
+        因此 (識別, 世代, N) 相同時資料相同。
+        """
+        with self._lock:
+            return f"{self._instance}:{self._generation}:{self._journal_records}"
+
+    def _replay(self, path: str) -> int:
+        """重播日誌並回傳紀錄筆數；結尾不完整的紀錄 (寫入中斷) 會被截掉"""
+        with open(path, "rb") as f:
+            data = f.read()
+        position = 0
+        records = 0
+        while position + _RECORD_HEADER.size <= len(data):
+            length, op, key_length = _RECORD_HEADER.unpack_from(data, position)
+            end = position + _RECORD_HEADER.size + length
+            if end > len(data):
+                break
+            key_start = position + _RECORD_HEADER.size
+            key = data[key_start:key_start + key_length].decode("utf-8")
+            if op == _OP_PUT:
+                self._apply(key, json.loads(data[key_start + key_length:end]))
+            else:
+                self._apply(key, _DELETED)
+            position = end
+            records += 1
+        if position < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(position)
+        return records
+
+    def _append(self, op: int, key: str, value: Optional[Dict]):
+        key_bytes = key.encode("utf-8")
+        if len(key_bytes) > MAX_KEY_BYTES:
+            raise ValueError(f"ID 過長 ({len(key_bytes)} bytes，上限 {MAX_KEY_BYTES})")
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8") if value is not None else b""
+        self._journal.write(_RECORD_HEADER.pack(len(key_bytes) + len(payload), op, len(key_bytes)))
+        self._journal.write(key_bytes)
+        self._journal.write(payload)
+        self._journal.flush()
+        self._journal_records += 1
+
+    # ---- 查詢 ----
+
+    def _lookup(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """回傳 (是否存在, 資料)"""
+        if key in self._overlay:
+            value = self._overlay[key]
+            return value is not None, value
+        if key in self._frozen:
+            value = self._frozen[key]
+            return value is not None, value
+        value = self._snapshot.get(key)
+        return value is not None, value
+
+    def _apply(self, key: str, value: Optional[Dict]):
+        existed, _ = self._lookup(key)
+        self._overlay[key] = value
+        if value is None and existed:
+            self._length -= 1
+        elif value is not None and not existed:
+            self._length += 1
+
+    def _decode(self, value: Dict) -> Any:
+        return self.record_type.from_dict(value) if self.record_type else value
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            for changes in (self._overlay, self._frozen):
+                if key in changes:
+                    if changes[key] is None:
+                        raise KeyError(key)
+                    # 變更中的資料會被後續查詢共用，回傳副本避免被直接修改
+                    return self._decode(copy.deepcopy(changes[key]))
+            value = self._snapshot.get(key)
+        if value is None:
+            raise KeyError(key)
+        return self._decode(value)
+
+    def __setitem__(self, key: str, value: Any):
+        if hasattr(value, "to_dict"):
+            value = value.to_dict()
+        with self._lock:
+            self._append(_OP_PUT, key, value)
+            self._apply(key, copy.deepcopy(value))
+            self.version += 1
+            self._after_write()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            exists, _ = self._lookup(key)
+            if not exists:
+                raise KeyError(key)
+            self._append(_OP_DELETE, key, None)
+            self._apply(key, _DELETED)
+            self.version += 1
+            self._after_write()
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return self._lookup(key)[0]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.items()])
+
+    def items(self) -> List[Tuple[str, Any]]:
+        with self._lock:
+            merged = dict(self._snapshot.items())
+            for changes in (self._frozen, self._overlay):
+                for key, value in changes.items():
+                    if value is None:
+                        merged.pop(key, None)
+                    else:
+                        merged[key] = copy.deepcopy(value)
+        return [(key, self._decode(value)) for key, value in merged.items()]
+
+    def values(self) -> List[Any]:
+        return [value for _, value in self.items()]
+
+    def select(self, **filters) -> List[Any]:
+        """
+        依欄位等值條件篩選資料
+
+        Args:
+            filters: 欄位名稱與值，值為 None 的條件會被忽略
+
+        Returns:
+            符合條件的資料清單
+        """
+        conditions = [(key, value) for key, value in filters.items() if value is not None]
+        return [
+            record for record in self.values()
+            if all(record.get(key) == value for key, value in conditions)
+        ]
+
+    # ---- 快照 ----
+
+    def _after_write(self):
+        self._pending += 1
+        if self._pending >= self.snapshot_interval and self._compactor is None:
+            self.compact()
+
+    def compact(self, wait: bool = False):
+        """
+        輪替日誌並在背景寫出新快照
+
+        Args:
+            wait: 是否等待快照寫入完成
+        """
+        with self._lock:
+            if self._compactor is None:
+                # 目前的變更凍結交給背景執行緒，新的寫入進入新的日誌
+                self._frozen = self._overlay
+                self._overlay = {}
+                self._pending = 0
+                self._journal.close()
+                self._generation += 1
+                self._journal = open(self._path(self._generation, "journal"), "ab")
+                self._journal_records = 0
+                self._compactor = threading.Thread(
+                    target=self._write_snapshot,
+                    args=(self._snapshot, self._frozen, self._generation),
+                    name=f"{self.name}-snapshot",
+                    daemon=True
+                )
+                self._compactor.start()
+            compactor = self._compactor
+        if wait:
+            compactor.join()
+
+    def _write_snapshot(self, snapshot: _SnapshotReader, frozen: Dict[str, Optional[Dict]], next_generation: int):
+        path = self._path(next_generation, "snapshot")
+        written = False
+        try:
+            merged = dict(snapshot.items())
+            for key, value in frozen.items():
+                if value is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            _write_snapshot(path, list(merged.items()), next_generation)
+            reader = _SnapshotReader(path)
+            written = True
+        except Exception:
+            # 快照失敗不可讓壓縮永久停止: 凍結的變更併回目前的變更 (較新的優先)，
+            # 再累積 snapshot_interval 筆寫入後重試；舊日誌仍保留在磁碟上，重新啟動時照常重播
+            traceback.print_exc()
+            _remove_quietly(f"{path}.tmp")
+            _remove_quietly(path)
+        finally:
+            with self._lock:
+                if written:
+                    old = self._snapshot
+                    self._snapshot = reader
+                    old.close()
+                else:
+                    restored = dict(self._frozen)
+                    restored.update(self._overlay)
+                    self._overlay = restored
+                self._frozen = {}
+                self._compactor = None
+        if not written:
+            return
+
+        for old_path in self._paths("snapshot") + self._paths("journal"):
+            if self._generation_of(old_path) < next_generation:
+                _remove_quietly(old_path)
+
+    def close(self):
+        """等待背景快照完成並關閉日誌"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._journal.close()
+            self._snapshot.close()
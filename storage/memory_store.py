@@ -0,0 +1,58 @@
+"""記憶體儲存後端
+以 dict 保存資料，重新啟動後即清空 (原本的模擬資料庫行為)。
+紀錄物件直接存放，不需要序列化。
+"""
+from typing import Dict, List, Optional
+import uuid
+
+
+class MemoryTable(dict):
+    """
+    記憶體資料表 (ID → 資料)
+
+    version 在每次寫入/刪除時遞增，供快取判斷資料是否改變
+    (寫入需透過 table[id] = record、del table[id] 或 pop)。
+    generation 另外帶有本行程的識別，資料不會延續到下次啟動，
+    跨行程保存的快取 (回應快取的磁碟層) 不會取用上次啟動的結果。
+    """
+
+    def __init__(self, name: str, record_type: Optional[type] = None):
+        super().__init__()
+        self.name = name
+        self.record_type = record_type
+        self.version = 0
+        self._instance = uuid.uuid4().hex
+
+    @property
+    def generation(self) -> str:
+        """資料狀態的識別 (跨行程唯一)"""
+        return f"{self._instance}:{self.version}"
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, key, *default):
+        if key in self:
+            self.version += 1
+        return super().pop(key, *default)
+
+    def select(self, **filters) -> List[Dict]:
+        """
+        依欄位等值條件篩選資料
+
+        Args:
+            filters: 欄位名稱與值，值為 None 的條件會被忽略
+
+        Returns:
+            符合條件的資料清單 (依寫入順序)
+        """
+        conditions = [(key, value) for key, value in filters.items() if value is not None]
+        return [
+            record for record in self.values()
+            if all(record.get(key) == value for key, value in conditions)
+        ]
@@ -0,0 +1,186 @@
+"""SQLite 儲存後端
+資料以 JSON 保存，常用篩選欄位另存為獨立欄位並建立索引。
+- WAL 模式，讀寫互不阻塞
+- 所有 SQL 皆為固定字串搭配參數，由 sqlite3 的 statement cache 重複使用已編譯的語句
+- 指定 record_type 時，寫入以 to_dict() 序列化，讀出以 from_dict() 還原為紀錄物件
+- _meta 表保存資料庫識別與各資料表的版本，版本在重新啟動後延續
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from collections.abc import MutableMapping
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+# 各資料表獨立存放並建立索引的欄位
+TABLE_COLUMNS = {
+    "events": ("date",),
+    "tasks": ("status", "priority", "due_date"),
+    "reminders": ("status", "reminder_time"),
+}
+
+
+class SQLiteStore:
+    """SQLite 資料庫連線，所有資料表共用同一個連線與鎖"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        # 工具函式可能在執行緒池中被呼叫，由 self.lock 保護連線
+        self.connection = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self._tables: Dict[str, "SQLiteTable"] = {}
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "INSERT OR IGNORE INTO _meta (key, value) VALUES ('instance', ?)", (uuid.uuid4().hex,)
+            )
+        # 資料庫識別: 檔案被刪除重建後不同，避免與舊資料庫的版本混淆
+        self.instance = self.get_meta("instance")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """讀取 _meta 表的值"""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM _meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def table(self, name: str, record_type: Optional[type] = None) -> "SQLiteTable":
+        """取得 (必要時建立) 資料表"""
+        if name not in self._tables:
+            self._tables[name] = SQLiteTable(self, name, TABLE_COLUMNS.get(name, ()), record_type)
+        return self._tables[name]
+
+    def close(self):
+        """關閉連線"""
+        with self.lock:
+            self.connection.close()
+
+
+class SQLiteTable(MutableMapping):
+    """
+    SQLite 資料表 (ID → 資料)
+
+    行為與 dict 相同；取出的資料是副本，修改後需重新寫回 table[id] = record。
+    version 在每次寫入/刪除時遞增，與資料在同一個交易中寫入 _meta，重新啟動後延續。
+    """
+
+    def __init__(self, store: SQLiteStore, name: str, columns: tuple, record_type: Optional[type] = None):
+        self.store = store
+        self.name = name
+        self.columns = columns
+        self.record_type = record_type
+        self._version_key = f"version:{name}"
+        self.version = int(store.get_meta(self._version_key) or 0)
+
+        column_defs = "".join(f", {column} TEXT" for column in columns)
+        with store.lock, store.connection:
+            store.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY{column_defs}, data TEXT NOT NULL)"
+            )
+            for column in columns:
+                store.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{name}_{column} ON {name} ({column})"
+                )
+
+        placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+        column_names = "".join(f", {column}" for column in columns)
+        self._sql_get = f"SELECT data FROM {name} WHERE id = ?"
+        self._sql_put = f"INSERT OR REPLACE INTO {name} (id{column_names}, data) VALUES ({placeholders})"
+        self._sql_delete = f"DELETE FROM {name} WHERE id = ?"
+        self._sql_ids = f"SELECT id FROM {name} ORDER BY rowid"
+        self._sql_values = f"SELECT data FROM {name} ORDER BY rowid"
+        self._sql_items = f"SELECT id, data FROM {name} ORDER BY rowid"
+        self._sql_count = f"SELECT COUNT(*) FROM {name}"
+        self._sql_exists = f"SELECT 1 FROM {name} WHERE id = ?"
+        self._sql_version = "INSERT OR REPLACE INTO _meta (key, value) VALUES (?, ?)"
+
+    @property
+    def generation(self) -> str:
+        """資料狀態的識別 (資料庫識別 + 持久化的版本，跨行程一致)"""
+        return f"{self.store.instance}:{self.version}"
+
+    def _bump_version(self):
+        """遞增版本並寫入 _meta (需在寫入資料的交易中呼叫)"""
+        self.store.connection.execute(self._sql_version, (self._version_key, str(self.version + 1)))
+        self.version += 1
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.store.lock:
+            return self.store.connection.execute(sql, params).fetchall()
+
+    def _decode(self, data: str) -> Any:
+        value = json.loads(data)
+        return self.record_type.from_dict(value) if self.record_type else value
+
+    def __getitem__(self, key: str) -> Any:
+        rows = self._execute(self._sql_get, (key,))
+        if not rows:
+            raise KeyError(key)
+        return self._decode(rows[0][0])
+
+    def __setitem__(self, key: str, value: Any):
+        if hasattr(value, "to_dict"):
+            value = value.to_dict()
+        params = (key, *(value.get(column) for column in self.columns), json.dumps(value, ensure_ascii=False))
+        with self.store.lock, self.store.connection:
+            self.store.connection.execute(self._sql_put, params)
+            self._bump_version()
+
+    def __delitem__(self, key: str):
+        with self.store.lock, self.store.connection:
+            cursor = self.store.connection.execute(self._sql_delete, (key,))
+            # 沒有刪除任何資料時不遞增版本，避免無效化依版本建立的快取
+            if cursor.rowcount:
+                self._bump_version()
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return bool(self._execute(self._sql_exists, (key,)))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self._execute(self._sql_ids)])
+
+    def __len__(self) -> int:
+        return self._execute(self._sql_count)[0][0]
+
+    def values(self) -> List[Any]:
+        return [self._decode(row[0]) for row in self._execute(self._sql_values)]
+
+    def items(self) -> List[tuple]:
+        return [(row[0], self._decode(row[1])) for row in self._execute(self._sql_items)]
+
+    def select(self, **filters) -> List[Any]:
+        """
+        依欄位等值條件篩選資料，已建立索引的欄位直接在 SQL 中過濾
+
+        Args:
+            filters: 欄位名稱與值，值為 None 的條件會被忽略
+
+        Returns:
+            符合條件的資料清單 (依寫入順序)
+        """
+        indexed = {k: v for k, v in filters.items() if v is not None and k in self.columns}
+        others = {k: v for k, v in filters.items() if v is not None and k not in self.columns}
+
+        sql = self._sql_values
+        params: tuple = ()
+        if indexed:
+            where = " AND ".join(f"{column} = ?" for column in sorted(indexed))
+            sql = f"SELECT data FROM {self.name} WHERE {where} ORDER BY rowid"
+            params = tuple(indexed[column] for column in sorted(indexed))
+
+        records = [self._decode(row[0]) for row in self._execute(sql, params)]
+        if others:
+            records = [
+                record for record in records
+                if all(record.get(key) == value for key, value in others.items())
+            ]
+        return records
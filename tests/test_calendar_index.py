@@ -0,0 +1,113 @@
+"""tools.calendar_index: 區間索引與佔用點陣圖"""
+import random
+
+from tools.calendar_index import CalendarIndex, _DayIntervals, slot_mask
+from tools.records import EventRecord
+
+
+def _event(event_id: str, date: str, start_time: str, end_time: str, **extra) -> EventRecord:
+    return EventRecord.from_dict({
+        "id": event_id,
+        "title": event_id,
+        "date": date,
+        "start_time": start_time,
+        "end_time": end_time,
+        "location": "",
+        "description": "",
+        **extra
+    })
+
+
+def _rebuilt(intervals) -> _DayIntervals:
+    day = _DayIntervals()
+    for interval in intervals:
+        day.add(interval)
+    return day
+
+
+def test_remove_keeps_minutes_still_covered_by_other_events():
+    day = _rebuilt([(540, 660, "A"), (600, 720, "B")])
+    day.remove((540, 660, "A"))
+    assert day.occupancy == slot_mask(600, 720)
+    assert day.max_length == 120
+    assert day.is_free(540, 600) is True
+    assert day.is_free(650, 700) is False
+
+
+def test_random_add_remove_matches_a_rebuild():
+    rng = random.Random(7)
+    day = _DayIntervals()
+    live = []
+    for step in range(2000):
+        if live and rng.random() < 0.45:
+            interval = live.pop(rng.randrange(len(live)))
+            day.remove(interval)
+        else:
+            start = rng.randrange(0, 1400)
+            interval = (start, start + rng.randrange(0, 120), f"E{step}")
+            day.add(interval)
+            live.append(interval)
+        expected = _rebuilt(live)
+        assert day.intervals == expected.intervals
+        assert day.occupancy == expected.occupancy
+        assert day.degenerate == expected.degenerate
+        assert day.max_length == expected.max_length
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(11)
+    intervals = []
+    for n in range(200):
+        start = rng.randrange(0, 1400)
+        intervals.append((start, start + rng.randrange(1, 240), f"E{n}"))
+    day = _rebuilt(intervals)
+    for _ in range(500):
+        start = rng.randrange(0, 1440)
+        end = start + rng.randrange(1, 180)
+        expected = sorted(iv for iv in intervals if iv[0] < end and start < iv[1])
+        assert day.overlapping(start, end) == expected
+
+
+def test_zero_length_events_fall_back_to_interval_checks():
+    day = _rebuilt([(600, 600, "Z")])
+    assert day.is_free(540, 660) is None
+    index = CalendarIndex()
+    index.add(_event("Z", "2024-12-05", "10:00", "10:00"))
+    # 零長度事件落在區間內仍視為佔用，區間外則不影響
+    assert index.is_free("2024-12-05", 540, 660) is False
+    assert index.is_free("2024-12-05", 660, 720) is True
+
+
+def test_calendar_index_tracks_updates_and_deletions():
+    index = CalendarIndex()
+    index.add(_event("A", "2024-12-05", "09:00", "10:00"))
+    index.add(_event("B", "2024-12-05", "09:30", "11:00"))
+    assert index.events_on("2024-12-05") == ["A", "B"]
+    assert index.overlapping("2024-12-05", 600, 630) == ["B"]
+    assert not index.is_free("2024-12-05", 600, 630)
+
+    # 更新事件會先移除舊位置
+    index.add(_event("B", "2024-12-06", "09:30", "11:00"))
+    assert index.is_free("2024-12-05", 600, 630)
+    assert index.occupancy("2024-12-05") == slot_mask(540, 600)
+    assert index.events_between("2024-12-01", "2024-12-31") == ["A", "B"]
+
+    version = index.version
+    index.remove("A")
+    assert index.version > version
+    assert index.events_on("2024-12-05") == []
+    assert index.all_events() == ["B"]
+
+
+def test_recurring_occurrences_join_the_day():
+    index = CalendarIndex()
+    index.add(_event("A", "2024-12-09", "09:00", "10:00"))
+    index.add(_event("S", "2024-12-02", "09:30", "10:30", recurrence={
+        "freq": "weekly", "interval": 1, "count": None, "until": None
+    }))
+    assert index.events_on("2024-12-09") == ["A", "S@2024-12-09"]
+    assert index.are_free("2024-12-09", [(540, 570), (630, 660)]) == [False, True]
+    assert index.events_between("2024-12-02", "2024-12-09") == ["S@2024-12-02", "A", "S@2024-12-09"]
+
+    index.remove("S")
+    assert index.events_on("2024-12-09") == ["A"]
@@ -0,0 +1,108 @@
+"""storage.journal_store.JournalTable: 日誌重播、截斷與快照"""
+import os
+
+import pytest
+
+from storage import journal_store
+from storage.journal_store import MAX_KEY_BYTES, JournalTable
+
+
+def _open(directory, snapshot_interval: int = 10000) -> JournalTable:
+    return JournalTable(str(directory), "items", snapshot_interval=snapshot_interval)
+
+
+def _journal_paths(directory):
+    return sorted(p for p in os.listdir(directory) if p.endswith(".journal"))
+
+
+def test_reopen_replays_the_journal(tmp_path):
+    table = _open(tmp_path)
+    table["A"] = {"title": "一"}
+    table["B"] = {"title": "二"}
+    table["A"] = {"title": "改"}
+    del table["B"]
+    generation = table.generation
+    table.close()
+
+    reopened = _open(tmp_path)
+    assert dict(reopened.items()) == {"A": {"title": "改"}}
+    assert len(reopened) == 1
+    assert reopened.generation == generation
+    reopened.close()
+
+
+def test_torn_tail_is_truncated_on_replay(tmp_path):
+    table = _open(tmp_path)
+    table["A"] = {"title": "一"}
+    table["B"] = {"title": "二"}
+    table.close()
+
+    path = os.path.join(tmp_path, _journal_paths(tmp_path)[-1])
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        f.truncate(size - 3)
+
+    reopened = _open(tmp_path)
+    assert dict(reopened.items()) == {"A": {"title": "一"}}
+    # 截掉不完整的紀錄後，新的寫入接在完整紀錄之後
+    reopened["C"] = {"title": "三"}
+    reopened.close()
+
+    again = _open(tmp_path)
+    assert dict(again.items()) == {"A": {"title": "一"}, "C": {"title": "三"}}
+    again.close()
+
+
+def test_compaction_writes_a_snapshot_and_rotates_the_journal(tmp_path):
+    table = _open(tmp_path, snapshot_interval=3)
+    for n in range(7):
+        table[f"K{n}"] = {"n": n}
+    del table["K0"]
+    table.compact(wait=True)
+    expected = {f"K{n}": {"n": n} for n in range(1, 7)}
+    assert dict(table.items()) == expected
+    table.close()
+
+    snapshots = [p for p in os.listdir(tmp_path) if p.endswith(".snapshot")]
+    assert len(snapshots) == 1
+    assert len(_journal_paths(tmp_path)) == 1
+
+    reopened = _open(tmp_path)
+    assert dict(reopened.items()) == expected
+    assert reopened["K3"] == {"n": 3}
+    assert "K0" not in reopened
+    reopened.close()
+
+
+def test_failed_snapshot_keeps_changes_and_retries(tmp_path, monkeypatch):
+    table = _open(tmp_path)
+    table["A"] = {"title": "一"}
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(journal_store, "_write_snapshot", fail)
+    table.compact(wait=True)
+    table["B"] = {"title": "二"}
+    assert dict(table.items()) == {"A": {"title": "一"}, "B": {"title": "二"}}
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".snapshot")]
+
+    monkeypatch.undo()
+    table.compact(wait=True)
+    assert len([p for p in os.listdir(tmp_path) if p.endswith(".snapshot")]) == 1
+    table.close()
+
+    reopened = _open(tmp_path)
+    assert dict(reopened.items()) == {"A": {"title": "一"}, "B": {"title": "二"}}
+    reopened.close()
+
+
+def test_overlong_key_is_rejected_without_writing(tmp_path):
+    table = _open(tmp_path)
+    with pytest.raises(ValueError):
+        table["x" * (MAX_KEY_BYTES + 1)] = {}
+    assert len(table) == 0
+    table.close()
+    reopened = _open(tmp_path)
+    assert dict(reopened.items()) == {}
+    reopened.close()
@@ -0,0 +1,82 @@
+"""tools.recurrence: 週期規則的驗證與展開"""
+from datetime import date, timedelta
+
+import pytest
+
+from tools.recurrence import build_rule, expand, last_occurrence, make_occurrence
+
+
+def _series(freq: str, first: str, interval: int = 1, count=None, until=None, exceptions=None):
+    return {
+        "id": "EVT-TEST",
+        "title": "週會",
+        "date": first,
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "recurrence": build_rule(freq, interval, count, until),
+        "exceptions": exceptions or {}
+    }
+
+
+def _dates(series, start: str, end: str):
+    return [occurrence["date"] for occurrence in expand(series, start, end)]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"freq": "weekly", "interval": None},
+    {"freq": "weekly", "interval": "每週"},
+    {"freq": "weekly", "interval": 0},
+    {"freq": "daily", "count": "three"},
+    {"freq": "daily", "count": 0},
+    {"freq": "daily", "until": "2024/12/31"},
+    {"freq": "daily", "until": 20241231},
+    {"freq": "yearly"},
+])
+def test_build_rule_rejects_malformed_arguments_with_value_error(kwargs):
+    with pytest.raises(ValueError):
+        build_rule(**kwargs)
+
+
+def test_build_rule_normalizes_numeric_strings():
+    assert build_rule("Weekly", "2", "3") == {"freq": "weekly", "interval": 2, "count": 3, "until": None}
+
+
+def test_weekly_expansion_jumps_into_the_window():
+    series = _series("weekly", "2024-01-01", interval=2)
+    assert _dates(series, "2024-03-01", "2024-03-31") == ["2024-03-11", "2024-03-25"]
+
+
+def test_count_and_until_limit_occurrences():
+    counted = _series("daily", "2024-01-01", count=3)
+    assert _dates(counted, "2023-12-01", "2024-12-31") == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert last_occurrence(counted) == date(2024, 1, 3)
+
+    until = _series("daily", "2024-01-01", until="2024-01-02")
+    assert _dates(until, "2024-01-01", "2024-01-31") == ["2024-01-01", "2024-01-02"]
+
+
+def test_monthly_skips_missing_days_without_counting_them():
+    series = _series("monthly", "2024-01-31", count=3)
+    assert _dates(series, "2024-01-01", "2024-12-31") == ["2024-01-31", "2024-03-31", "2024-05-31"]
+    assert last_occurrence(series) == date(2024, 5, 31)
+    assert _dates(series, "2024-05-01", "2024-05-31") == ["2024-05-31"]
+
+
+def test_exceptions_cancel_and_override_occurrences():
+    series = _series("daily", "2024-01-01", exceptions={
+        "2024-01-02": {"cancelled": True},
+        "2024-01-03": {"start_time": "14:00", "end_time": "15:00"}
+    })
+    occurrences = list(expand(series, "2024-01-01", "2024-01-03"))
+    assert [occurrence["date"] for occurrence in occurrences] == ["2024-01-01", "2024-01-03"]
+    assert occurrences[1]["start_time"] == "14:00"
+    assert occurrences[1]["id"] == "EVT-TEST@2024-01-03"
+    assert make_occurrence(series, "2024-01-02") is None
+
+
+def test_expansion_matches_brute_force_for_daily_rules():
+    series = _series("daily", "2024-01-05", interval=3, count=20)
+    first = date(2024, 1, 5)
+    expected = [(first + timedelta(days=3 * k)).isoformat() for k in range(20)]
+    assert _dates(series, "2024-01-01", "2024-12-31") == expected
+    assert _dates(series, "2024-01-20", "2024-01-30") == [d for d in expected if "2024-01-20" <= d <= "2024-01-30"]
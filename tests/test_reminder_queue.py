@@ -0,0 +1,84 @@
+"""tools.reminder_queue.ReminderQueue"""
+from types import SimpleNamespace
+
+from tools.reminder_queue import ReminderQueue
+
+
+def _reminder(reminder_id: str, fire_at: int, status: str = "active"):
+    return SimpleNamespace(id=reminder_id, fire_at=fire_at, status=status)
+
+
+def _queue(*reminders) -> ReminderQueue:
+    queue = ReminderQueue()
+    queue.rebuild(reminders)
+    return queue
+
+
+def test_between_returns_only_the_requested_range():
+    queue = _queue(_reminder("A", 100), _reminder("B", 1500), _reminder("C", 1600), _reminder("D", 3000))
+    assert queue.between(1440, 2879) == ["B", "C"]
+    assert queue.between(100, 100) == ["A"]
+    assert queue.between(3001, 5000) == []
+
+
+def test_between_follows_updates_and_removals():
+    queue = _queue(_reminder("A", 100), _reminder("B", 1500))
+    queue.push(_reminder("A", 1700))
+    queue.discard("B")
+    queue.push(_reminder("C", 1450, status="completed"))
+    assert queue.between(1440, 2879) == ["A"]
+    assert queue.between(0, 1439) == []
+
+    assert queue.pop_due(2000) == [(1700, "A")]
+    assert queue.between(0, 5000) == []
+
+
+def test_rescheduled_reminder_leaves_a_stale_entry_that_is_skipped():
+    queue = _queue(_reminder("A", 100), _reminder("B", 200))
+    queue.push(_reminder("A", 300))
+    assert len(queue._heap) == 3
+    assert queue.upcoming(0, 1000) == ["B", "A"]
+    assert queue.next_fire_at() == 200
+    assert queue.pop_due(250) == [(200, "B")]
+    assert queue.pop_due(1000) == [(300, "A")]
+    assert len(queue) == 0
+
+
+def test_discarded_and_completed_reminders_are_never_returned():
+    queue = _queue(_reminder("A", 100), _reminder("B", 200), _reminder("C", 300))
+    queue.discard("A")
+    queue.push(_reminder("B", 200, status="completed"))
+    assert "A" not in queue and "B" not in queue
+    assert queue.upcoming(0, 1000) == ["C"]
+    assert queue.next_fire_at() == 300
+    assert queue.pop_due(1000) == [(300, "C")]
+
+
+def test_upcoming_moves_past_reminders_to_overdue_until_popped():
+    queue = _queue(_reminder("A", 100), _reminder("B", 500))
+    assert queue.upcoming(200, 1000) == ["B"]
+    assert "A" in queue
+    assert queue.next_fire_at() == 100
+    assert queue.pop_due(200) == [(100, "A")]
+
+    # 逾期中的提醒改時間後回到佇列
+    queue = _queue(_reminder("A", 100))
+    queue.upcoming(200, 1000)
+    queue.push(_reminder("A", 600))
+    assert queue.upcoming(200, 1000) == ["A"]
+    assert queue.pop_due(200) == []
+
+
+def test_pop_due_respects_limit():
+    queue = _queue(*(_reminder(f"R{n}", n) for n in range(5)))
+    assert queue.pop_due(10, limit=2) == [(0, "R0"), (1, "R1")]
+    assert queue.pop_due(10) == [(2, "R2"), (3, "R3"), (4, "R4")]
+
+
+def test_stale_entries_are_compacted():
+    queue = _queue(_reminder("A", 100))
+    for minute in range(101, 101 + 3 * ReminderQueue.COMPACT_SLACK):
+        queue.push(_reminder("A", minute))
+    assert len(queue._heap) <= 2 * len(queue._live) + ReminderQueue.COMPACT_SLACK + 1
+    assert queue.upcoming(0, 10 ** 6) == ["A"]
+    assert queue.between(0, 10 ** 6) == ["A"]
@@ -0,0 +1,118 @@
+"""services.retry_policy.RetryPolicy: 退避、截止時間與重試判斷"""
+import asyncio
+import time
+
+import pytest
+from google.genai import errors
+
+from services.retry_policy import DeadlineExceeded, RetryPolicy, set_turn_deadline
+
+
+def _policy(**overrides) -> RetryPolicy:
+    options = {
+        "attempts": 4,
+        "initial_delay": 0.01,
+        "max_delay": 0.02,
+        "jitter": 0.0,
+        "request_timeout": 0
+    }
+    options.update(overrides)
+    return RetryPolicy(**options)
+
+
+def _api_error(code: int) -> errors.APIError:
+    return errors.APIError(code, {"error": {"code": code, "message": "error", "status": "ERROR"}})
+
+
+class _Flaky:
+    """前 failures 次呼叫拋出 error，之後回傳 "ok" """
+
+    def __init__(self, error: BaseException, failures: int):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+def test_backoff_doubles_up_to_the_cap():
+    policy = _policy(initial_delay=1.0, max_delay=5.0)
+    assert [policy.backoff(retry) for retry in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_backoff_jitter_stays_within_range():
+    policy = _policy(initial_delay=1.0, max_delay=5.0, jitter=0.5)
+    delays = [policy.backoff(4) for _ in range(200)]
+    assert all(2.5 <= delay <= 5.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retryable_errors_are_retried():
+    policy = _policy()
+    call = _Flaky(_api_error(503), failures=2)
+    assert asyncio.run(policy.execute(call)) == "ok"
+    assert call.calls == 3
+    assert policy.retries == 2
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    policy = _policy()
+    call = _Flaky(_api_error(400), failures=1)
+    with pytest.raises(errors.APIError):
+        asyncio.run(policy.execute(call))
+    assert call.calls == 1
+    assert policy.retries == 0
+
+
+def test_last_error_is_raised_when_attempts_run_out():
+    policy = _policy(attempts=2)
+    call = _Flaky(_api_error(429), failures=5)
+    with pytest.raises(errors.APIError):
+        asyncio.run(policy.execute(call))
+    assert call.calls == 2
+
+
+def test_request_timeout_raises_deadline_exceeded():
+    policy = _policy(attempts=1, request_timeout=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(policy.execute(slow))
+    assert time.monotonic() - started < 0.5
+    assert policy.timeouts == 1
+
+
+def test_no_retry_when_backoff_exceeds_the_turn_deadline():
+    policy = _policy(initial_delay=10.0, max_delay=10.0)
+    call = _Flaky(_api_error(503), failures=5)
+
+    async def turn():
+        set_turn_deadline(time.monotonic() + 1.0)
+        return await policy.execute(call)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(turn())
+    assert time.monotonic() - started < 0.5
+    assert call.calls == 1
+    assert policy.deadline_exceeded == 1
+
+
+def test_expired_turn_deadline_skips_the_request():
+    policy = _policy()
+    call = _Flaky(_api_error(503), failures=0)
+
+    async def turn():
+        set_turn_deadline(time.monotonic() - 1.0)
+        return await policy.execute(call)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(turn())
+    assert call.calls == 0
@@ -0,0 +1,44 @@
+"""tools.schedule_rules.event_conflicts"""
+import random
+
+from tools.schedule_rules import _busy_minutes, event_conflicts
+
+
+def _pairs(conflicts):
+    return sorted((min(a, b), max(a, b), start, end) for a, b, start, end in conflicts)
+
+
+def test_every_overlapping_pair_is_reported():
+    # A 9:00-11:00 / B 9:00-12:00 / C 10:00-10:30
+    intervals = sorted([(540, 660, "A"), (540, 720, "B"), (600, 630, "C")])
+    assert _pairs(event_conflicts(intervals)) == [
+        ("A", "B", 540, 660),
+        ("A", "C", 600, 630),
+        ("B", "C", 600, 630),
+    ]
+
+
+def test_back_to_back_events_do_not_conflict():
+    intervals = [(540, 600, "A"), (600, 660, "B"), (660, 720, "C")]
+    assert event_conflicts(intervals) == []
+
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    intervals = []
+    for n in range(150):
+        start = rng.randrange(0, 1400)
+        intervals.append((start, start + rng.randrange(1, 180), f"E{n}"))
+    intervals.sort()
+    expected = sorted(
+        (min(a[2], b[2]), max(a[2], b[2]), max(a[0], b[0]), min(a[1], b[1]))
+        for i, a in enumerate(intervals) for b in intervals[i + 1:]
+        if a[0] < b[1] and b[0] < a[1]
+    )
+    assert _pairs(event_conflicts(intervals)) == expected
+
+
+def test_busy_minutes_counts_the_union_inside_the_window():
+    intervals = [(540, 660, "A"), (540, 720, "B"), (600, 630, "C"), (800, 900, "D")]
+    assert _busy_minutes(intervals, 480, 1080) == 180 + 100
+    assert _busy_minutes(intervals, 600, 850) == 120 + 50
@@ -0,0 +1,53 @@
+"""tools.schedule_search: 子行程的匯入範圍與候選評分的時間上限"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from tools.schedule_search import PlanningProblem, candidate_specs, evaluate_candidates
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _problem(tasks: int = 200) -> PlanningProblem:
+    return PlanningProblem(
+        task_ids=[f"TSK-{i}" for i in range(tasks)],
+        durations=[30 + i % 90 for i in range(tasks)],
+        weights=[(8, 4, 2, 1)[i % 4] for i in range(tasks)],
+        due_days=[None if i % 5 == 0 else 100 + i % 7 for i in range(tasks)],
+        windows=[(100 + day, 540, 1080) for day in range(5)],
+        start_day=100,
+        days=5,
+        busy=[0] * 5,
+        daily_limit=480,
+        work_end=1080
+    )
+
+
+def test_worker_import_graph_is_lean():
+    """子行程只匯入 tools.schedule_search，不會載入主程式、設定或資料表"""
+    code = (
+        "import tools.schedule_search as s, sys;"
+        "loaded = s.loaded_forbidden_modules();"
+        "assert not loaded, loaded;"
+        "assert not [m for m in sys.modules if m.startswith('tools.') and m != 'tools.schedule_search']"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_sequential_evaluation_respects_total_budget():
+    specs = candidate_specs(8)
+    started = time.perf_counter()
+    results = evaluate_candidates(_problem(), specs, time_budget_ms=200, workers=1)
+    assert time.perf_counter() - started < 1.0
+    costs = [result["cost"]["total"] for result in results]
+    assert costs == sorted(costs)
+
+
+def test_pool_results_are_bounded_and_complete():
+    """子行程尚未啟動完成時，來不及回傳的候選改在目前行程評分"""
+    specs = candidate_specs(6)
+    started = time.perf_counter()
+    results = evaluate_candidates(_problem(), specs, time_budget_ms=300, workers=2)
+    assert time.perf_counter() - started < 2.0
+    assert results and len(results) <= len(specs)
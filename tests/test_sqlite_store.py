@@ -0,0 +1,36 @@
+"""storage.sqlite_store: 版本與資料在同一個交易中持久化"""
+import pytest
+
+from storage.sqlite_store import SQLiteStore, SQLiteTable
+
+
+@pytest.fixture
+def table(tmp_path):
+    store = SQLiteStore(str(tmp_path / "schedule.db"))
+    yield SQLiteTable(store, "items", ("status",))
+    store.close()
+
+
+def test_missing_delete_keeps_version(table):
+    table["A"] = {"status": "todo"}
+    version, generation = table.version, table.generation
+    with pytest.raises(KeyError):
+        del table["missing"]
+    assert (table.version, table.generation) == (version, generation)
+    assert table.pop("missing", None) is None
+    assert table.version == version
+
+
+def test_version_survives_reopen(tmp_path):
+    path = str(tmp_path / "schedule.db")
+    store = SQLiteStore(path)
+    table = SQLiteTable(store, "items", ("status",))
+    table["A"] = {"status": "todo"}
+    del table["A"]
+    version, generation = table.version, table.generation
+    store.close()
+
+    reopened = SQLiteStore(path)
+    assert SQLiteTable(reopened, "items", ("status",)).generation == generation
+    assert version == 2
+    reopened.close()
@@ -0,0 +1,145 @@
+"""讀取工具的快取
+以 (函式, 參數, 資料表版本) 為鍵記住讀取工具的結果。
+資料表在每次寫入/刪除時遞增 version，資料改變後鍵就不同，舊結果不會再被取用，
+最後以 LRU 淘汰；每個快取各自統計命中與未命中次數。
+
+查詢工具會在多個執行緒同時呼叫 (direct_query_agent)，快取的讀寫都在鎖內進行；
+保存與取出時各複製一份結果，呼叫端 (ADK、意圖路由) 修改回傳的資料不會影響快取。
+"""
+from typing import Callable, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import copy
+import functools
+import inspect
+import threading
+
+from config.settings import Settings
+
+
+class VersionedCache:
+    """
+    LRU 快取 (鍵 → 結果)，執行緒安全
+
+    - 保存與取出時都複製結果，每次呼叫拿到各自的一份
+    - maxsize: 最多保存的結果數，0 表示不快取
+    - hits/misses: 命中與未命中次數 (參數無法作為鍵的呼叫不列入)
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Tuple[bool, object]:
+        """取得快取結果，回傳 (是否命中, 結果)"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = self._entries[key]
+        return True, copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: object):
+        """保存結果，超過上限時淘汰最久未使用的項目"""
+        if self.maxsize <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清除所有結果與統計"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size, hits, misses = len(self._entries), self.hits, self.misses
+        total = hits + misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
+
+
+# 函式名稱 → 快取
+_CACHES: Dict[str, VersionedCache] = {}
+
+
+def memoize(*tables, extra: Optional[Callable[[], Hashable]] = None, maxsize: Optional[int] = None):
+    """
+    以資料表版本為鍵快取讀取工具的結果
+
+    保留原函式的名稱、說明與參數簽名，可直接註冊為代理的工具。
+
+    Args:
+        *tables: 結果所依賴的資料表 (需有 version 屬性)
+        extra: 其他影響結果的值 (例如今天的日序)，選填
+        maxsize: 快取上限，預設 Settings.TOOL_CACHE_SIZE
+
+    Example:
+        @memoize(TASKS_DATABASE, extra=today_number)
+        def get_task_statistics() -> Dict: ...
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        cache = _CACHES[func.__name__] = VersionedCache(
+            func.__name__, Settings.TOOL_CACHE_SIZE if maxsize is None else maxsize
+        )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (
+                tuple(bound.arguments.items()),
+                tuple(table.version for table in tables),
+                extra() if extra is not None else None
+            )
+            try:
+                hit, value = cache.get(key)
+            except TypeError:
+                # 參數無法作為鍵 (例如 list)，直接執行
+                return func(*args, **kwargs)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """
+    取得所有讀取工具快取的統計
+
+    Returns:
+        函式名稱 → {"size", "maxsize", "hits", "misses", "hit_rate"}
+    """
+    return {name: cache.stats() for name, cache in _CACHES.items()}
+
+
+def clear_caches():
+    """清除所有讀取工具的快取"""
+    for cache in _CACHES.values():
+        cache.clear()
@@ -0,0 +1,463 @@
+"""日程索引
+依日期分桶、桶內依開始時間排序的區間索引，
+讓單日查詢、範圍查詢與衝突檢查不必掃描整個 CALENDAR_DATABASE。
+每個日期另外維護一個 1440 位元 (每分鐘一位元) 的佔用點陣圖，
+「此時段是否空閒」只需一次遮罩位元運算。
+週期事件只保存規則，查詢到某個日期時才展開當天的場次。
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import bisect
+import heapq
+import threading
+
+from tools.records import MINUTES_PER_DAY, EventRecord, day_string, time_minutes, time_string
+from tools.recurrence import (
+    iter_occurrence_dates,
+    last_occurrence,
+    make_occurrence,
+    parse_date
+)
+
+# "HH:MM" 與當日分鐘數互轉 (允許 24:00 表示當日結束)
+parse_time = time_minutes
+format_time = time_string
+
+
+def slot_mask(start: int, end: int) -> int:
+    """取得 [start, end) 分鐘區間的點陣圖遮罩"""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class _DayIntervals:
+    """單一日期內的事件區間，依 (開始, 結束, 事件 ID) 排序"""
+
+    __slots__ = ("intervals", "max_length", "occupancy", "degenerate")
+
+    def __init__(self):
+        self.intervals: List[Tuple[int, int, str]] = []
+        self.max_length = 0
+        # 佔用點陣圖: 第 n 位元代表第 n 分鐘已被佔用
+        self.occupancy = 0
+        # 長度為 0 的事件無法以點陣圖表示，需走逐筆比對
+        self.degenerate = 0
+
+    def add(self, interval: Tuple[int, int, str]):
+        bisect.insort(self.intervals, interval)
+        self.max_length = max(self.max_length, interval[1] - interval[0])
+        self.occupancy |= slot_mask(interval[0], interval[1])
+        if interval[1] <= interval[0]:
+            self.degenerate += 1
+
+    def remove(self, interval: Tuple[int, int, str]):
+        pos = bisect.bisect_left(self.intervals, interval)
+        if pos < len(self.intervals) and self.intervals[pos] == interval:
+            self.intervals.pop(pos)
+            if interval[1] <= interval[0]:
+                self.degenerate -= 1
+            # 只清除被移除的區段，再補回與這一段重疊的其他事件 (它們可能佔用相同分鐘)
+            start, end = interval[0], interval[1]
+            occupancy = self.occupancy & ~slot_mask(start, end)
+            for other_start, other_end, _ in self.overlapping(start, end):
+                occupancy |= slot_mask(max(other_start, start), min(other_end, end))
+            self.occupancy = occupancy
+            # 移除最長區間時才需要重新計算上限
+            if interval[1] - interval[0] == self.max_length:
+                self.max_length = max(
+                    (end - start for start, end, _ in self.intervals), default=0
+                )
+
+    def is_free(self, start: int, end: int) -> Optional[bool]:
+        """
+        以點陣圖判斷 [start, end) 是否空閒
+
+        Returns:
+            True/False；無法以點陣圖判斷 (零長度區間) 時回傳 None
+        """
+        if end <= start or self.degenerate:
+            return None
+        return not self.occupancy & slot_mask(start, end)
+
+    def overlapping(self, start: int, end: int) -> List[Tuple[int, int, str]]:
+        """
+        找出與 [start, end) 重疊的區間
+
+        只有開始時間落在 (start - max_length, end) 之間的區間可能重疊，
+        因此以二分搜尋定位後只檢查這一小段。
+        """
+        lo = bisect.bisect_right(self.intervals, (start - self.max_length, MINUTES_PER_DAY + 1, ""))
+        hi = bisect.bisect_left(self.intervals, (end, -1, ""))
+        return [iv for iv in self.intervals[lo:hi] if iv[1] > start]
+
+
+class CalendarIndex:
+    """
+    日程的日期區間索引
+
+    - 依日期分桶，日期清單保持排序以支援範圍查詢
+    - 每個日期內的事件依開始時間排序
+    - 週期事件另外保存，查詢某日時與當日事件合併 (結果依日期快取)
+    - add/remove 由 add_event/update_event/delete_event 同步維護
+    - version 在每次異動時遞增，供衍生資料 (例如優化迴圈的狀態指紋) 判斷日程是否改變
+    """
+
+    # 合併週期場次後的單日結果快取上限
+    MERGED_CACHE_SIZE = 512
+
+    def __init__(self):
+        self._days: Dict[str, _DayIntervals] = {}
+        self._dates: List[str] = []
+        self._entries: Dict[str, Tuple[str, Tuple[int, int, str]]] = {}
+        # 週期事件 ID → (週期事件, 第一場日期, 最後場次日期上限)
+        self._series: Dict[str, Tuple[EventRecord, str, Optional[str]]] = {}
+        self._merged: Dict[str, Optional[_DayIntervals]] = {}
+        self._loader: Optional[Callable[[], Iterable[EventRecord]]] = None
+        self._load_lock = threading.RLock()
+        self._loading = False
+        self.version = 0
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._entries) + len(self._series)
+
+    def __contains__(self, event_id: str) -> bool:
+        self._load()
+        return event_id in self._entries or event_id in self._series
+
+    def load_lazily(self, loader: Callable[[], Iterable[EventRecord]]):
+        """
+        延後建立索引到第一次使用時
+
+        讓程式啟動時不必讀取所有事件 (例如 journal 後端只開啟快照)。
+
+        Args:
+            loader: 回傳所有事件的函式
+        """
+        self._loader = loader
+
+    def _load(self):
+        # 查詢可能在多個執行緒同時發生 (direct_query_agent)，建立期間其他執行緒需等待，
+        # 不可讀到空的或建立到一半的索引；建立中的執行緒重入時 (rebuild → add) 直接返回
+        if self._loader is None and not self._loading:
+            return
+        with self._load_lock:
+            loader = self._loader
+            if loader is None or self._loading:
+                return
+            self._loading = True
+            try:
+                self.rebuild(loader())
+            finally:
+                self._loading = False
+
+    def rebuild(self, events: Iterable[EventRecord]):
+        """依現有事件重建索引"""
+        self._loader = None
+        self._days.clear()
+        self._dates.clear()
+        self._entries.clear()
+        self._series.clear()
+        self._merged.clear()
+        self.version += 1
+        for event in events:
+            self.add(event)
+
+    def add(self, event: EventRecord) -> bool:
+        """
+        將事件加入索引 (已存在則先移除舊位置)
+
+        Returns:
+            事件時間格式正確並已建立索引時回傳 True
+        """
+        self._load()
+        event_id = event.id
+        self.remove(event_id)
+        self.version += 1
+
+        start = event.start
+        end = event.end
+        if start is None or end is None or event.day is None:
+            return False
+
+        date = day_string(event.day)
+        if event.recurrence:
+            last = last_occurrence(event)
+            self._series[event_id] = (event, date, last.isoformat() if last else None)
+            self._merged.clear()
+            return True
+
+        self._merged.pop(date, None)
+        day = self._days.get(date)
+        if day is None:
+            day = self._days[date] = _DayIntervals()
+            bisect.insort(self._dates, date)
+
+        interval = (start, end, event_id)
+        day.add(interval)
+        self._entries[event_id] = (date, interval)
+        return True
+
+    def remove(self, event_id: str):
+        """將事件自索引移除"""
+        self._load()
+        if self._series.pop(event_id, None) is not None:
+            self._merged.clear()
+            self.version += 1
+            return
+
+        entry = self._entries.pop(event_id, None)
+        if entry is None:
+            return
+
+        self.version += 1
+        date, interval = entry
+        self._merged.pop(date, None)
+        day = self._days[date]
+        day.remove(interval)
+        if not day.intervals:
+            del self._days[date]
+            self._dates.pop(bisect.bisect_left(self._dates, date))
+
+    def _series_in(self, start_date: str, end_date: str) -> List[EventRecord]:
+        """取得在 [start_date, end_date] 期間可能有場次的週期事件"""
+        return [
+            series for series, first, last in self._series.values()
+            if first <= end_date and (last is None or last >= start_date)
+        ]
+
+    def _day(self, date: str) -> Optional[_DayIntervals]:
+        """
+        取得特定日期的區間資料
+
+        沒有週期事件時直接回傳當日桶；否則將當日場次與一般事件合併，
+        並依日期快取合併結果直到相關事件變動。
+        """
+        self._load()
+        day = self._days.get(date)
+        if not self._series:
+            return day
+        if date in self._merged:
+            return self._merged[date]
+
+        occurrences = []
+        for series in self._series_in(date, date):
+            occurrence = make_occurrence(series, date)
+            if occurrence is None:
+                continue
+            start = time_minutes(occurrence["start_time"])
+            end = time_minutes(occurrence["end_time"])
+            if start is not None and end is not None:
+                occurrences.append((start, end, occurrence["id"]))
+
+        merged = day
+        if occurrences:
+            merged = _DayIntervals()
+            for interval in (day.intervals if day else []) + occurrences:
+                merged.add(interval)
+
+        if len(self._merged) >= self.MERGED_CACHE_SIZE:
+            self._merged.clear()
+        self._merged[date] = merged
+        return merged
+
+    def _dates_between(self, start_date: str, end_date: str) -> List[str]:
+        """取得範圍內有事件或週期場次的日期，依日期排序"""
+        self._load()
+        lo = bisect.bisect_left(self._dates, start_date)
+        hi = bisect.bisect_right(self._dates, end_date)
+        dates = self._dates[lo:hi]
+        if not self._series:
+            return dates
+
+        occurrence_dates = set(dates)
+        try:
+            window_start = parse_date(start_date)
+            window_end = parse_date(end_date)
+        except ValueError:
+            return dates
+        for series in self._series_in(start_date, end_date):
+            for day in iter_occurrence_dates(series, window_start, window_end):
+                occurrence_dates.add(day.isoformat())
+        return sorted(occurrence_dates)
+
+    def events_on(self, date: str) -> List[str]:
+        """取得特定日期的事件 ID (含週期場次)，依開始時間排序"""
+        day = self._day(date)
+        if day is None:
+            return []
+        return [event_id for _, _, event_id in day.intervals]
+
+    def intervals_on(self, date: str) -> List[Tuple[int, int, str]]:
+        """取得特定日期的 (開始分鐘, 結束分鐘, 事件 ID)，依開始時間排序"""
+        day = self._day(date)
+        if day is None:
+            return []
+        return list(day.intervals)
+
+    def events_between(self, start_date: str, end_date: str) -> List[str]:
+        """取得日期範圍內 (含首尾) 的事件 ID (含週期場次)，依日期與開始時間排序"""
+        results = []
+        for date in self._dates_between(start_date, end_date):
+            day = self._day(date)
+            if day is not None:
+                results.extend(event_id for _, _, event_id in day.intervals)
+        return results
+
+    def all_events(self) -> List[str]:
+        """取得所有已索引的一般事件 ID，依日期與開始時間排序"""
+        self._load()
+        results = []
+        for date in self._dates:
+            results.extend(event_id for _, _, event_id in self._days[date].intervals)
+        return results
+
+    def all_series(self) -> List[str]:
+        """取得所有週期事件 ID，依第一場日期排序"""
+        self._load()
+        return [
+            series_id for series_id, (_, first, _) in
+            sorted(self._series.items(), key=lambda item: (item[1][1], item[0]))
+        ]
+
+    def occupancy(self, date: str) -> int:
+        """取得特定日期的佔用點陣圖"""
+        day = self._day(date)
+        return day.occupancy if day else 0
+
+    def is_free(self, date: str, start: int, end: int) -> bool:
+        """判斷特定日期的 [start, end) 分鐘區間是否沒有任何事件"""
+        day = self._day(date)
+        if day is None:
+            return True
+        free = day.is_free(start, end)
+        if free is None:
+            return not day.overlapping(start, end)
+        return free
+
+    def are_free(self, date: str, slots: Iterable[Tuple[int, int]]) -> List[bool]:
+        """
+        一次檢查同一天的多個候選時段
+
+        只讀取一次當日點陣圖，每個候選時段僅需一次遮罩運算。
+
+        Args:
+            date: 日期 (格式: YYYY-MM-DD)
+            slots: (開始分鐘, 結束分鐘) 清單
+
+        Returns:
+            與 slots 對應的空閒結果
+        """
+        day = self._day(date)
+        if day is None:
+            return [True for _ in slots]
+        if day.degenerate:
+            return [not day.overlapping(start, end) for start, end in slots]
+        occupancy = day.occupancy
+        return [
+            not occupancy & slot_mask(start, end) if end > start
+            else not day.overlapping(start, end)
+            for start, end in slots
+        ]
+
+    def free_windows(
+        self,
+        date: str,
+        window_start: int,
+        window_end: int,
+        min_length: int = 1
+    ) -> List[Tuple[int, int]]:
+        """
+        取得特定日期在 [window_start, window_end) 內的空閒區段
+
+        事件區間已依開始時間排序，一次掃描即可合併忙碌區間並找出間隙。
+
+        Args:
+            date: 日期 (格式: YYYY-MM-DD)
+            window_start: 可排程範圍開始 (分鐘)
+            window_end: 可排程範圍結束 (分鐘)
+            min_length: 空閒區段最短長度 (分鐘)
+
+        Returns:
+            (開始分鐘, 結束分鐘) 清單
+        """
+        day = self._day(date)
+        intervals = day.intervals if day else []
+        windows = []
+        cursor = window_start
+        for start, end, _ in intervals:
+            if start >= window_end:
+                break
+            if end <= cursor:
+                continue
+            if start - cursor >= min_length:
+                windows.append((cursor, start))
+            cursor = max(cursor, end)
+        if window_end - cursor >= min_length:
+            windows.append((cursor, window_end))
+        return windows
+
+    def sweep_conflicts(
+        self,
+        date: str,
+        proposals: List[Tuple[int, int, int]]
+    ) -> Tuple[Dict[int, List[str]], Dict[int, List[int]]]:
+        """
+        以單次掃描線找出同一天多個提案時段的衝突
+
+        將當日事件與提案依開始時間合併後掃描，以結束時間的最小堆積
+        維護「仍在進行中」的區間，每個區間只與進行中的區間比對。
+
+        Args:
+            date: 日期 (格式: YYYY-MM-DD)
+            proposals: (開始分鐘, 結束分鐘, 提案編號) 清單
+
+        Returns:
+            (提案編號 → 衝突事件 ID 清單, 提案編號 → 互相衝突的提案編號清單)
+        """
+        day = self._day(date)
+        intervals = day.intervals if day else []
+
+        # (開始, 結束, 類型, 識別) - 類型 0 為既有事件，1 為提案
+        items = [(start, end, 1, index) for start, end, index in proposals]
+        items.sort()
+        merged = heapq.merge(
+            ((start, end, 0, event_id) for start, end, event_id in intervals),
+            items
+        )
+
+        event_conflicts: Dict[int, List[str]] = {index: [] for _, _, index in proposals}
+        proposal_conflicts: Dict[int, List[int]] = {index: [] for _, _, index in proposals}
+        active_events: List[Tuple[int, int, str]] = []
+        active_proposals: List[Tuple[int, int, int]] = []
+
+        for start, end, kind, key in merged:
+            while active_events and active_events[0][0] <= start:
+                heapq.heappop(active_events)
+            while active_proposals and active_proposals[0][0] <= start:
+                heapq.heappop(active_proposals)
+
+            for other_end, other_start, other in active_proposals:
+                if other_start < end and start < other_end:
+                    if kind == 0:
+                        event_conflicts[other].append(key)
+                    else:
+                        proposal_conflicts[other].append(key)
+                        proposal_conflicts[key].append(other)
+
+            if kind == 0:
+                heapq.heappush(active_events, (end, start, key))
+            else:
+                for other_end, other_start, event_id in active_events:
+                    if other_start < end and start < other_end:
+                        event_conflicts[key].append(event_id)
+                heapq.heappush(active_proposals, (end, start, key))
+
+        return event_conflicts, proposal_conflicts
+
+    def overlapping(self, date: str, start: int, end: int) -> List[str]:
+        """取得特定日期中與 [start, end) 分鐘區間重疊的事件 ID"""
+        day = self._day(date)
+        if day is None:
+            return []
+        return [event_id for _, _, event_id in day.overlapping(start, end)]
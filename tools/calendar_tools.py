@@ -5,15 +5,31 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import uuid
 
-# 模擬日程資料庫
-CALENDAR_DATABASE = {}
+from config.settings import Settings
+from storage.factory import open_table
+from tools.cache import memoize
+from tools.calendar_index import CalendarIndex, format_time, parse_time
+from tools.records import MINUTES_PER_DAY, EventRecord, day_number
+from tools.reminder_tools import close_linked_reminders, linked_reminders, shift_reminder
+from tools.recurrence import (
+    OVERRIDE_FIELDS,
+    build_rule,
+    make_occurrence,
+    split_occurrence_id
+)
+
+# 日程資料庫 (儲存後端由 Settings.STORAGE_BACKEND 決定)
+CALENDAR_DATABASE = open_table("events", EventRecord)
+
+# 日期區間索引 (由 add_event/update_event/delete_event 維護)
+CALENDAR_INDEX = CalendarIndex()
 
 # 初始化一些示範資料
 def _init_sample_data():
     today = datetime.now().strftime("%Y-%m-%d")
     tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
     
-    CALENDAR_DATABASE["EVT-001"] = {
+    CALENDAR_DATABASE["EVT-001"] = EventRecord.from_dict({
         "id": "EVT-001",
         "title": "團隊週會",
         "date": today,
@@ -21,8 +37,8 @@ def _init_sample_data():
         "end_time": "11:00",
         "location": "會議室 A",
         "description": "討論本週進度與下週規劃"
-    }
-    CALENDAR_DATABASE["EVT-002"] = {
+    })
+    CALENDAR_DATABASE["EVT-002"] = EventRecord.from_dict({
         "id": "EVT-002",
         "title": "專案評審會議",
         "date": today,
@@ -30,8 +46,8 @@ def _init_sample_data():
         "end_time": "16:00",
         "location": "會議室 B",
         "description": "Q4 專案進度評審"
-    }
-    CALENDAR_DATABASE["EVT-003"] = {
+    })
+    CALENDAR_DATABASE["EVT-003"] = EventRecord.from_dict({
         "id": "EVT-003",
         "title": "客戶拜訪",
         "date": tomorrow,
@@ -39,9 +55,26 @@ def _init_sample_data():
         "end_time": "11:30",
         "location": "客戶公司",
         "description": "新產品展示"
-    }
+    })
 
-_init_sample_data()
+if not CALENDAR_DATABASE:
+    _init_sample_data()
+CALENDAR_INDEX.load_lazily(CALENDAR_DATABASE.values)
+
+
+def get_event_record(event_id: str) -> Optional[EventRecord]:
+    """依 ID 取得事件；週期場次 ID (EVT-XXX@YYYY-MM-DD) 會即時展開"""
+    if event_id in CALENDAR_DATABASE:
+        return CALENDAR_DATABASE[event_id]
+    occurrence = split_occurrence_id(event_id)
+    if occurrence is None:
+        return None
+    series_id, date = occurrence
+    series = CALENDAR_DATABASE.get(series_id)
+    if series is None or not series.recurrence:
+        return None
+    occurrence = make_occurrence(series, date)
+    return EventRecord.from_dict(occurrence) if occurrence else None
 
 
 def add_event(
@@ -50,28 +83,59 @@ def add_event(
     start_time: str,
     end_time: str,
     location: str = "",
-    description: str = ""
+    description: str = "",
+    recurrence: Optional[str] = None,
+    interval: int = 1,
+    count: Optional[int] = None,
+    until: Optional[str] = None
 ) -> Dict:
     """
     新增日程事件
     
     Args:
         title: 事件標題
-        date: 日期 (格式: YYYY-MM-DD)
+        date: 日期 (格式: YYYY-MM-DD)，週期事件為第一場日期
         start_time: 開始時間 (格式: HH:MM)
         end_time: 結束時間 (格式: HH:MM)
         location: 地點 (選填)
         description: 描述 (選填)
+        recurrence: 週期 (daily/weekly/monthly，選填)
+        interval: 週期間隔，預設 1 (例如 weekly + 2 代表隔週)
+        count: 週期總場次數 (選填)
+        until: 週期最後日期 (格式: YYYY-MM-DD，選填)
     
     Returns:
         新增的事件資訊
     
     Example:
         add_event("部門會議", "2024-12-05", "14:00", "15:00", "會議室A")
+        add_event("團隊週會", "2024-12-02", "10:00", "11:00", recurrence="weekly", count=10)
     """
+    if day_number(date) is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {date} (格式: YYYY-MM-DD)"
+        }
+    
+    if parse_time(start_time) is None or parse_time(end_time) is None:
+        return {
+            "success": False,
+            "message": f"時間格式錯誤: {start_time}-{end_time} (格式: HH:MM)"
+        }
+    
+    rule = None
+    if recurrence:
+        try:
+            rule = build_rule(recurrence, interval, count, until)
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": f"週期設定錯誤: {e}"
+            }
+    
     event_id = f"EVT-{uuid.uuid4().hex[:6].upper()}"
     
-    event = {
+    event = EventRecord.from_dict({
         "id": event_id,
         "title": title,
         "date": date,
@@ -80,17 +144,26 @@ def add_event(
         "location": location,
         "description": description,
         "created_at": datetime.now().isoformat()
-    }
+    })
+    if rule:
+        event.recurrence = rule
+        event.exceptions = {}
     
     CALENDAR_DATABASE[event_id] = event
+    CALENDAR_INDEX.add(event)
+    
+    message = f"已新增事件「{title}」於 {date} {start_time}-{end_time}"
+    if rule:
+        message = f"已新增週期事件「{title}」({rule['freq']}) 自 {date} 起 {start_time}-{end_time}"
     
     return {
         "success": True,
         "event_id": event_id,
-        "message": f"已新增事件「{title}」於 {date} {start_time}-{end_time}"
+        "message": message
     }
 
 
+@memoize(CALENDAR_DATABASE)
 def query_events(
     date: Optional[str] = None,
     start_date: Optional[str] = None,
@@ -105,27 +178,38 @@ def query_events(
         end_date: 結束日期 (用於範圍查詢)
     
     Returns:
-        符合條件的事件清單
+        符合條件的事件清單 (週期事件會展開為當期場次，場次 ID 為 EVT-XXX@YYYY-MM-DD)
     
     Example:
         query_events(date="2024-12-05")  # 查詢特定日期
         query_events(start_date="2024-12-01", end_date="2024-12-07")  # 範圍查詢
     """
-    results = []
+    # 索引已依日期和時間排序
+    if date and start_date and end_date:
+        event_ids = CALENDAR_INDEX.events_between(start_date, end_date)
+        if not start_date <= date <= end_date:
+            event_ids = sorted(
+                CALENDAR_INDEX.events_on(date) + event_ids,
+                key=lambda x: get_event_record(x).day
+            )
+    elif date:
+        event_ids = CALENDAR_INDEX.events_on(date)
+    elif start_date and end_date:
+        event_ids = CALENDAR_INDEX.events_between(start_date, end_date)
+    elif not start_date and not end_date:
+        # 未指定日期時無法展開無限期的週期事件，改為列出週期事件本身
+        event_ids = CALENDAR_INDEX.all_events()
+        series_ids = CALENDAR_INDEX.all_series()
+        if series_ids:
+            event_ids = sorted(
+                event_ids + series_ids,
+                key=lambda x: CALENDAR_DATABASE[x].day
+            )
+    else:
+        event_ids = []
     
-    for event in CALENDAR_DATABASE.values():
-        event_date = event["date"]
-        
-        if date and event_date == date:
-            results.append(event)
-        elif start_date and end_date:
-            if start_date <= event_date <= end_date:
-                results.append(event)
-        elif not date and not start_date and not end_date:
-            results.append(event)
-    
-    # 按日期和時間排序
-    results.sort(key=lambda x: (x["date"], x["start_time"]))
+    # 回傳結果時才轉回 dict 格式
+    results = [get_event_record(event_id).to_dict() for event_id in event_ids]
     
     if not results:
         return {
@@ -154,8 +238,11 @@ def update_event(
     """
     更新日程事件
     
+    傳入週期事件 ID 會更新整個系列；傳入場次 ID (EVT-XXX@YYYY-MM-DD)
+    只更新該場次，變更日期時該場次會移出系列成為獨立事件。
+    
     Args:
-        event_id: 事件 ID
+        event_id: 事件 ID 或週期場次 ID
         title: 新標題 (選填)
         date: 新日期 (選填)
         start_time: 新開始時間 (選填)
@@ -166,6 +253,17 @@ def update_event(
     Returns:
         更新結果
     """
+    if event_id not in CALENDAR_DATABASE and get_event_record(event_id):
+        return _update_occurrence(
+            event_id,
+            title=title,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            location=location,
+            description=description
+        )
+    
     if event_id not in CALENDAR_DATABASE:
         return {
             "success": False,
@@ -174,38 +272,182 @@ def update_event(
     
     event = CALENDAR_DATABASE[event_id]
     
+    if date and day_number(date) is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {date} (格式: YYYY-MM-DD)"
+        }
+    
+    if (start_time and parse_time(start_time) is None) or (end_time and parse_time(end_time) is None):
+        return {
+            "success": False,
+            "message": "時間格式錯誤 (格式: HH:MM)"
+        }
+    
+    previous_day, previous_start = event.day, event.start
+    
     if title:
-        event["title"] = title
+        event.title = title
     if date:
-        event["date"] = date
+        event.day = day_number(date)
     if start_time:
-        event["start_time"] = start_time
+        event.start = parse_time(start_time)
     if end_time:
-        event["end_time"] = end_time
+        event.end = parse_time(end_time)
     if location is not None:
-        event["location"] = location
+        event.location = location
     if description is not None:
-        event["description"] = description
+        event.description = description
     
-    event["updated_at"] = datetime.now().isoformat()
+    event.updated_at = datetime.now().isoformat()
     
-    return {
+    CALENDAR_DATABASE[event_id] = event
+    CALENDAR_INDEX.add(event)
+    
+    result = {
         "success": True,
         "event_id": event_id,
-        "message": f"已更新事件「{event['title']}」"
+        "message": f"已更新事件「{event.title}」"
     }
+    updated = _shift_event_reminders(event, previous_day, previous_start)
+    if updated:
+        result["reminders_updated"] = updated
+    return result
+
+
+def _shift_event_reminders(event: EventRecord, previous_day: int, previous_start: int) -> int:
+    """
+    事件改期或改時間時，關聯提醒移動相同的時間
+    
+    週期事件各場次的提醒只跟著開始時間移動，已單獨覆寫開始時間的場次不受影響。
+    
+    Returns:
+        移動的提醒數量
+    """
+    if None in (event.day, event.start, previous_day, previous_start):
+        return 0
+    
+    delta = (event.day - previous_day) * MINUTES_PER_DAY + event.start - previous_start
+    time_delta = event.start - previous_start
+    if not delta and not time_delta:
+        return 0
+    
+    shifted = 0
+    for reminder in linked_reminders("event", event.id, include_occurrences=bool(event.recurrence)):
+        minutes = delta
+        if reminder.related_id != event.id:
+            occurrence_date = reminder.related_id.partition("@")[2]
+            if "start_time" in (event.exceptions or {}).get(occurrence_date, {}):
+                continue
+            minutes = time_delta
+        if minutes:
+            shift_reminder(reminder, minutes)
+            shifted += 1
+    return shifted
+
+
+def _update_occurrence(event_id: str, **changes) -> Dict:
+    """更新單一週期場次，只在系列的 exceptions 中記錄覆寫內容"""
+    occurrence = get_event_record(event_id)
+    series = CALENDAR_DATABASE[occurrence["series_id"]]
+    occurrence_date = occurrence["date"]
+    
+    start_time = changes.get("start_time")
+    end_time = changes.get("end_time")
+    if (start_time and parse_time(start_time) is None) or (end_time and parse_time(end_time) is None):
+        return {
+            "success": False,
+            "message": "時間格式錯誤 (格式: HH:MM)"
+        }
+    
+    new_date = changes.get("date")
+    if new_date and day_number(new_date) is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {new_date} (格式: YYYY-MM-DD)"
+        }
+    
+    if new_date and new_date != occurrence_date:
+        # 改期的場次移出系列，成為獨立事件
+        moved = {
+            field: changes[field] if changes.get(field) is not None else occurrence[field]
+            for field in OVERRIDE_FIELDS
+        }
+        series.exceptions[occurrence_date] = {"cancelled": True}
+        series.updated_at = datetime.now().isoformat()
+        CALENDAR_DATABASE[series.id] = series
+        CALENDAR_INDEX.add(series)
+        result = add_event(date=new_date, **moved)
+        if not result["success"]:
+            return result
+        result["message"] = f"已將「{moved['title']}」{occurrence_date} 的場次移至 {new_date} {moved['start_time']}-{moved['end_time']}"
+        
+        # 場次的提醒改為關聯到新事件，並移動相同的時間
+        delta = (
+            (day_number(new_date) - day_number(occurrence_date)) * MINUTES_PER_DAY
+            + parse_time(moved["start_time"]) - parse_time(occurrence["start_time"])
+        )
+        reminders = linked_reminders("event", event_id)
+        for reminder in reminders:
+            shift_reminder(reminder, delta, related_id=result["event_id"])
+        if reminders:
+            result["reminders_updated"] = len(reminders)
+        return result
+    
+    override = series.exceptions.setdefault(occurrence_date, {})
+    for field in OVERRIDE_FIELDS:
+        value = changes.get(field)
+        if value is None or (field not in ("location", "description") and not value):
+            continue
+        override[field] = value
+    series.updated_at = datetime.now().isoformat()
+    CALENDAR_DATABASE[series.id] = series
+    CALENDAR_INDEX.add(series)
+    
+    result = {
+        "success": True,
+        "event_id": event_id,
+        "message": f"已更新「{override.get('title', series.title)}」{occurrence_date} 的場次"
+    }
+    delta = parse_time(start_time) - parse_time(occurrence["start_time"]) if start_time else 0
+    if delta:
+        reminders = linked_reminders("event", event_id)
+        for reminder in reminders:
+            shift_reminder(reminder, delta)
+        if reminders:
+            result["reminders_updated"] = len(reminders)
+    return result
 
 
 def delete_event(event_id: str) -> Dict:
     """
     刪除日程事件
     
+    傳入週期事件 ID 會刪除整個系列；傳入場次 ID (EVT-XXX@YYYY-MM-DD) 只取消該場次。
+    
     Args:
-        event_id: 事件 ID
+        event_id: 事件 ID 或週期場次 ID
     
     Returns:
         刪除結果
     """
+    if event_id not in CALENDAR_DATABASE:
+        occurrence = get_event_record(event_id)
+        if occurrence:
+            series = CALENDAR_DATABASE[occurrence["series_id"]]
+            series.exceptions[occurrence["date"]] = {"cancelled": True}
+            series.updated_at = datetime.now().isoformat()
+            CALENDAR_DATABASE[series.id] = series
+            CALENDAR_INDEX.add(series)
+            result = {
+                "success": True,
+                "message": f"已取消「{occurrence['title']}」{occurrence['date']} 的場次"
+            }
+            cancelled = close_linked_reminders("event", event_id)
+            if cancelled:
+                result["reminders_updated"] = cancelled
+            return result
+    
     if event_id not in CALENDAR_DATABASE:
         return {
             "success": False,
@@ -213,11 +455,16 @@ def delete_event(event_id: str) -> Dict:
         }
     
     event = CALENDAR_DATABASE.pop(event_id)
+    CALENDAR_INDEX.remove(event_id)
     
-    return {
+    result = {
         "success": True,
-        "message": f"已刪除事件「{event['title']}」"
+        "message": f"已刪除事件「{event.title}」"
     }
+    cancelled = close_linked_reminders("event", event_id, include_occurrences=bool(event.recurrence))
+    if cancelled:
+        result["reminders_updated"] = cancelled
+    return result
 
 
 def get_today_schedule() -> Dict:
@@ -245,22 +492,206 @@ def check_time_conflict(date: str, start_time: str, end_time: str) -> Dict:
     """
     conflicts = []
     
-    for event in CALENDAR_DATABASE.values():
-        if event["date"] != date:
-            continue
-        
-        # 檢查時間重疊
-        evt_start = event["start_time"]
-        evt_end = event["end_time"]
-        
-        if not (end_time <= evt_start or start_time >= evt_end):
-            conflicts.append({
-                "event_id": event["id"],
-                "title": event["title"],
-                "time": f"{evt_start}-{evt_end}"
-            })
+    start = parse_time(start_time)
+    end = parse_time(end_time)
+    if start is None or end is None:
+        return {
+            "has_conflict": False,
+            "conflicts": [],
+            "message": f"時間格式錯誤: {start_time}-{end_time} (格式: HH:MM)"
+        }
+    
+    # 先以佔用點陣圖判斷，空閒時不必建立衝突清單
+    if CALENDAR_INDEX.is_free(date, start, end):
+        return {
+            "has_conflict": False,
+            "conflicts": []
+        }
+    
+    # 透過區間索引只檢查可能重疊的事件
+    for event_id in CALENDAR_INDEX.overlapping(date, start, end):
+        event = get_event_record(event_id)
+        conflicts.append({
+            "event_id": event["id"],
+            "title": event["title"],
+            "time": f"{event['start_time']}-{event['end_time']}"
+        })
     
     return {
         "has_conflict": len(conflicts) > 0,
         "conflicts": conflicts
+    }
+
+
+def check_slots_available(date: str, slots: List[str]) -> Dict:
+    """
+    一次檢查同一天多個候選時段是否空閒
+    
+    Args:
+        date: 日期 (格式: YYYY-MM-DD)
+        slots: 候選時段清單 (格式: HH:MM-HH:MM)
+    
+    Returns:
+        各候選時段的空閒結果
+    
+    Example:
+        check_slots_available("2024-12-05", ["09:00-10:00", "13:30-14:30"])
+    """
+    parsed = []
+    invalid = []
+    for slot in slots:
+        start_time, _, end_time = slot.partition("-")
+        start = parse_time(start_time.strip())
+        end = parse_time(end_time.strip())
+        if start is None or end is None:
+            invalid.append(slot)
+        else:
+            parsed.append((slot, start, end))
+    
+    free = CALENDAR_INDEX.are_free(date, [(start, end) for _, start, end in parsed])
+    available = [slot for (slot, _, _), ok in zip(parsed, free) if ok]
+    
+    result = {
+        "success": True,
+        "date": date,
+        "available": available,
+        "unavailable": [slot for (slot, _, _), ok in zip(parsed, free) if not ok]
+    }
+    if invalid:
+        result["invalid"] = invalid
+    return result
+
+
+@memoize(CALENDAR_DATABASE)
+def find_free_slots(
+    start_date: str,
+    end_date: Optional[str] = None,
+    min_duration_minutes: int = 60
+) -> Dict:
+    """
+    查詢日期範圍內工作時間中的空閒時段
+    
+    依 Settings.WORK_START_HOUR / WORK_END_HOUR 限定工作時間，
+    對每天已排序的忙碌區間做一次合併掃描找出空檔。
+    
+    Args:
+        start_date: 起始日期 (格式: YYYY-MM-DD)
+        end_date: 結束日期 (選填，預設與起始日期相同)
+        min_duration_minutes: 最短空閒長度 (分鐘)，預設 60
+    
+    Returns:
+        空閒時段清單
+    
+    Example:
+        find_free_slots("2024-12-02", "2024-12-06", 120)  # 本週可排入 2 小時的空檔
+    """
+    end_date = end_date or start_date
+    try:
+        current = datetime.strptime(start_date, "%Y-%m-%d")
+        last = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {start_date} ~ {end_date} (格式: YYYY-MM-DD)"
+        }
+    
+    if last < current:
+        return {
+            "success": False,
+            "message": "結束日期不可早於起始日期"
+        }
+    
+    work_start = Settings.WORK_START_HOUR * 60
+    work_end = Settings.WORK_END_HOUR * 60
+    min_length = max(int(min_duration_minutes), 1)
+    
+    free_slots = []
+    while current <= last:
+        date = current.strftime("%Y-%m-%d")
+        for start, end in CALENDAR_INDEX.free_windows(date, work_start, work_end, min_length):
+            free_slots.append({
+                "date": date,
+                "start_time": format_time(start),
+                "end_time": format_time(end),
+                "duration_minutes": end - start
+            })
+        current += timedelta(days=1)
+    
+    return {
+        "success": True,
+        "count": len(free_slots),
+        "total_free_minutes": sum(slot["duration_minutes"] for slot in free_slots),
+        "free_slots": free_slots,
+        "message": f"{start_date} ~ {end_date} 共有 {len(free_slots)} 個至少 {min_length} 分鐘的空檔"
+    }
+
+
+def check_time_conflicts_batch(proposals: List[Dict]) -> Dict:
+    """
+    批次檢查多個提案時段的時間衝突
+    
+    依日期分組後，每個日期只做一次掃描線比對，
+    同時回報與既有事件的衝突以及提案彼此之間的衝突。
+    
+    Args:
+        proposals: 提案清單，每筆包含 date、start_time、end_time (選填 label)
+    
+    Returns:
+        每個提案的衝突檢查結果
+    
+    Example:
+        check_time_conflicts_batch([
+            {"date": "2024-12-05", "start_time": "10:00", "end_time": "11:00"},
+            {"date": "2024-12-05", "start_time": "10:30", "end_time": "12:00", "label": "TSK-001"}
+        ])
+    """
+    results = []
+    by_date: Dict[str, List] = {}
+    
+    for index, proposal in enumerate(proposals):
+        date = proposal.get("date", "")
+        start_time = proposal.get("start_time", "")
+        end_time = proposal.get("end_time", "")
+        result = {
+            "index": index,
+            "date": date,
+            "start_time": start_time,
+            "end_time": end_time,
+            "has_conflict": False,
+            "conflicts": [],
+            "conflicting_proposals": []
+        }
+        if proposal.get("label"):
+            result["label"] = proposal["label"]
+        results.append(result)
+        
+        start = parse_time(start_time)
+        end = parse_time(end_time)
+        if start is None or end is None or not date:
+            result["message"] = "日期或時間格式錯誤 (格式: YYYY-MM-DD, HH:MM)"
+            continue
+        by_date.setdefault(date, []).append((start, end, index))
+    
+    for date, items in by_date.items():
+        event_conflicts, proposal_conflicts = CALENDAR_INDEX.sweep_conflicts(date, items)
+        for _, _, index in items:
+            result = results[index]
+            for event_id in event_conflicts[index]:
+                event = get_event_record(event_id)
+                result["conflicts"].append({
+                    "event_id": event["id"],
+                    "title": event["title"],
+                    "time": f"{event['start_time']}-{event['end_time']}"
+                })
+            result["conflicting_proposals"] = sorted(proposal_conflicts[index])
+            result["has_conflict"] = bool(result["conflicts"] or result["conflicting_proposals"])
+    
+    conflict_count = sum(1 for result in results if result["has_conflict"])
+    
+    return {
+        "success": True,
+        "count": len(results),
+        "conflict_count": conflict_count,
+        "results": results,
+        "message": f"{len(results)} 個提案中有 {conflict_count} 個發生衝突"
     }
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""資料紀錄型別
+事件、任務、提醒以 __slots__ 類別保存: 日期存為整數日序 (date.toordinal)，
+時間存為分鐘數，優先級存為排序值，寫入時解析一次；
+工具回傳結果時才以 to_dict() 轉回原本的 dict 格式。
+
+為了與既有程式相容，紀錄仍可用原本的欄位名稱讀寫 (例如 record["date"])，
+此時才在字串與整數之間轉換；熱路徑直接使用整數屬性比較。
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from datetime import date as Date, datetime
+import sys
+
+MINUTES_PER_DAY = 24 * 60
+
+PRIORITIES = ("urgent", "high", "medium", "low")
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITIES)}
+
+# 未設定截止日的任務排在最後
+NO_DUE_DAY = sys.maxsize
+
+
+def day_number(value: Optional[str]) -> Optional[int]:
+    """將 "YYYY-MM-DD" 轉換為整數日序；空值或格式錯誤時回傳 None"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def day_string(day: Optional[int]) -> Optional[str]:
+    """將整數日序轉回 "YYYY-MM-DD" """
+    if day is None:
+        return None
+    return Date.fromordinal(day).isoformat()
+
+
+def today_number() -> int:
+    """取得今天的整數日序"""
+    return Date.today().toordinal()
+
+
+def time_minutes(value: Optional[str]) -> Optional[int]:
+    """將 "HH:MM" 轉換為當日分鐘數；格式錯誤時回傳 None (允許 24:00)"""
+    try:
+        hour, minute = value.split(":")
+        minutes = int(hour) * 60 + int(minute)
+    except (AttributeError, ValueError):
+        return None
+    if not 0 <= minutes <= MINUTES_PER_DAY or not 0 <= int(minute) < 60:
+        return None
+    return minutes
+
+
+def time_string(minutes: Optional[int]) -> Optional[str]:
+    """將當日分鐘數轉回 "HH:MM" """
+    if minutes is None:
+        return None
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def stamp_minutes(value: Optional[str]) -> Optional[int]:
+    """將 "YYYY-MM-DD HH:MM" 轉換為分鐘戳記 (日序 × 1440 + 當日分鐘)；格式錯誤時回傳 None"""
+    if not value:
+        return None
+    day, _, clock = value.strip().partition(" ")
+    day = day_number(day)
+    minutes = time_minutes(clock)
+    if day is None or minutes is None or minutes == MINUTES_PER_DAY:
+        return None
+    return day * MINUTES_PER_DAY + minutes
+
+
+def stamp_string(stamp: Optional[int]) -> Optional[str]:
+    """將分鐘戳記轉回 "YYYY-MM-DD HH:MM" """
+    if stamp is None:
+        return None
+    day, minutes = divmod(stamp, MINUTES_PER_DAY)
+    return f"{day_string(day)} {time_string(minutes)}"
+
+
+def stamp_datetime(stamp: int) -> datetime:
+    """將分鐘戳記轉換為 datetime"""
+    day, minutes = divmod(stamp, MINUTES_PER_DAY)
+    value = Date.fromordinal(day)
+    return datetime(value.year, value.month, value.day, minutes // 60, minutes % 60)
+
+
+def now_minutes() -> int:
+    """取得目前時間的分鐘戳記"""
+    now = datetime.now()
+    return now.toordinal() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+
+def _priority_rank(value: Any) -> int:
+    return PRIORITY_RANK.get(str(value).lower(), PRIORITY_RANK["medium"])
+
+
+def _priority_name(rank: int) -> str:
+    return PRIORITIES[rank]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Record:
+    """
+    紀錄基底類別
+
+    子類別定義:
+    - __slots__: 實際儲存的屬性
+    - _FIELDS: 轉回 dict 時的欄位順序
+    - _CONVERTED: dict 欄位 → (屬性名稱, 屬性轉欄位, 欄位轉屬性)
+    - _OPTIONAL: 值為 None 時不輸出的欄位
+    """
+
+    __slots__ = ("extra",)
+
+    _FIELDS: Tuple[str, ...] = ()
+    _CONVERTED: Dict[str, Tuple[str, Callable, Callable]] = {}
+    _OPTIONAL: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "_Record":
+        """由原本的 dict 格式建立紀錄 (解析一次)"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, None)
+        record.extra = None
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    def to_dict(self) -> Dict:
+        """轉回原本的 dict 格式"""
+        result = {}
+        for key in self._FIELDS:
+            value = self[key]
+            if value is None and key in self._OPTIONAL:
+                continue
+            result[key] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    def __getitem__(self, key: str) -> Any:
+        converted = self._CONVERTED.get(key)
+        if converted is not None:
+            return converted[1](getattr(self, converted[0]))
+        if key in self._FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        converted = self._CONVERTED.get(key)
+        if converted is not None:
+            setattr(self, converted[0], converted[2](value))
+        elif key in self._FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            value = self[key]
+        except KeyError:
+            return False
+        return value is not None or key not in self._OPTIONAL
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None and key in self._OPTIONAL else value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class EventRecord(_Record):
+    """日程事件 (day: 日序，start/end: 當日分鐘數)"""
+
+    __slots__ = (
+        "id", "title", "day", "start", "end", "location", "description",
+        "recurrence", "exceptions", "created_at", "updated_at"
+    )
+
+    _FIELDS = (
+        "id", "title", "date", "start_time", "end_time", "location", "description",
+        "recurrence", "exceptions", "created_at", "updated_at"
+    )
+    _CONVERTED = {
+        "date": ("day", day_string, day_number),
+        "start_time": ("start", time_string, time_minutes),
+        "end_time": ("end", time_string, time_minutes),
+    }
+    _OPTIONAL = ("recurrence", "exceptions", "created_at", "updated_at")
+
+
+class TaskRecord(_Record):
+    """任務 (priority_rank: 0=urgent … 3=low，due_day: 日序)"""
+
+    __slots__ = (
+        "id", "title", "description", "priority_rank", "status", "due_day",
+        "estimated_hours", "tags", "created_at", "updated_at", "completed_at"
+    )
+
+    _FIELDS = (
+        "id", "title", "description", "priority", "status", "due_date",
+        "estimated_hours", "tags", "created_at", "updated_at", "completed_at"
+    )
+    _CONVERTED = {
+        "priority": ("priority_rank", _priority_name, _priority_rank),
+        "status": ("status", _intern, _intern),
+        "due_date": ("due_day", day_string, day_number),
+    }
+    _OPTIONAL = ("created_at", "updated_at", "completed_at")
+
+
+class ReminderRecord(_Record):
+    """提醒 (fire_at: 分鐘戳記)"""
+
+    __slots__ = (
+        "id", "title", "fire_at", "related_type", "related_id", "status",
+        "created_at", "completed_at", "delivered_at"
+    )
+
+    _FIELDS = (
+        "id", "title", "reminder_time", "related_type", "related_id", "status",
+        "created_at", "completed_at", "delivered_at"
+    )
+    _CONVERTED = {
+        "reminder_time": ("fire_at", stamp_string, stamp_minutes),
+        "status": ("status", _intern, _intern),
+    }
+    _OPTIONAL = ("created_at", "completed_at", "delivered_at")
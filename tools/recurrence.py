@@ -0,0 +1,234 @@
+"""週期性事件規則
+以規則描述週期事件 (每日/每週/每月，可設定次數、結束日期與例外)，
+只在查詢視窗內以產生器逐一展開場次，不預先建立每一筆事件。
+"""
+from typing import Dict, Iterator, Optional, Tuple
+from datetime import date as Date, datetime, timedelta
+import calendar
+
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+# 單一場次可覆寫的欄位
+OVERRIDE_FIELDS = ("title", "start_time", "end_time", "location", "description")
+
+# 每月規則在日期大於 28 時可能跳過某些月份
+_ALWAYS_VALID_DAY = 28
+
+
+def parse_date(value: str) -> Date:
+    """將 "YYYY-MM-DD" 轉換為 date (格式錯誤時拋出 ValueError)"""
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def build_rule(
+    freq: str,
+    interval: int = 1,
+    count: Optional[int] = None,
+    until: Optional[str] = None
+) -> Dict:
+    """
+    建立週期規則
+
+    Args:
+        freq: 週期 (daily/weekly/monthly)
+        interval: 間隔，預設 1 (例如 weekly + 2 代表隔週)
+        count: 總場次數 (選填)
+        until: 最後日期 (格式: YYYY-MM-DD，選填)
+
+    Returns:
+        週期規則
+
+    Raises:
+        ValueError: 規則內容不合法
+    """
+    freq = str(freq or "").lower()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"不支援的週期 {freq}，可用: {'/'.join(FREQUENCIES)}")
+    # 工具參數可能是 None 或非數字字串，一律轉成 ValueError 交給呼叫端回報
+    try:
+        interval = int(interval)
+    except (TypeError, ValueError):
+        raise ValueError(f"間隔必須是整數: {interval}") from None
+    if interval < 1:
+        raise ValueError("間隔必須大於 0")
+    if count is not None:
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            raise ValueError(f"場次數必須是整數: {count}") from None
+        if count < 1:
+            raise ValueError("場次數必須大於 0")
+    if until:
+        try:
+            parse_date(until)
+        except (TypeError, ValueError):
+            raise ValueError(f"最後日期格式錯誤: {until} (格式: YYYY-MM-DD)") from None
+
+    return {
+        "freq": freq,
+        "interval": interval,
+        "count": count,
+        "until": until or None
+    }
+
+
+def occurrence_id(series_id: str, day: str) -> str:
+    """組合單一場次的 ID (例如 EVT-ABC123@2024-12-05)"""
+    return f"{series_id}@{day}"
+
+
+def split_occurrence_id(event_id: str) -> Optional[Tuple[str, str]]:
+    """拆解場次 ID 為 (週期事件 ID, 日期)，不是場次 ID 時回傳 None"""
+    series_id, sep, day = event_id.partition("@")
+    if not sep or not series_id or not day:
+        return None
+    return series_id, day
+
+
+def _add_months(day: Date, months: int) -> Optional[Date]:
+    """往後推算月份，該月沒有相同日期時回傳 None"""
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    if day.day > calendar.monthrange(year, month)[1]:
+        return None
+    return Date(year, month, day.day)
+
+
+def iter_occurrence_dates(
+    series: Dict,
+    window_start: Date,
+    window_end: Date
+) -> Iterator[Date]:
+    """
+    逐一產生週期事件落在 [window_start, window_end] 內的日期 (不套用例外)
+
+    直接跳到視窗內第一個可能的場次，不從頭展開。
+    """
+    rule = series["recurrence"]
+    first = parse_date(series["date"])
+    count = rule["count"]
+    interval = rule["interval"]
+    if rule["until"]:
+        window_end = min(window_end, parse_date(rule["until"]))
+    window_start = max(window_start, first)
+    if window_end < window_start:
+        return
+
+    if rule["freq"] in ("daily", "weekly"):
+        step = interval * (7 if rule["freq"] == "weekly" else 1)
+        k = -(-(window_start - first).days // step)
+        day = first + timedelta(days=k * step)
+        while day <= window_end and (count is None or k < count):
+            yield day
+            k += 1
+            day += timedelta(days=step)
+        return
+
+    # monthly
+    months = (window_start.year - first.year) * 12 + window_start.month - first.month
+    k = max(months // interval, 0)
+    if count is None or first.day <= _ALWAYS_VALID_DAY:
+        seen = k
+    else:
+        # 日期可能不存在的月份不計入場次，需從頭計算已發生的場次數
+        seen = sum(1 for i in range(k) if _add_months(first, i * interval))
+    while True:
+        day = _add_months(first, k * interval)
+        k += 1
+        if day is None:
+            if _add_months(first.replace(day=1), (k - 1) * interval) > window_end:
+                return
+            continue
+        if day > window_end or (count is not None and seen >= count):
+            return
+        seen += 1
+        if day >= window_start:
+            yield day
+
+
+def last_occurrence(series: Dict) -> Optional[Date]:
+    """取得週期事件最後場次日期的上限；無限期時回傳 None"""
+    rule = series["recurrence"]
+    first = parse_date(series["date"])
+    until = parse_date(rule["until"]) if rule["until"] else None
+    if rule["count"] is None:
+        return until
+
+    if rule["freq"] in ("daily", "weekly"):
+        step = rule["interval"] * (7 if rule["freq"] == "weekly" else 1)
+        last = first + timedelta(days=(rule["count"] - 1) * step)
+    else:
+        last = first
+        seen = 0
+        k = 0
+        while seen < rule["count"]:
+            day = _add_months(first, k * rule["interval"])
+            if day is not None:
+                last = day
+                seen += 1
+            k += 1
+    return min(last, until) if until else last
+
+
+def occurs_on(series: Dict, day: str) -> bool:
+    """判斷週期事件在特定日期是否有場次 (不套用例外)"""
+    try:
+        target = parse_date(day)
+    except ValueError:
+        return False
+    return next(iter_occurrence_dates(series, target, target), None) is not None
+
+
+def make_occurrence(series: Dict, day: str) -> Optional[Dict]:
+    """
+    建立單一場次的事件資料
+
+    Args:
+        series: 週期事件
+        day: 場次日期 (格式: YYYY-MM-DD)
+
+    Returns:
+        套用例外覆寫後的場次；該日沒有場次或已取消時回傳 None
+    """
+    if not occurs_on(series, day):
+        return None
+    return _materialize(series, day)
+
+
+def _materialize(series: Dict, day: str) -> Optional[Dict]:
+    """依週期事件與例外建立場次 (呼叫端需確認該日確實有場次)"""
+    exception = series.get("exceptions", {}).get(day, {})
+    if exception.get("cancelled"):
+        return None
+
+    occurrence = {
+        "id": occurrence_id(series["id"], day),
+        "series_id": series["id"],
+        "title": series["title"],
+        "date": day,
+        "start_time": series["start_time"],
+        "end_time": series["end_time"],
+        "location": series.get("location", ""),
+        "description": series.get("description", ""),
+        "recurring": True
+    }
+    for field in OVERRIDE_FIELDS:
+        if field in exception:
+            occurrence[field] = exception[field]
+    return occurrence
+
+
+def expand(series: Dict, window_start: str, window_end: str) -> Iterator[Dict]:
+    """
+    以產生器展開週期事件在視窗內的場次 (已套用例外)
+
+    Args:
+        series: 週期事件
+        window_start: 起始日期 (格式: YYYY-MM-DD)
+        window_end: 結束日期 (格式: YYYY-MM-DD)
+    """
+    for day in iter_occurrence_dates(series, parse_date(window_start), parse_date(window_end)):
+        occurrence = _materialize(series, day.isoformat())
+        if occurrence is not None:
+            yield occurrence
@@ -0,0 +1,106 @@
+"""提醒關聯索引
+由關聯項目 (related_type, related_id) 反查提醒 ID，
+讓事件改期/刪除、任務改截止日/完成時，只需處理關聯的 k 筆提醒，
+不必掃描整個 REMINDERS_DATABASE。
+週期場次 (EVT-XXX@YYYY-MM-DD) 與所屬週期事件放在同一組，
+刪除整個系列時可一併找到各場次的提醒。
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+
+from tools.records import ReminderRecord
+
+_Key = Tuple[str, str]
+
+
+def _link_key(related_type: str, related_id: str) -> _Key:
+    """場次 ID 歸入所屬週期事件"""
+    return related_type, related_id.partition("@")[0]
+
+
+class ReminderLinks:
+    """
+    關聯項目 → 提醒 ID 的反向索引
+
+    索引只記錄關聯，不判斷提醒狀態；呼叫端取出提醒後再依狀態篩選。
+    """
+
+    def __init__(self):
+        self._links: Dict[_Key, Dict[str, None]] = {}
+        self._keys: Dict[str, _Key] = {}
+        self._loader: Optional[Callable[[], Iterable[ReminderRecord]]] = None
+        self._load_lock = threading.RLock()
+        self._loading = False
+
+    def load_lazily(self, loader: Callable[[], Iterable[ReminderRecord]]):
+        """
+        延後建立索引到第一次使用時
+
+        Args:
+            loader: 回傳所有提醒的函式
+        """
+        self._loader = loader
+
+    def _load(self):
+        # 查詢可能在多個執行緒同時發生 (direct_query_agent)，建立期間其他執行緒需等待，
+        # 不可讀到空的或建立到一半的索引；建立中的執行緒重入時 (rebuild → add) 直接返回
+        if self._loader is None and not self._loading:
+            return
+        with self._load_lock:
+            loader = self._loader
+            if loader is None or self._loading:
+                return
+            self._loading = True
+            try:
+                self.rebuild(loader())
+            finally:
+                self._loading = False
+
+    def rebuild(self, reminders: Iterable[ReminderRecord]):
+        """依現有提醒重建索引"""
+        self._loader = None
+        self._links.clear()
+        self._keys.clear()
+        for reminder in reminders:
+            self.add(reminder)
+
+    def add(self, reminder: ReminderRecord):
+        """加入或更新提醒的關聯 (關聯改變時移出舊的分組)"""
+        self._load()
+        key = None
+        if reminder.related_type and reminder.related_id:
+            key = _link_key(reminder.related_type, reminder.related_id)
+
+        previous = self._keys.get(reminder.id)
+        if previous == key:
+            return
+        if previous is not None:
+            self.remove(reminder.id)
+        if key is not None:
+            self._links.setdefault(key, {})[reminder.id] = None
+            self._keys[reminder.id] = key
+
+    def remove(self, reminder_id: str):
+        """移除提醒的關聯"""
+        self._load()
+        key = self._keys.pop(reminder_id, None)
+        if key is None:
+            return
+        group = self._links[key]
+        group.pop(reminder_id, None)
+        if not group:
+            del self._links[key]
+
+    def reminder_ids(self, related_type: str, related_id: str) -> List[str]:
+        """
+        取得關聯項目 (或其所屬週期事件) 的提醒 ID
+
+        Args:
+            related_type: 關聯類型 (event/task)
+            related_id: 關聯 ID
+
+        Returns:
+            提醒 ID 清單 (可能包含同一系列其他場次的提醒)
+        """
+        self._load()
+        return list(self._links.get(_link_key(related_type, related_id), ()))
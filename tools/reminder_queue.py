@@ -0,0 +1,240 @@
+"""提醒佇列
+以最小堆積依提醒時間 (分鐘戳記) 排序 active 提醒，
+「未來 N 小時內的提醒」只需從堆頂向下走訪落在範圍內的節點，
+不必掃描整個 REMINDERS_DATABASE。
+取消、完成或改時間時採延遲刪除: 只將舊項目標記為失效，
+走訪到時再略過，失效項目過多時才整理堆積。
+到期的提醒由派送服務以 pop_due 取出 (services/reminder_dispatcher.py)。
+另外以依時間排序的清單保存所有 active 項目，
+「某一天的提醒」以 between 二分搜尋定位，不必走訪這一天之前的提醒。
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import bisect
+import heapq
+import itertools
+import threading
+
+from tools.records import ReminderRecord
+
+# 堆積項目: (提醒時間, 序號, 提醒 ID)，序號用來區分同一提醒的新舊項目
+_Entry = Tuple[int, int, str]
+
+
+class ReminderQueue:
+    """
+    active 提醒的時間佇列
+
+    - 每個提醒在 _live 中只對應一個有效的堆積項目
+    - _sorted 依時間排序保存 _live 與 _overdue 的所有項目，供 between 範圍查詢
+    - 查詢時已過時間但尚未派送的提醒移到 _overdue，等待 pop_due 取出
+    - push/discard 由 set_reminder/cancel_reminder/complete_reminder 同步維護
+    - 最早提醒時間提前時通知監聽者 (派送服務藉此提早醒來)
+    """
+
+    # 失效項目超過有效項目數量 (加上此值) 時整理堆積
+    COMPACT_SLACK = 64
+
+    def __init__(self):
+        self._heap: List[_Entry] = []
+        self._live: Dict[str, _Entry] = {}
+        self._overdue: Dict[str, _Entry] = {}
+        self._sorted: List[_Entry] = []
+        self._listeners: List[Callable[[], None]] = []
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self._loader: Optional[Callable[[], Iterable[ReminderRecord]]] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._load()
+            return len(self._live) + len(self._overdue)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        with self._lock:
+            self._load()
+            return reminder_id in self._live or reminder_id in self._overdue
+
+    def add_listener(self, listener: Callable[[], None]):
+        """
+        註冊最早提醒時間提前時的通知函式
+
+        通知可能在任何執行緒發出，監聽者需自行切回所屬的事件迴圈。
+        """
+        self._listeners.append(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
+
+    def load_lazily(self, loader: Callable[[], Iterable[ReminderRecord]]):
+        """
+        延後建立佇列到第一次使用時
+
+        Args:
+            loader: 回傳所有提醒的函式
+        """
+        self._loader = loader
+
+    def _load(self):
+        # 在 _lock 內建立，其他執行緒的查詢會等待建立完成
+        with self._lock:
+            if self._loader is not None:
+                loader, self._loader = self._loader, None
+                self.rebuild(loader())
+
+    def rebuild(self, reminders: Iterable[ReminderRecord]):
+        """依現有提醒重建佇列"""
+        with self._lock:
+            self._loader = None
+            self._live.clear()
+            self._overdue.clear()
+            for reminder in reminders:
+                if reminder.status == "active" and reminder.fire_at is not None:
+                    self._live[reminder.id] = (reminder.fire_at, next(self._counter), reminder.id)
+            self._heap = list(self._live.values())
+            heapq.heapify(self._heap)
+            self._sorted = sorted(self._heap)
+            self._notify()
+
+    def push(self, reminder: ReminderRecord):
+        """
+        加入或更新提醒 (非 active 或沒有時間的提醒會被移出佇列)
+        """
+        with self._lock:
+            self._load()
+            if reminder.status != "active" or reminder.fire_at is None:
+                self._forget(reminder.id)
+                return
+
+            current = self._live.get(reminder.id)
+            if current is not None and current[0] == reminder.fire_at:
+                return
+            self._forget(reminder.id)
+            entry = (reminder.fire_at, next(self._counter), reminder.id)
+            self._live[reminder.id] = entry
+            heapq.heappush(self._heap, entry)
+            bisect.insort(self._sorted, entry)
+            self._compact_if_needed()
+            if self._heap[0] is entry:
+                self._notify()
+
+    def discard(self, reminder_id: str):
+        """將提醒移出佇列 (堆積中的舊項目留待走訪時略過)"""
+        with self._lock:
+            self._load()
+            if self._forget(reminder_id):
+                self._compact_if_needed()
+
+    def _forget(self, reminder_id: str) -> bool:
+        """將提醒自 _live/_overdue/_sorted 移除 (堆積中的舊項目留待走訪時略過)，回傳是否原本在 _live 中"""
+        entry = self._overdue.pop(reminder_id, None)
+        live = self._live.pop(reminder_id, None)
+        for removed in (entry, live):
+            if removed is not None:
+                self._unsort(removed)
+        return live is not None
+
+    def _unsort(self, entry: _Entry):
+        position = bisect.bisect_left(self._sorted, entry)
+        if position < len(self._sorted) and self._sorted[position] == entry:
+            del self._sorted[position]
+
+    def upcoming(self, start: int, cutoff: int) -> List[str]:
+        """
+        取得提醒時間在 [start, cutoff] 內的提醒 ID (依時間排序)
+
+        早於 start 的項目已不可能再出現在查詢結果中，自堆頂移到 _overdue；
+        其餘只走訪時間不超過 cutoff 的節點，成本與結果數量成正比。
+
+        Args:
+            start: 起始分鐘戳記
+            cutoff: 結束分鐘戳記
+
+        Returns:
+            提醒 ID 清單
+        """
+        with self._lock:
+            self._load()
+            heap = self._heap
+            while heap and (heap[0][0] < start or self._live.get(heap[0][2]) is not heap[0]):
+                entry = heapq.heappop(heap)
+                if self._live.get(entry[2]) is entry:
+                    del self._live[entry[2]]
+                    self._overdue[entry[2]] = entry
+
+            results = []
+            frontier = [(heap[0], 0)] if heap and heap[0][0] <= cutoff else []
+            while frontier:
+                entry, position = heapq.heappop(frontier)
+                if self._live.get(entry[2]) is entry:
+                    results.append(entry[2])
+                for child in (2 * position + 1, 2 * position + 2):
+                    if child < len(heap) and heap[child][0] <= cutoff:
+                        heapq.heappush(frontier, (heap[child], child))
+            return results
+
+    def between(self, start: int, end: int) -> List[str]:
+        """
+        取得提醒時間在 [start, end] 內的提醒 ID (依時間排序)
+
+        以二分搜尋定位範圍，成本與結果數量成正比，不會走訪 start 之前的提醒，
+        也不會改變佇列狀態 (適合查詢之後某一天的提醒)。
+
+        Args:
+            start: 起始分鐘戳記
+            end: 結束分鐘戳記
+
+        Returns:
+            提醒 ID 清單
+        """
+        with self._lock:
+            self._load()
+            entries = self._sorted
+            lo = bisect.bisect_left(entries, (start,))
+            hi = bisect.bisect_right(entries, (end, float("inf")))
+            return [entry[2] for entry in entries[lo:hi]]
+
+    def next_fire_at(self) -> Optional[int]:
+        """取得最早的提醒時間 (分鐘戳記)；佇列為空時回傳 None"""
+        with self._lock:
+            self._load()
+            if self._overdue:
+                return min(self._overdue.values())[0]
+            heap = self._heap
+            while heap and self._live.get(heap[0][2]) is not heap[0]:
+                heapq.heappop(heap)
+            return heap[0][0] if heap else None
+
+    def pop_due(self, now: int, limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """
+        取出提醒時間不晚於 now 的提醒 (依時間排序)
+
+        Args:
+            now: 目前的分鐘戳記
+            limit: 最多取出的數量 (選填)
+
+        Returns:
+            (提醒時間, 提醒 ID) 清單
+        """
+        with self._lock:
+            self._load()
+            due = [(entry[0], entry[2]) for entry in sorted(self._overdue.values())]
+            if limit is not None and len(due) > limit:
+                due = due[:limit]
+            for _, reminder_id in due:
+                self._unsort(self._overdue.pop(reminder_id))
+
+            heap = self._heap
+            while heap and heap[0][0] <= now and (limit is None or len(due) < limit):
+                entry = heapq.heappop(heap)
+                if self._live.get(entry[2]) is entry:
+                    del self._live[entry[2]]
+                    self._unsort(entry)
+                    due.append((entry[0], entry[2]))
+            return due
+
+    def _compact_if_needed(self):
+        """失效項目過多時，以有效項目重建堆積"""
+        if len(self._heap) > 2 * len(self._live) + self.COMPACT_SLACK:
+            self._heap = list(self._live.values())
+            heapq.heapify(self._heap)
@@ -5,32 +5,48 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import uuid
 
-# 模擬提醒資料庫
-REMINDERS_DATABASE = {}
+from storage.factory import open_table
+from tools.cache import memoize
+from tools.reminder_links import ReminderLinks
+from tools.reminder_queue import ReminderQueue
+from tools.records import MINUTES_PER_DAY, ReminderRecord, day_number, now_minutes, stamp_datetime, stamp_minutes
+
+# 提醒資料庫 (儲存後端由 Settings.STORAGE_BACKEND 決定)
+REMINDERS_DATABASE = open_table("reminders", ReminderRecord)
 
 # 初始化示範資料
 def _init_sample_reminders():
     now = datetime.now()
     today = now.strftime("%Y-%m-%d")
     
-    REMINDERS_DATABASE["REM-001"] = {
+    REMINDERS_DATABASE["REM-001"] = ReminderRecord.from_dict({
         "id": "REM-001",
         "title": "準備會議資料",
         "reminder_time": f"{today} 09:30",
         "related_type": "event",
         "related_id": "EVT-001",
         "status": "active"
-    }
-    REMINDERS_DATABASE["REM-002"] = {
+    })
+    REMINDERS_DATABASE["REM-002"] = ReminderRecord.from_dict({
         "id": "REM-002",
         "title": "專案報告截止",
         "reminder_time": f"{today} 17:00",
         "related_type": "task",
         "related_id": "TSK-001",
         "status": "active"
-    }
+    })
+
+if not REMINDERS_DATABASE:
+    _init_sample_reminders()
 
-_init_sample_reminders()
+# 依提醒時間排序的 active 提醒佇列 (第一次查詢時才載入)
+REMINDER_QUEUE = ReminderQueue()
+# 只載入 active 提醒 (sqlite 後端以 status 索引篩選，不解碼已派送/完成的提醒)
+REMINDER_QUEUE.load_lazily(lambda: REMINDERS_DATABASE.select(status="active"))
+
+# 關聯項目 → 提醒的反向索引 (事件/任務變更時連動調整提醒)
+REMINDER_LINKS = ReminderLinks()
+REMINDER_LINKS.load_lazily(REMINDERS_DATABASE.values)
 
 
 def set_reminder(
@@ -54,9 +70,15 @@ def set_reminder(
     Example:
         set_reminder("準備開會", "2024-12-05 09:30", "event", "EVT-001")
     """
+    if stamp_minutes(reminder_time) is None:
+        return {
+            "success": False,
+            "message": f"時間格式錯誤: {reminder_time} (格式: YYYY-MM-DD HH:MM)"
+        }
+    
     reminder_id = f"REM-{uuid.uuid4().hex[:6].upper()}"
     
-    reminder = {
+    reminder = ReminderRecord.from_dict({
         "id": reminder_id,
         "title": title,
         "reminder_time": reminder_time,
@@ -64,9 +86,11 @@ def set_reminder(
         "related_id": related_id,
         "status": "active",
         "created_at": datetime.now().isoformat()
-    }
+    })
     
     REMINDERS_DATABASE[reminder_id] = reminder
+    REMINDER_QUEUE.push(reminder)
+    REMINDER_LINKS.add(reminder)
     
     return {
         "success": True,
@@ -75,6 +99,7 @@ def set_reminder(
     }
 
 
+@memoize(REMINDERS_DATABASE)
 def list_reminders(
     status: str = "active",
     date: Optional[str] = None
@@ -83,32 +108,34 @@ def list_reminders(
     列出提醒清單
     
     Args:
-        status: 篩選狀態 (active/completed/cancelled)
+        status: 篩選狀態 (active/delivered/completed/cancelled)
         date: 篩選日期 (格式: YYYY-MM-DD)
     
     Returns:
         提醒清單
     """
     results = []
+    day = day_number(date) if date else None
+    if date and day is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {date} (格式: YYYY-MM-DD)"
+        }
     
-    for reminder in REMINDERS_DATABASE.values():
-        if reminder["status"] != status:
+    # 狀態條件交由儲存後端篩選 (SQLite 會使用欄位索引)
+    for reminder in REMINDERS_DATABASE.select(status=status):
+        if day is not None and reminder.fire_at // MINUTES_PER_DAY != day:
             continue
         
-        if date:
-            reminder_date = reminder["reminder_time"].split(" ")[0]
-            if reminder_date != date:
-                continue
-        
         results.append(reminder)
     
     # 按時間排序
-    results.sort(key=lambda x: x["reminder_time"])
+    results.sort(key=lambda x: x.fire_at)
     
     return {
         "success": True,
         "count": len(results),
-        "reminders": results
+        "reminders": [reminder.to_dict() for reminder in results]
     }
 
 
@@ -129,11 +156,13 @@ def cancel_reminder(reminder_id: str) -> Dict:
         }
     
     reminder = REMINDERS_DATABASE[reminder_id]
-    reminder["status"] = "cancelled"
+    reminder.status = "cancelled"
+    REMINDERS_DATABASE[reminder_id] = reminder
+    REMINDER_QUEUE.discard(reminder_id)
     
     return {
         "success": True,
-        "message": f"已取消提醒「{reminder['title']}」"
+        "message": f"已取消提醒「{reminder.title}」"
     }
 
 
@@ -148,26 +177,23 @@ def get_upcoming_reminders(hours: int = 24) -> Dict:
         即將到來的提醒清單
     """
     now = datetime.now()
-    cutoff = now + timedelta(hours=hours)
-    
-    upcoming = []
+    # 由提醒佇列取得範圍內的提醒 (已依時間排序)，只對結果計算剩餘時間
+    start = now_minutes()
+    cutoff = start + int(hours * 60)
     
-    for reminder in REMINDERS_DATABASE.values():
-        if reminder["status"] != "active":
-            continue
-        
-        try:
-            reminder_dt = datetime.strptime(reminder["reminder_time"], "%Y-%m-%d %H:%M")
-            if now <= reminder_dt <= cutoff:
-                upcoming.append({
-                    **reminder,
-                    "time_until": str(reminder_dt - now).split(".")[0]
-                })
-        except ValueError:
-            continue
+    matched = [
+        REMINDERS_DATABASE[reminder_id]
+        for reminder_id in REMINDER_QUEUE.upcoming(start, cutoff)
+        if reminder_id in REMINDERS_DATABASE
+    ]
     
-    # 按時間排序
-    upcoming.sort(key=lambda x: x["reminder_time"])
+    upcoming = [
+        {
+            **reminder.to_dict(),
+            "time_until": str(max(stamp_datetime(reminder.fire_at) - now, timedelta(0))).split(".")[0]
+        }
+        for reminder in matched
+    ]
     
     return {
         "success": True,
@@ -194,10 +220,88 @@ def complete_reminder(reminder_id: str) -> Dict:
         }
     
     reminder = REMINDERS_DATABASE[reminder_id]
-    reminder["status"] = "completed"
-    reminder["completed_at"] = datetime.now().isoformat()
+    reminder.status = "completed"
+    reminder.completed_at = datetime.now().isoformat()
+    REMINDERS_DATABASE[reminder_id] = reminder
+    REMINDER_QUEUE.discard(reminder_id)
     
     return {
         "success": True,
-        "message": f"已完成提醒「{reminder['title']}」"
-    }
\ No newline at end of file
+        "message": f"已完成提醒「{reminder.title}」"
+    }
+
+
+def linked_reminders(
+    related_type: str,
+    related_id: str,
+    include_occurrences: bool = False
+) -> List[ReminderRecord]:
+    """
+    取得關聯到事件或任務的 active 提醒 (供 calendar_tools/task_tools 連動使用)
+    
+    Args:
+        related_type: 關聯類型 (event/task)
+        related_id: 關聯 ID
+        include_occurrences: 是否包含週期事件各場次的提醒
+    
+    Returns:
+        提醒清單
+    """
+    reminders = []
+    for reminder_id in REMINDER_LINKS.reminder_ids(related_type, related_id):
+        reminder = REMINDERS_DATABASE.get(reminder_id)
+        if reminder is None or reminder.status != "active":
+            continue
+        if reminder.related_id != related_id and not include_occurrences:
+            continue
+        reminders.append(reminder)
+    return reminders
+
+
+def shift_reminder(
+    reminder: ReminderRecord,
+    minutes: int,
+    related_id: Optional[str] = None
+):
+    """
+    將提醒時間前後移動，並可改為關聯到新的項目
+    
+    Args:
+        reminder: 提醒
+        minutes: 移動的分鐘數 (負值代表提前)
+        related_id: 新的關聯 ID (選填)
+    """
+    reminder.fire_at += minutes
+    if related_id:
+        reminder.related_id = related_id
+    REMINDERS_DATABASE[reminder.id] = reminder
+    REMINDER_QUEUE.push(reminder)
+    REMINDER_LINKS.add(reminder)
+
+
+def close_linked_reminders(
+    related_type: str,
+    related_id: str,
+    status: str = "cancelled",
+    include_occurrences: bool = False
+) -> int:
+    """
+    關聯項目刪除、完成或取消時，一併結束其 active 提醒
+    
+    Args:
+        related_type: 關聯類型 (event/task)
+        related_id: 關聯 ID
+        status: 提醒的新狀態 (cancelled/completed)
+        include_occurrences: 是否包含週期事件各場次的提醒
+    
+    Returns:
+        處理的提醒數量
+    """
+    reminders = linked_reminders(related_type, related_id, include_occurrences)
+    for reminder in reminders:
+        reminder.status = status
+        if status == "completed":
+            reminder.completed_at = datetime.now().isoformat()
+        REMINDERS_DATABASE[reminder.id] = reminder
+        REMINDER_QUEUE.discard(reminder.id)
+    return len(reminders)
@@ -0,0 +1,312 @@
+"""排程規劃引擎
+將未完成任務 (優先級、截止日、預估工時) 排入工作時間內的空檔，
+產生具體的時間區塊排程，不需透過 LLM 逐一調整任務。
+
+做法:
+- 把規劃期間內工作時間的空檔串成一條「可用時間軸」，任務依序填入
+  (一個人同時只做一件事，任務可跨空檔切成多個區塊)
+- 成本 = Σ 權重 × (完成位置 + LATE_PENALTY × 延遲分鐘)，
+  位置以可用時間軸上的分鐘數計算，高優先級任務越早完成越好、延遲代價越高
+- 先以截止日優先 (EDD) 與加權最短工時 (WSPT) 兩種貪婪排序取較佳者，
+  再以鄰近交換與短距離隨機交換的區域搜尋在時間預算內改善
+- compare_schedule_candidates 另外產生多個候選 (不同排序、限制每日工時、
+  提升過期任務優先級、延後 low 任務)，在行程池中平行評分後回傳最佳的幾個；
+  整體搜尋時間以 time_budget_ms 為上限，並在執行緒中等待結果，不阻塞事件迴圈
+  (提醒派送與其他代理照常執行)
+
+搜尋與評分的實作在 tools.schedule_search (不依賴資料表，可在子行程中執行)。
+"""
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import os
+import threading
+import time
+
+from config.settings import Settings
+from tools.calendar_tools import CALENDAR_INDEX
+from tools.records import PRIORITIES, day_number, day_string, time_string, today_number
+from tools.schedule_search import (
+    PRIORITY_WEIGHTS, PlanningProblem, SearchCancelled, candidate_specs, decode,
+    evaluate_candidates, plan_cost, search, warm_up
+)
+from tools.task_tools import TASK_INDEX, TASKS_DATABASE
+
+# 短於此長度的空檔不排入任務 (分鐘)
+MIN_BLOCK_MINUTES = 15
+# 回傳結果中最多列出的延遲/未排入任務數
+MAX_LISTED_TASKS = 50
+# 候選排程數量上限
+MAX_CANDIDATES = 32
+
+# 候選種類的說明
+CANDIDATE_LABELS = {
+    "search": "調整任務順序",
+    "daily_cap": "限制每日工時，超出的任務延後",
+    "promote_overdue": "提升過期任務的優先級",
+    "defer_low": "將規劃期間內不需完成的 low 任務延後"
+}
+
+
+def build_problem(start_day: int, days: int, start_minute: Optional[int] = None) -> PlanningProblem:
+    """
+    依目前的日程與未完成任務建立規劃問題
+
+    Args:
+        start_day: 起始日序
+        days: 規劃天數
+        start_minute: 起始日最早可排程的分鐘 (選填，預設為上班時間)
+    """
+    work_start = Settings.WORK_START_HOUR * 60
+    work_end = Settings.WORK_END_HOUR * 60
+
+    windows = []
+    busy = []
+    for day in range(start_day, start_day + days):
+        begin = work_start
+        if day == start_day and start_minute is not None:
+            begin = max(begin, start_minute)
+        free = 0
+        if begin < work_end:
+            for start, end in CALENDAR_INDEX.free_windows(day_string(day), begin, work_end, MIN_BLOCK_MINUTES):
+                free += end - start
+                windows.append((day, start, end))
+        # 工作時間內排不進任務的時間 (會議與過短的空檔)
+        busy.append(max(work_end - begin, 0) - free)
+
+    task_ids, durations, weights, due_days = [], [], [], []
+    for task_id in TASK_INDEX.select(["todo", "in_progress"]):
+        task = TASKS_DATABASE[task_id]
+        minutes = int(round((task.estimated_hours or 0) * 60))
+        if minutes <= 0:
+            continue
+        task_ids.append(task_id)
+        durations.append(minutes)
+        weights.append(PRIORITY_WEIGHTS[task.priority_rank])
+        due_days.append(task.due_day)
+
+    return PlanningProblem(
+        task_ids, durations, weights, due_days, windows,
+        start_day, days, busy, int(Settings.MAX_DAILY_HOURS * 60), work_end
+    )
+
+
+def _start_minute(start_day: int) -> Optional[int]:
+    """規劃從今天開始時，只排入目前時間之後的空檔"""
+    if start_day != today_number():
+        return None
+    now = datetime.now()
+    return now.hour * 60 + now.minute
+
+
+def _task_summary(problem: PlanningProblem, job: int) -> Dict:
+    task = TASKS_DATABASE[problem.task_ids[job]]
+    return {
+        "task_id": task.id,
+        "title": task.title,
+        "priority": PRIORITIES[task.priority_rank],
+        "due_date": task["due_date"]
+    }
+
+
+def _promotion(problem: PlanningProblem, job: int) -> Dict:
+    summary = _task_summary(problem, job)
+    rank = PRIORITIES.index(summary["priority"])
+    summary["suggested_priority"] = PRIORITIES[max(rank - 1, 0)]
+    return summary
+
+
+def _block_plan(problem: PlanningProblem, blocks: List, max_blocks: int) -> List[Dict]:
+    plan = []
+    for job, day, start, end in blocks[:max_blocks]:
+        block = _task_summary(problem, job)
+        block.update({
+            "date": day_string(day),
+            "start_time": time_string(start),
+            "end_time": time_string(end)
+        })
+        plan.append(block)
+    return plan
+
+
+def plan_schedule(
+    start_date: Optional[str] = None,
+    days: int = 5,
+    time_budget_ms: Optional[int] = None,
+    max_blocks: int = 100
+) -> Dict:
+    """
+    將未完成任務排入工作時間的空檔，產生時間區塊排程建議
+
+    Args:
+        start_date: 起始日期 (格式: YYYY-MM-DD)，預設今天 (從目前時間開始)
+        days: 規劃天數，預設 5 天
+        time_budget_ms: 搜尋時間上限 (毫秒)，預設 Settings.PLANNER_TIME_BUDGET_MS
+        max_blocks: 回傳的時間區塊數量上限，預設 100
+
+    Returns:
+        排程建議: 時間區塊、延遲與無法排入的任務
+    """
+    start_day = day_number(start_date) if start_date else today_number()
+    if start_day is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {start_date} (格式: YYYY-MM-DD)"
+        }
+    days = max(int(days), 1)
+    if time_budget_ms is None:
+        time_budget_ms = Settings.PLANNER_TIME_BUDGET_MS
+
+    started = time.perf_counter()
+    problem = build_problem(start_day, days, _start_minute(start_day))
+    order, cost, greedy_cost = search(problem, time_budget_ms)
+    blocks, unscheduled, completions = decode(problem, order)
+
+    late = [job for job, completion in completions.items() if completion > problem.dues[job]]
+    late.sort(key=lambda job: completions[job])
+    plan = _block_plan(problem, blocks, max_blocks)
+
+    end_date = day_string(start_day + days - 1)
+    return {
+        "success": True,
+        "start_date": day_string(start_day),
+        "end_date": end_date,
+        "task_count": len(problem.task_ids),
+        "scheduled_count": len(completions),
+        "unscheduled_count": len(unscheduled),
+        "late_count": len(late),
+        "available_minutes": problem.capacity,
+        "cost": cost,
+        "greedy_cost": greedy_cost,
+        "cost_breakdown": plan_cost(problem, order),
+        "block_count": len(blocks),
+        "blocks": plan,
+        "blocks_truncated": len(blocks) > len(plan),
+        "late_tasks": [_task_summary(problem, job) for job in late[:MAX_LISTED_TASKS]],
+        "unscheduled_tasks": [_task_summary(problem, job) for job in unscheduled[:MAX_LISTED_TASKS]],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "message": (
+            f"{day_string(start_day)} ~ {end_date} 排入 {len(completions)} 個任務"
+            f" ({len(blocks)} 個時間區塊)，{len(late)} 個會延遲，{len(unscheduled)} 個無法排入"
+        )
+    }
+
+
+async def compare_schedule_candidates(
+    start_date: Optional[str] = None,
+    days: int = 5,
+    candidates: int = 8,
+    top: int = 3,
+    time_budget_ms: Optional[int] = None,
+    max_blocks: int = 30
+) -> Dict:
+    """
+    產生多個候選排程 (不同任務順序、限制每日工時、提升過期任務優先級、延後 low 任務)，
+    平行評分後回傳成本最低的幾個方案
+
+    成本以實際時間計算: 加權完成時間 + 延遲 + 每日超過 MAX_DAILY_HOURS 的超載時間。
+
+    Args:
+        start_date: 起始日期 (格式: YYYY-MM-DD)，預設今天 (從目前時間開始)
+        days: 規劃天數，預設 5 天
+        candidates: 候選排程數量，預設 8 個
+        top: 回傳的方案數量，預設 3 個
+        time_budget_ms: 全部候選的搜尋時間上限 (毫秒)，預設 Settings.PLANNER_TIME_BUDGET_MS
+        max_blocks: 每個方案回傳的時間區塊數量上限，預設 30
+
+    Returns:
+        依成本排序的方案: 成本明細、建議的優先級調整與延後任務、時間區塊
+    """
+    # 建立問題與等待行程池都在執行緒中進行，不阻塞事件迴圈；
+    # 這一輪被取消時通知執行緒停止等待，不再佔用索引與行程池
+    cancel = threading.Event()
+    try:
+        return await asyncio.to_thread(
+            _compare_candidates, start_date, days, candidates, top, time_budget_ms, max_blocks, cancel
+        )
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+
+def optimizer_workers() -> int:
+    """多候選排程評分的工作行程數 (Settings.OPTIMIZER_WORKERS，0 表示 CPU 核心數)"""
+    return Settings.OPTIMIZER_WORKERS or os.cpu_count() or 1
+
+
+def warm_up_optimizer():
+    """預先啟動多候選評分的行程池 (程式啟動時呼叫)"""
+    warm_up(optimizer_workers())
+
+
+def _compare_candidates(
+    start_date: Optional[str],
+    days: int,
+    candidates: int,
+    top: int,
+    time_budget_ms: Optional[int],
+    max_blocks: int,
+    cancel: Optional[threading.Event] = None
+) -> Dict:
+    """
+    compare_schedule_candidates 的同步實作 (參數同 compare_schedule_candidates)
+
+    cancel 被設定時停止搜尋並回傳失敗結果。
+    """
+    start_day = day_number(start_date) if start_date else today_number()
+    if start_day is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {start_date} (格式: YYYY-MM-DD)"
+        }
+    days = max(int(days), 1)
+    candidates = min(max(int(candidates), 1), MAX_CANDIDATES)
+    top = max(int(top), 1)
+    if time_budget_ms is None:
+        time_budget_ms = Settings.PLANNER_TIME_BUDGET_MS
+    workers = optimizer_workers()
+
+    started = time.perf_counter()
+    problem = build_problem(start_day, days, _start_minute(start_day))
+    specs = candidate_specs(candidates)
+    try:
+        if cancel is not None and cancel.is_set():
+            raise SearchCancelled()
+        results = evaluate_candidates(problem, specs, time_budget_ms, workers, cancel)
+    except SearchCancelled:
+        return {"success": False, "message": "比較候選排程已取消"}
+
+    options = []
+    for rank, result in enumerate(results[:top], 1):
+        variant = result["problem"]
+        blocks, unscheduled, _ = decode(variant, result["order"])
+        options.append({
+            "rank": rank,
+            "strategy": result["kind"],
+            "description": CANDIDATE_LABELS[result["kind"]],
+            "cost": result["cost"],
+            "priority_changes": [_promotion(variant, job) for job in result["promoted"][:MAX_LISTED_TASKS]],
+            "deferred_tasks": [_task_summary(variant, job) for job in result["deferred"][:MAX_LISTED_TASKS]],
+            "unscheduled_tasks": [_task_summary(variant, job) for job in unscheduled[:MAX_LISTED_TASKS]],
+            "block_count": len(blocks),
+            "blocks": _block_plan(variant, blocks, max_blocks),
+            "blocks_truncated": len(blocks) > max_blocks
+        })
+
+    end_date = day_string(start_day + days - 1)
+    best = options[0]
+    return {
+        "success": True,
+        "start_date": day_string(start_day),
+        "end_date": end_date,
+        "task_count": len(problem.task_ids),
+        "candidate_count": len(specs),
+        "distinct_candidates": len(results),
+        "workers": min(workers, len(specs)),
+        "options": options,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "message": (
+            f"{day_string(start_day)} ~ {end_date} 比較 {len(specs)} 個候選排程，"
+            f"最佳方案: {best['description']} (成本 {best['cost']['total']})"
+        )
+    }
@@ -0,0 +1,161 @@
+"""排程規則評審
+以日程與任務資料直接計算 critic_agent 原本交給 LLM 判斷的項目:
+事件時間衝突、截止任務與會議衝突、工作超載、過期任務、優先級衝突。
+輸出格式與 critic_feedback 相同，可直接交給 adjuster_agent。
+"""
+from typing import Dict, List, Optional, Tuple
+import heapq
+
+from config.settings import Settings
+from tools.calendar_tools import CALENDAR_INDEX
+from tools.records import day_number, day_string, time_string, today_number
+from tools.task_tools import TASK_INDEX, TASKS_DATABASE
+
+# 過期任務在描述中最多列出的數量
+MAX_AFFECTED_ITEMS = 20
+
+
+def event_conflicts(intervals: List[Tuple[int, int, str]]) -> List[Tuple[str, str, int, int]]:
+    """
+    掃描依開始時間排序的區間，找出彼此重疊的事件
+
+    以最小堆積保存尚未結束的事件 (結束時間, 事件 ID)，每個新區間先移除已結束的事件，
+    再與所有仍進行中的事件配對，同時重疊的多個事件兩兩都會回報。
+
+    Returns:
+        (事件 ID, 重疊的事件 ID, 重疊開始, 重疊結束) 清單
+    """
+    conflicts = []
+    active: List[Tuple[int, str]] = []
+    for start, end, event_id in intervals:
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for other_end, other_id in active:
+            conflicts.append((other_id, event_id, start, min(end, other_end)))
+        heapq.heappush(active, (end, event_id))
+    return conflicts
+
+
+def _busy_minutes(intervals: List[Tuple[int, int, str]], window_start: int, window_end: int) -> int:
+    """計算區間聯集落在 [window_start, window_end) 內的分鐘數"""
+    busy = 0
+    cursor = window_start
+    for start, end, _ in intervals:
+        start, end = max(start, cursor), min(end, window_end)
+        if end > start:
+            busy += end - start
+            cursor = end
+    return busy
+
+
+def evaluate_schedule(date: Optional[str] = None) -> Dict:
+    """
+    以規則評估指定日期的排程 (輸出格式同 critic_feedback)
+
+    Args:
+        date: 評估日期 (格式: YYYY-MM-DD)，預設今天
+
+    Returns:
+        {"is_optimal", "issues": [{"type", "description", "affected_items"}], "suggestions"}
+    """
+    day = day_number(date) if date else today_number()
+    if day is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {date} (格式: YYYY-MM-DD)"
+        }
+    date = day_string(day)
+
+    issues = []
+    suggestions = []
+    intervals = CALENDAR_INDEX.intervals_on(date)
+
+    # 1. 事件時間衝突
+    for first, second, start, end in event_conflicts(intervals):
+        issues.append({
+            "type": "time_conflict",
+            "description": f"{date} {time_string(start)}-{time_string(end)} 有兩個事件重疊",
+            "affected_items": [first, second]
+        })
+    if issues:
+        suggestions.append("調整重疊事件的時間，或取消其中一個事件")
+
+    # 當日截止的未完成任務
+    due_today = [
+        TASKS_DATABASE[task_id]
+        for task_id in TASK_INDEX.select(["todo", "in_progress"], due_day=day)
+    ]
+    task_hours = sum(task.estimated_hours or 0 for task in due_today)
+    meeting_hours = _busy_minutes(intervals, 0, 24 * 60) / 60
+    work_start = Settings.WORK_START_HOUR * 60
+    work_end = Settings.WORK_END_HOUR * 60
+    free_hours = (work_end - work_start - _busy_minutes(intervals, work_start, work_end)) / 60
+    due_ids = [task.id for task in due_today]
+
+    # 2. 截止任務與會議衝突: 扣除會議後的工作時間不足以完成當日截止的任務
+    if due_today and task_hours > free_hours:
+        issues.append({
+            "type": "time_conflict",
+            "description": (
+                f"{date} 截止的任務需 {task_hours:g} 小時，"
+                f"但工作時間扣除會議後只剩 {free_hours:g} 小時"
+            ),
+            "affected_items": due_ids + [event_id for _, _, event_id in intervals]
+        })
+        suggestions.append("將部分截止任務延後，或移動非必要的會議")
+
+    # 3. 工作超載
+    if meeting_hours + task_hours > Settings.MAX_DAILY_HOURS:
+        issues.append({
+            "type": "overload",
+            "description": (
+                f"{date} 會議 {meeting_hours:g} 小時加上截止任務 {task_hours:g} 小時，"
+                f"超過每日上限 {Settings.MAX_DAILY_HOURS:g} 小時"
+            ),
+            "affected_items": due_ids
+        })
+        suggestions.append("將非緊急任務延後到之後的日期")
+
+    # 4. 優先級衝突: 同一天截止多個 urgent 任務
+    urgent = [task.id for task in due_today if task["priority"] == "urgent"]
+    if len(urgent) > 1:
+        issues.append({
+            "type": "priority_conflict",
+            "description": f"{date} 同時有 {len(urgent)} 個 urgent 任務截止",
+            "affected_items": urgent
+        })
+        suggestions.append("重新評估 urgent 任務，將次要者降為 high")
+
+    # 5. 過期任務
+    overdue = TASK_INDEX.overdue(today_number())
+    if overdue:
+        issues.append({
+            "type": "overdue",
+            "description": f"有 {len(overdue)} 個任務已過截止日期",
+            "affected_items": overdue[:MAX_AFFECTED_ITEMS],
+            "affected_count": len(overdue)
+        })
+        suggestions.append("過期任務請提升優先級並設定新的截止日，或取消不再需要的任務")
+
+    return {
+        "is_optimal": not issues,
+        "issues": issues,
+        "suggestions": suggestions,
+        "evaluated_date": date
+    }
+
+
+def schedule_score(feedback: Dict) -> int:
+    """
+    將評估結果換算成分數 (越低越好，0 表示沒有問題)
+
+    每個問題以影響的項目數計分 (至少 1 分；清單有截斷時以 affected_count 為準)，
+    用來判斷優化迴圈是否仍在改善。
+
+    Args:
+        feedback: evaluate_schedule 的結果
+    """
+    return sum(
+        max(issue.get("affected_count", len(issue.get("affected_items", []))), 1)
+        for issue in feedback.get("issues", [])
+    )
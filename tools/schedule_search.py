@@ -0,0 +1,668 @@
+"""排程搜尋核心
+排程規劃引擎中不依賴日程/任務資料的部分: 規劃問題、成本函式、貪婪排序、區域搜尋，
+以及多候選排程的產生與平行評分。
+這個模組不載入任何資料表，可以在 ProcessPoolExecutor 的子行程中直接匯入使用。
+
+行程池:
+- 以 spawn 啟動子行程: 主程式此時已有輸入、to_thread 與日誌壓縮等執行緒，
+  以 fork 複製時子行程可能繼承其他執行緒持有中的鎖而卡住
+- spawn 的子行程預設會以 __mp_main__ 重新匯入 main.py (載入 ADK、開啟資料表)，
+  因此建立子行程時暫時以本模組作為 __main__，子行程只匯入本模組；
+  子行程啟動時再檢查沒有載入 LEAN_WORKER_FORBIDDEN 中的模組
+- 程式啟動時以 warm_up 預先建立子行程，第一次比較時不必等待啟動
+- 結果只等待到時間預算用完，來不及回傳的候選改在目前行程以剩餘時間評分
+
+成本分兩層:
+- score_schedule: 搜尋時使用的快速成本，以可用時間軸上的位置計算
+- plan_cost: 比較候選排程時共用的確定性成本，以實際時間計算完成時間、延遲與每日超載，
+  不同空檔配置 (例如限制每日工時) 的候選也可以直接比較
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import bisect
+import contextlib
+import math
+import multiprocessing
+import random
+import sys
+import threading
+import time
+
+MINUTES_PER_DAY = 24 * 60
+
+# 優先級權重 (urgent, high, medium, low)
+PRIORITY_WEIGHTS = (8, 4, 2, 1)
+# 每延遲一分鐘的額外代價倍數
+LATE_PENALTY = 10
+# 每日超出工時上限每一分鐘的代價 (相當於 high 任務延遲一分鐘)
+OVERLOAD_PENALTY = LATE_PENALTY * PRIORITY_WEIGHTS[1]
+# 區域搜尋中非鄰近交換的最大距離
+SWAP_DISTANCE = 32
+# 連續這麼多次隨機交換沒有改善時提早結束 (至少值，任務多時依任務數放大)
+STALL_LIMIT = 2000
+
+# 候選排程的種類
+CANDIDATE_KINDS = ("search", "daily_cap", "promote_overdue", "defer_low")
+
+# 子行程不可載入的模組 (主程式、設定與資料表)
+LEAN_WORKER_FORBIDDEN = ("main", "config", "storage", "google.adk")
+# 等待子行程回傳結果時，在時間預算之外多等的毫秒數 (傳回結果的序列化時間)
+RESULT_GRACE_MS = 100
+# 等待結果時檢查取消的間隔 (秒)
+CANCEL_POLL_SECONDS = 0.05
+
+
+class SearchCancelled(Exception):
+    """比較候選排程的請求已被取消"""
+
+
+class PlanningProblem:
+    """
+    規劃問題 (只包含基本型別，可傳給其他行程計算)
+
+    - windows: 可用空檔 (日序, 開始分鐘, 結束分鐘)，依時間排序
+    - durations/weights/due_days: 各任務的工時 (分鐘)、權重、截止日序 (None 表示沒有截止日)
+    - busy: 規劃期間每天工作時間內無法排程的分鐘數 (會議等)
+    - daily_limit: 每日工時上限 (分鐘)，會議加上排入的任務超過時視為超載
+    - window_ends/day_ends/dues 由以上欄位推算: 每個空檔/每天結束時在可用時間軸上的累計分鐘數，
+      以及各任務的截止位置
+    """
+
+    __slots__ = (
+        "task_ids", "durations", "weights", "due_days", "windows",
+        "start_day", "days", "busy", "daily_limit", "work_end",
+        "window_ends", "day_ends", "dues"
+    )
+
+    def __init__(
+        self,
+        task_ids: List[str],
+        durations: List[int],
+        weights: List[int],
+        due_days: List[Optional[int]],
+        windows: List[Tuple[int, int, int]],
+        start_day: int,
+        days: int,
+        busy: List[int],
+        daily_limit: int,
+        work_end: int
+    ):
+        self.task_ids = task_ids
+        self.durations = durations
+        self.weights = weights
+        self.due_days = due_days
+        self.windows = windows
+        self.start_day = start_day
+        self.days = days
+        self.busy = busy
+        self.daily_limit = daily_limit
+        self.work_end = work_end
+        self._layout()
+
+    def _layout(self):
+        """依空檔推算可用時間軸與各任務的截止位置"""
+        window_ends = []
+        day_ends = [0] * self.days
+        total = 0
+        for day, start, end in self.windows:
+            total += end - start
+            window_ends.append(total)
+            day_ends[day - self.start_day] = total
+        for i in range(1, self.days):
+            day_ends[i] = max(day_ends[i], day_ends[i - 1])
+        self.window_ends = window_ends
+        self.day_ends = day_ends
+
+        # 超出規劃期間的截止日以平均每日可用時間換算
+        daily_capacity = max(total // self.days, 1)
+        last_day = self.start_day + self.days - 1
+        dues = []
+        for due_day in self.due_days:
+            if due_day is None:
+                # 沒有截止日的任務不會延遲
+                due = total + self.days * daily_capacity * 10
+            elif due_day < self.start_day:
+                due = 0
+            elif due_day > last_day:
+                due = total + (due_day - last_day) * daily_capacity
+            else:
+                due = day_ends[due_day - self.start_day]
+            dues.append(due)
+        self.dues = dues
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def capacity(self) -> int:
+        """規劃期間的總可用分鐘數"""
+        return self.window_ends[-1] if self.window_ends else 0
+
+    def replace(self, **changes) -> "PlanningProblem":
+        """
+        建立修改部分欄位後的新問題 (例如不同的空檔或權重)
+
+        Args:
+            **changes: 要替換的欄位 (task_ids/durations/weights/due_days/windows/...)
+        """
+        fields = {
+            name: getattr(self, name)
+            for name in ("task_ids", "durations", "weights", "due_days", "windows",
+                         "start_day", "days", "busy", "daily_limit", "work_end")
+        }
+        fields.update(changes)
+        return PlanningProblem(**fields)
+
+
+def _job_cost(weight: int, due: int, completion: int) -> int:
+    return weight * (completion + LATE_PENALTY * max(completion - due, 0))
+
+
+def score_schedule(problem: PlanningProblem, order: Sequence[int]) -> int:
+    """
+    計算排程順序的成本 (越低越好)
+
+    Args:
+        problem: 規劃問題
+        order: 任務的排列順序 (任務索引)
+
+    Returns:
+        Σ 權重 × (完成位置 + LATE_PENALTY × 延遲分鐘)
+    """
+    durations, weights, dues = problem.durations, problem.weights, problem.dues
+    cost = 0
+    position = 0
+    for job in order:
+        position += durations[job]
+        cost += _job_cost(weights[job], dues[job], position)
+    return cost
+
+
+def initial_orders(problem: PlanningProblem) -> List[List[int]]:
+    """貪婪排序: 截止日優先 (EDD) 與加權最短工時優先 (WSPT)"""
+    jobs = range(len(problem.task_ids))
+    durations, weights, dues = problem.durations, problem.weights, problem.dues
+    edd = sorted(jobs, key=lambda j: (dues[j], -weights[j], durations[j]))
+    wspt = sorted(jobs, key=lambda j: (durations[j] / weights[j], dues[j]))
+    return [edd, wspt]
+
+
+def improve(
+    problem: PlanningProblem,
+    order: List[int],
+    deadline: float,
+    seed: int = 0
+) -> Tuple[List[int], int]:
+    """
+    區域搜尋: 先做鄰近交換直到沒有改善，再在剩餘時間內嘗試隨機的短距離交換
+
+    交換只影響兩個位置之間的任務完成時間，因此只需重新計算這一段的成本。
+
+    Args:
+        problem: 規劃問題
+        order: 起始排序
+        deadline: 結束時間 (time.perf_counter 的值)
+        seed: 隨機交換使用的亂數種子
+
+    Returns:
+        (改善後的排序, 成本)
+    """
+    order = list(order)
+    durations, weights, dues = problem.durations, problem.weights, problem.dues
+    n = len(order)
+    if n < 2:
+        return order, score_schedule(problem, order)
+
+    # prefix[k] = 第 k 個任務開始前的累計工時
+    prefix = [0] * (n + 1)
+    for k, job in enumerate(order):
+        prefix[k + 1] = prefix[k] + durations[job]
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for k in range(n - 1):
+            a, b = order[k], order[k + 1]
+            before = prefix[k]
+            old = (
+                _job_cost(weights[a], dues[a], before + durations[a])
+                + _job_cost(weights[b], dues[b], before + durations[a] + durations[b])
+            )
+            new = (
+                _job_cost(weights[b], dues[b], before + durations[b])
+                + _job_cost(weights[a], dues[a], before + durations[a] + durations[b])
+            )
+            if new < old:
+                order[k], order[k + 1] = b, a
+                prefix[k + 1] = before + durations[b]
+                improved = True
+            if not k % 256 and time.perf_counter() >= deadline:
+                break
+
+    rng = random.Random(seed)
+    stall_limit = max(STALL_LIMIT, 4 * n)
+    stalled = 0
+    while stalled < stall_limit and time.perf_counter() < deadline:
+        for _ in range(256):
+            stalled += 1
+            i = rng.randrange(n - 1)
+            j = min(n - 1, i + rng.randint(2, SWAP_DISTANCE))
+            if j - i < 2:
+                continue
+            # 交換 i 與 j，只重新計算 [i, j] 之間的成本
+            old = new = 0
+            position = prefix[i]
+            swapped = order[i:j + 1]
+            swapped[0], swapped[-1] = swapped[-1], swapped[0]
+            for k in range(i, j + 1):
+                job = order[k]
+                old += _job_cost(weights[job], dues[job], prefix[k + 1])
+                position += durations[swapped[k - i]]
+                new += _job_cost(weights[swapped[k - i]], dues[swapped[k - i]], position)
+            if new < old:
+                order[i:j + 1] = swapped
+                for k in range(i, j + 1):
+                    prefix[k + 1] = prefix[k] + durations[order[k]]
+                stalled = 0
+
+    return order, score_schedule(problem, order)
+
+
+def decode(problem: PlanningProblem, order: Sequence[int]) -> Tuple[List[Tuple[int, int, int, int]], List[int], Dict[int, int]]:
+    """
+    將排序依序填入可用空檔
+
+    Returns:
+        (區塊清單 [(任務索引, 日序, 開始分鐘, 結束分鐘)], 無法排入的任務索引, 任務索引 → 完成位置)
+    """
+    blocks = []
+    unscheduled = []
+    completions = {}
+    windows, window_ends = problem.windows, problem.window_ends
+    capacity = problem.capacity
+    position = 0
+    for job in order:
+        end_position = position + problem.durations[job]
+        if end_position > capacity:
+            unscheduled.append(job)
+            continue
+        completions[job] = end_position
+        cursor = position
+        w = bisect.bisect_right(window_ends, cursor)
+        while cursor < end_position:
+            day, start, end = windows[w]
+            window_begin = window_ends[w] - (end - start)
+            block_start = start + cursor - window_begin
+            block_end = min(end, start + end_position - window_begin)
+            blocks.append((job, day, block_start, block_end))
+            cursor += block_end - block_start
+            w += 1
+        position = end_position
+    return blocks, unscheduled, completions
+
+
+def search(problem: PlanningProblem, time_budget_ms: int, seed: int = 0) -> Tuple[List[int], int, int]:
+    """
+    在時間預算內搜尋最佳排序
+
+    seed 為 0 時從較佳的貪婪排序開始；其他種子先對貪婪排序做隨機擾動，
+    讓不同種子的搜尋從不同的起點出發。
+
+    Returns:
+        (最佳排序, 成本, 貪婪排序的成本)
+    """
+    deadline = time.perf_counter() + max(time_budget_ms, 1) / 1000
+    candidates = [(score_schedule(problem, order), order) for order in initial_orders(problem)]
+    greedy_cost, order = min(candidates, key=lambda item: item[0])
+    if seed:
+        rng = random.Random(seed)
+        order = list(order)
+        for _ in range(len(order) // 4):
+            i = rng.randrange(len(order))
+            j = min(len(order) - 1, i + rng.randint(1, SWAP_DISTANCE))
+            order[i], order[j] = order[j], order[i]
+    order, cost = improve(problem, order, deadline, seed)
+    return order, cost, greedy_cost
+
+
+def plan_cost(problem: PlanningProblem, order: Sequence[int]) -> Dict:
+    """
+    以實際時間計算排程的確定性成本 (越低越好)，可單獨用來評估任一排程
+
+    - 完成時間: 自規劃起始日 0 點起算的分鐘數；無法排入的任務依序接在規劃期間之後
+    - 延遲: 完成時間超過截止日下班時間的分鐘數
+    - 超載: 每天會議加上排入的任務超過 daily_limit 的分鐘數
+
+    Args:
+        problem: 規劃問題
+        order: 任務的排列順序 (任務索引)
+
+    Returns:
+        {"total", "completion", "late_minutes", "weighted_late_minutes", "late_count",
+         "overload_minutes", "overloaded_days", "unscheduled_count"}
+    """
+    blocks, unscheduled, _ = decode(problem, order)
+    finished = {}
+    placed = [0] * problem.days
+    for job, day, start, end in blocks:
+        offset = (day - problem.start_day) * MINUTES_PER_DAY
+        finished[job] = offset + end
+        placed[day - problem.start_day] += end - start
+    overflow = problem.days * MINUTES_PER_DAY
+    for job in unscheduled:
+        overflow += problem.durations[job]
+        finished[job] = overflow
+
+    completion = late_minutes = weighted_late = late_count = 0
+    for job, finish in finished.items():
+        weight = problem.weights[job]
+        completion += weight * finish
+        due_day = problem.due_days[job]
+        if due_day is None:
+            continue
+        late = finish - ((due_day - problem.start_day) * MINUTES_PER_DAY + problem.work_end)
+        if late > 0:
+            late_minutes += late
+            weighted_late += weight * late
+            late_count += 1
+
+    overload = [max(busy + minutes - problem.daily_limit, 0) for busy, minutes in zip(problem.busy, placed)]
+    overload_minutes = sum(overload)
+    return {
+        "total": completion + LATE_PENALTY * weighted_late + OVERLOAD_PENALTY * overload_minutes,
+        "completion": completion,
+        "late_minutes": late_minutes,
+        "weighted_late_minutes": weighted_late,
+        "late_count": late_count,
+        "overload_minutes": overload_minutes,
+        "overloaded_days": sum(1 for minutes in overload if minutes),
+        "unscheduled_count": len(unscheduled)
+    }
+
+
+def capped_windows(problem: PlanningProblem) -> List[Tuple[int, int, int]]:
+    """截短每天的空檔，讓會議加上排入的任務不超過每日工時上限"""
+    remaining = [max(problem.daily_limit - busy, 0) for busy in problem.busy]
+    windows = []
+    for day, start, end in problem.windows:
+        i = day - problem.start_day
+        length = min(end - start, remaining[i])
+        if length > 0:
+            windows.append((day, start, start + length))
+            remaining[i] -= length
+    return windows
+
+
+def run_candidate(problem: PlanningProblem, kind: str, seed: int, time_budget_ms: int) -> Dict:
+    """
+    產生並評分一個候選排程 (在子行程中執行)
+
+    - search: 以指定種子搜尋排序
+    - daily_cap: 限制每日工時不超過上限，超出的任務延到之後
+    - promote_overdue: 過期任務提升一級優先級後搜尋
+    - defer_low: 規劃期間內不需完成的 low 任務移到最後
+
+    Args:
+        problem: 規劃問題
+        kind: 候選種類 (CANDIDATE_KINDS)
+        seed: 搜尋使用的亂數種子
+        time_budget_ms: 搜尋時間上限 (毫秒)
+
+    Returns:
+        {"kind", "seed", "problem", "order", "cost", "promoted", "deferred"}
+    """
+    promoted: List[int] = []
+    deferred: List[int] = []
+    jobs = range(len(problem.task_ids))
+    if kind == "daily_cap":
+        problem = problem.replace(windows=capped_windows(problem))
+        order, _, _ = search(problem, time_budget_ms, seed)
+    elif kind == "promote_overdue":
+        weights = list(problem.weights)
+        for job in jobs:
+            due_day = problem.due_days[job]
+            if due_day is not None and due_day < problem.start_day and weights[job] < PRIORITY_WEIGHTS[0]:
+                weights[job] *= 2
+                promoted.append(job)
+        order, _, _ = search(problem.replace(weights=weights), time_budget_ms, seed)
+    elif kind == "defer_low":
+        last_day = problem.start_day + problem.days - 1
+        deferred = [
+            job for job in jobs
+            if problem.weights[job] == PRIORITY_WEIGHTS[-1]
+            and (problem.due_days[job] is None or problem.due_days[job] > last_day)
+        ]
+        order, _, _ = search(problem, time_budget_ms, seed)
+        later = set(deferred)
+        order = [job for job in order if job not in later] + [job for job in order if job in later]
+    elif kind == "search":
+        order, _, _ = search(problem, time_budget_ms, seed)
+    else:
+        raise ValueError(f"未知的候選種類: {kind}")
+
+    return {
+        "kind": kind,
+        "seed": seed,
+        "problem": problem,
+        "order": order,
+        "cost": plan_cost(problem, order),
+        "promoted": promoted,
+        "deferred": deferred
+    }
+
+
+def candidate_specs(count: int) -> List[Tuple[str, int]]:
+    """
+    產生候選排程的 (種類, 種子)
+
+    前幾個候選各種類各一個，其餘為不同種子的排序搜尋。
+    """
+    specs = [(kind, 0) for kind in CANDIDATE_KINDS]
+    seed = 1
+    while len(specs) < count:
+        specs.append(("search", seed))
+        seed += 1
+    return specs[:max(count, 1)]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def loaded_forbidden_modules() -> List[str]:
+    """目前行程已載入的 LEAN_WORKER_FORBIDDEN 模組 (子行程應為空清單)"""
+    return sorted(
+        name for name in sys.modules
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in LEAN_WORKER_FORBIDDEN)
+    )
+
+
+def _check_lean_worker():
+    """子行程的初始化函式: 載入了主程式或資料表時拒絕啟動 (行程池失效後改在目前行程評分)"""
+    loaded = loaded_forbidden_modules()
+    if loaded:
+        raise RuntimeError(f"排程子行程不應載入: {', '.join(loaded)}")
+
+
+def _noop() -> None:
+    return None
+
+
+@contextlib.contextmanager
+def _lean_main() -> Iterator[None]:
+    """
+    建立子行程期間暫時以本模組作為 __main__
+
+    spawn 依 __main__ 決定子行程要重新執行的主模組，
+    替換後子行程只匯入本模組，不會執行 main.py 的模組層級程式碼。
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """取得共用的行程池 (工作行程數改變時重建)，需在 _executor_lock 內呼叫"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_check_lean_worker
+        )
+        _executor_workers = workers
+    return _executor
+
+
+def _submit(workers: int, jobs: Sequence[Tuple]) -> List[Future]:
+    """在行程池送出工作 (送出時可能啟動子行程，因此在 _lean_main 內進行)"""
+    with _executor_lock, _lean_main():
+        executor = _get_executor(workers)
+        return [executor.submit(*job) for job in jobs]
+
+
+def warm_up(workers: int):
+    """
+    預先啟動行程池的子行程 (程式啟動時呼叫)
+
+    每個工作行程送出一個空工作，行程池依序啟動子行程，之後的比較不必等待啟動。
+
+    Args:
+        workers: 工作行程數 (<= 1 時不使用行程池)
+    """
+    if workers <= 1:
+        return
+    try:
+        _submit(workers, [(_noop,)] * workers)
+    except (BrokenProcessPool, OSError, RuntimeError):
+        _reset_executor()
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _candidate_budget(time_budget_ms: int, rounds: int) -> int:
+    """依序執行 rounds 輪時，每個候選可用的搜尋時間 (毫秒)"""
+    return max(time_budget_ms // max(rounds, 1), 1)
+
+
+def _collect(
+    futures: List[Future],
+    deadline: float,
+    cancel: Optional[threading.Event]
+) -> List[Optional[Dict]]:
+    """
+    等待子行程的結果直到 deadline (time.perf_counter 的值)
+
+    Returns:
+        與 futures 對應的結果，逾時、取消或失敗的候選為 None
+
+    Raises:
+        SearchCancelled: cancel 被設定
+    """
+    pending = set(futures)
+    try:
+        while pending:
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            _, pending = wait(
+                pending, timeout=min(remaining, CANCEL_POLL_SECONDS), return_when=FIRST_COMPLETED
+            )
+    finally:
+        # 未完成的候選不再等待 (已開始執行的會在自己的時間預算內結束)
+        for future in pending:
+            future.cancel()
+
+    results = []
+    for future in futures:
+        if future.done() and not future.cancelled() and future.exception() is None:
+            results.append(future.result())
+        else:
+            results.append(None)
+    if any(isinstance(future.exception(), BrokenProcessPool)
+           for future in futures if future.done() and not future.cancelled()):
+        _reset_executor()
+    return results
+
+
+def evaluate_candidates(
+    problem: PlanningProblem,
+    specs: Sequence[Tuple[str, int]],
+    time_budget_ms: int,
+    workers: int,
+    cancel: Optional[threading.Event] = None
+) -> List[Dict]:
+    """
+    平行產生並評分多個候選排程，依成本由低到高排序 (相同的排程只保留一個)
+
+    workers <= 1 或只有一個候選時直接在目前行程執行；
+    行程池無法使用時 (例如環境不允許建立子行程) 也改為依序執行。
+    time_budget_ms 是全部候選的搜尋時間上限: 每個候選分到
+    time_budget_ms / 依序執行的輪數 (ceil(候選數 / 工作行程數))；
+    子行程在時間預算內沒有回傳的候選 (例如子行程仍在啟動)，改在目前行程以剩餘時間評分。
+
+    Args:
+        problem: 規劃問題
+        specs: 候選的 (種類, 種子)
+        time_budget_ms: 全部候選的搜尋時間上限 (毫秒)
+        workers: 行程池的工作行程數
+        cancel: 設定後停止等待並放棄剩餘的候選 (選填)
+
+    Returns:
+        run_candidate 的結果清單
+
+    Raises:
+        SearchCancelled: cancel 被設定
+    """
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    results: List[Optional[Dict]] = [None] * len(specs)
+    if workers > 1 and len(specs) > 1:
+        budget = _candidate_budget(time_budget_ms, math.ceil(len(specs) / min(workers, len(specs))))
+        try:
+            futures = _submit(workers, [
+                (run_candidate, problem, kind, seed, budget) for kind, seed in specs
+            ])
+            results = _collect(futures, deadline + RESULT_GRACE_MS / 1000, cancel)
+        except (BrokenProcessPool, OSError):
+            _reset_executor()
+
+    missing = [index for index, result in enumerate(results) if result is None]
+    for position, index in enumerate(missing):
+        if cancel is not None and cancel.is_set():
+            raise SearchCancelled()
+        # 剩餘時間平均分給還沒有結果的候選 (時間用完時只做貪婪排序)
+        remaining_ms = int((deadline - time.perf_counter()) * 1000)
+        budget = _candidate_budget(max(remaining_ms, 1), len(missing) - position)
+        kind, seed = specs[index]
+        results[index] = run_candidate(problem, kind, seed, budget)
+
+    # 依 (成本, 原始順序) 排序，結果與工作行程的完成順序無關
+    ranked = sorted(enumerate(results), key=lambda item: (item[1]["cost"]["total"], item[0]))
+    unique = []
+    seen = set()
+    for _, result in ranked:
+        key = (tuple(result["problem"].windows), tuple(result["order"]),
+               tuple(result["promoted"]), tuple(result["deferred"]))
+        if key not in seen:
+            seen.add(key)
+            unique.append(result)
+    return unique
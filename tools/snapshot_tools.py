@@ -0,0 +1,124 @@
+"""每日總覽工具函式
+一次回傳某一天的事件、當日截止與過期任務、即將到來的提醒、事件衝突與空閒時段，
+回答「今天有什麼行程」不需再分別呼叫 get_today_schedule、list_tasks、
+get_upcoming_reminders、check_time_conflict。
+各部分直接由日程索引、任務索引與提醒佇列取得，不掃描資料表。
+"""
+from typing import Dict, Optional
+
+from config.settings import Settings
+from tools.calendar_tools import CALENDAR_INDEX, get_event_record
+from tools.records import (
+    MINUTES_PER_DAY,
+    PRIORITIES,
+    day_number,
+    day_string,
+    now_minutes,
+    stamp_string,
+    time_string,
+    today_number
+)
+from tools.reminder_tools import REMINDER_QUEUE, REMINDERS_DATABASE
+from tools.schedule_rules import event_conflicts
+from tools.task_tools import TASK_INDEX, TASKS_DATABASE
+
+# 列出的空閒時段最短長度 (分鐘)
+MIN_FREE_MINUTES = 30
+# 過期任務最多列出的數量
+MAX_OVERDUE_TASKS = 20
+
+
+def _task_item(task_id: str) -> Dict:
+    task = TASKS_DATABASE[task_id]
+    return {
+        "id": task.id,
+        "title": task.title,
+        "priority": PRIORITIES[task.priority_rank],
+        "status": task.status,
+        "due_date": task["due_date"],
+        "estimated_hours": task.estimated_hours
+    }
+
+
+def get_daily_snapshot(date: Optional[str] = None) -> Dict:
+    """
+    取得某一天的完整總覽: 事件、截止與過期任務、提醒、衝突、空閒時段
+
+    Args:
+        date: 日期 (格式: YYYY-MM-DD)，預設今天
+
+    Returns:
+        當日事件、當日截止的未完成任務、過期任務、當日尚未觸發的提醒、
+        重疊的事件，以及工作時間內的空閒時段
+    """
+    day = day_number(date) if date else today_number()
+    if day is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {date} (格式: YYYY-MM-DD)"
+        }
+    date = day_string(day)
+
+    # 日程: 當日區間 (已依開始時間排序，含週期場次)
+    intervals = CALENDAR_INDEX.intervals_on(date)
+    events = []
+    for start, end, event_id in intervals:
+        event = get_event_record(event_id)
+        events.append({
+            "id": event_id,
+            "title": event.title if event else "",
+            "start_time": time_string(start),
+            "end_time": time_string(end),
+            "location": event.location if event else ""
+        })
+    conflicts = [
+        {
+            "event_ids": [first, second],
+            "start_time": time_string(start),
+            "end_time": time_string(end)
+        }
+        for first, second, start, end in event_conflicts(intervals)
+    ]
+    work_start = Settings.WORK_START_HOUR * 60
+    work_end = Settings.WORK_END_HOUR * 60
+    free_slots = [
+        {"start_time": time_string(start), "end_time": time_string(end), "minutes": end - start}
+        for start, end in CALENDAR_INDEX.free_windows(date, work_start, work_end, MIN_FREE_MINUTES)
+    ]
+
+    # 任務: 當日截止的未完成任務 (依優先級排序) 與截止日早於當日的過期任務
+    due_tasks = [_task_item(task_id) for task_id in TASK_INDEX.select(["todo", "in_progress"], due_day=day)]
+    overdue_count = TASK_INDEX.overdue_count(day)
+    overdue_tasks = [_task_item(task_id) for task_id in TASK_INDEX.overdue(day)[:MAX_OVERDUE_TASKS]]
+
+    # 提醒: 當日尚未觸發的提醒 (以範圍查詢直接定位當日，不走訪之前日期的提醒)
+    day_start = day * MINUTES_PER_DAY
+    reminders = []
+    for reminder_id in REMINDER_QUEUE.between(max(now_minutes(), day_start), day_start + MINUTES_PER_DAY - 1):
+        reminder = REMINDERS_DATABASE.get(reminder_id)
+        if reminder is None:
+            continue
+        reminders.append({
+            "id": reminder.id,
+            "title": reminder.title,
+            "reminder_time": stamp_string(reminder.fire_at),
+            "related_id": reminder.related_id
+        })
+
+    free_minutes = sum(slot["minutes"] for slot in free_slots)
+    return {
+        "success": True,
+        "date": date,
+        "events": events,
+        "due_tasks": due_tasks,
+        "overdue_count": overdue_count,
+        "overdue_tasks": overdue_tasks,
+        "reminders": reminders,
+        "conflicts": conflicts,
+        "free_slots": free_slots,
+        "message": (
+            f"{date}: {len(events)} 個事件、{len(due_tasks)} 個任務截止、"
+            f"{overdue_count} 個過期任務、{len(reminders)} 個提醒、"
+            f"{len(conflicts)} 個時間衝突，工作時間內空閒 {free_minutes / 60:g} 小時"
+        )
+    }
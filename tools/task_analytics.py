@@ -0,0 +1,254 @@
+"""任務分析工具函式
+將任務整理成欄位式快照 (NumPy 陣列: 優先級、狀態、截止日、工時、建立/完成日)，
+常見的統計直接以向量運算完成，不需再透過 code_executor_agent 產生並執行程式碼。
+快照在任務異動後 (TASK_INDEX.version 改變) 第一次分析時才重建。
+"""
+from typing import Dict, List, Optional
+from datetime import date as Date
+import numpy as np
+
+from tools.records import PRIORITIES, day_number, day_string, today_number
+from tools.task_tools import TASK_INDEX, TASKS_DATABASE
+
+# 狀態代碼 (其他狀態歸為最後一類)
+STATUSES = ("todo", "in_progress", "completed", "cancelled")
+STATUS_CODE = {name: code for code, name in enumerate(STATUSES)}
+OTHER_STATUS = len(STATUSES)
+TODO, IN_PROGRESS, COMPLETED, CANCELLED = range(len(STATUSES))
+
+# 沒有日期時使用的代碼
+NO_DAY = -1
+NOT_COMPLETED = np.iinfo(np.int64).max
+
+# 過期天數分組 (左閉右開)
+OVERDUE_BINS = (1, 4, 8, 15, 31)
+OVERDUE_LABELS = ("1-3天", "4-7天", "8-14天", "15-30天", "30天以上")
+
+
+class TaskSnapshot:
+    """任務的欄位式快照，每個欄位是一個長度為任務數的陣列"""
+
+    __slots__ = ("ids", "priority", "status", "due", "hours", "created", "completed")
+
+    def __init__(self, tasks):
+        ids, priority, status, due, hours, created, completed = [], [], [], [], [], [], []
+        for task in tasks:
+            ids.append(task.id)
+            priority.append(task.priority_rank)
+            status.append(STATUS_CODE.get(task.status, OTHER_STATUS))
+            due.append(task.due_day if task.due_day is not None else NO_DAY)
+            hours.append(task.estimated_hours or 0)
+            created.append(_stamp_day(task.created_at, 0))
+            completed.append(_stamp_day(task.completed_at, NOT_COMPLETED))
+
+        self.ids = ids
+        self.priority = np.array(priority, dtype=np.int8)
+        self.status = np.array(status, dtype=np.int8)
+        self.due = np.array(due, dtype=np.int64)
+        self.hours = np.array(hours, dtype=np.float64)
+        self.created = np.array(created, dtype=np.int64)
+        self.completed = np.array(completed, dtype=np.int64)
+        # 狀態為完成但沒有完成時間的任務，視為建立當天即完成
+        missing = (self.status == COMPLETED) & (self.completed == NOT_COMPLETED)
+        self.completed[missing] = self.created[missing]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def open(self) -> np.ndarray:
+        """未結束 (todo/in_progress) 的任務遮罩"""
+        return (self.status == TODO) | (self.status == IN_PROGRESS)
+
+
+def _stamp_day(value: Optional[str], default: int) -> int:
+    """將 ISO 時間字串轉換為日序"""
+    if not value:
+        return default
+    try:
+        return Date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        return default
+
+
+_snapshot: Optional[TaskSnapshot] = None
+_snapshot_version: Optional[int] = None
+
+
+def task_snapshot() -> TaskSnapshot:
+    """取得目前任務的快照 (任務沒有異動時重複使用)"""
+    global _snapshot, _snapshot_version
+    len(TASK_INDEX)  # 確保索引已載入，version 才會反映之後的異動
+    if _snapshot is None or _snapshot_version != TASK_INDEX.version:
+        _snapshot = TaskSnapshot(TASKS_DATABASE.values())
+        _snapshot_version = TASK_INDEX.version
+    return _snapshot
+
+
+def _hours(value) -> float:
+    return round(float(value), 2)
+
+
+def _rate(done: int, total: int) -> float:
+    return round(done / total, 4) if total else 0.0
+
+
+def get_task_completion_rate() -> Dict:
+    """
+    計算任務完成率 (不含已取消任務)
+
+    Returns:
+        整體與各優先級的完成率
+    """
+    snapshot = task_snapshot()
+    counts = np.bincount(snapshot.status, minlength=OTHER_STATUS + 1)
+    active = snapshot.status != CANCELLED
+    done = snapshot.status == COMPLETED
+    active_by_priority = np.bincount(snapshot.priority[active], minlength=len(PRIORITIES))
+    done_by_priority = np.bincount(snapshot.priority[done], minlength=len(PRIORITIES))
+
+    total = int(active.sum())
+    completed = int(counts[COMPLETED])
+    return {
+        "success": True,
+        "total": len(snapshot),
+        "completed": completed,
+        "open": int(counts[TODO] + counts[IN_PROGRESS]),
+        "cancelled": int(counts[CANCELLED]),
+        "completion_rate": _rate(completed, total),
+        "by_priority": {
+            name: {
+                "completed": int(done_by_priority[rank]),
+                "total": int(active_by_priority[rank]),
+                "completion_rate": _rate(int(done_by_priority[rank]), int(active_by_priority[rank]))
+            }
+            for rank, name in enumerate(PRIORITIES)
+        },
+        "message": f"任務完成率 {_rate(completed, total):.0%} ({completed}/{total})"
+    }
+
+
+def get_hours_breakdown() -> Dict:
+    """
+    統計未完成任務的預估工時 (依優先級與截止週)
+
+    Returns:
+        各優先級工時、各週 (週一開始) 到期的工時，以及未設定截止日的工時
+    """
+    snapshot = task_snapshot()
+    is_open = snapshot.open
+    priority = snapshot.priority[is_open]
+    hours = snapshot.hours[is_open]
+    due = snapshot.due[is_open]
+
+    by_priority = np.bincount(priority, weights=hours, minlength=len(PRIORITIES))
+
+    has_due = due != NO_DAY
+    # 日序 1 (0001-01-01) 是星期一
+    week_starts = due[has_due] - (due[has_due] - 1) % 7
+    weeks, inverse = np.unique(week_starts, return_inverse=True)
+    week_hours = np.bincount(inverse, weights=hours[has_due], minlength=len(weeks))
+    week_counts = np.bincount(inverse, minlength=len(weeks))
+
+    return {
+        "success": True,
+        "open_tasks": int(is_open.sum()),
+        "total_open_hours": _hours(hours.sum()),
+        "by_priority": {name: _hours(by_priority[rank]) for rank, name in enumerate(PRIORITIES)},
+        "by_due_week": [
+            {
+                "week_start": day_string(int(week)),
+                "hours": _hours(week_hours[i]),
+                "tasks": int(week_counts[i])
+            }
+            for i, week in enumerate(weeks)
+        ],
+        "no_due_date_hours": _hours(hours[~has_due].sum())
+    }
+
+
+def get_overdue_histogram() -> Dict:
+    """
+    統計過期任務的分布 (依過期天數分組)
+
+    Returns:
+        各組的任務數、工時，以及各優先級的過期數量
+    """
+    snapshot = task_snapshot()
+    today = today_number()
+    overdue = snapshot.open & (snapshot.due != NO_DAY) & (snapshot.due < today)
+    days_overdue = today - snapshot.due[overdue]
+    hours = snapshot.hours[overdue]
+
+    edges = np.array(OVERDUE_BINS + (max(int(days_overdue.max(initial=0)), OVERDUE_BINS[-1]) + 1,))
+    counts, _ = np.histogram(days_overdue, bins=edges)
+    bin_hours, _ = np.histogram(days_overdue, bins=edges, weights=hours)
+    by_priority = np.bincount(snapshot.priority[overdue], minlength=len(PRIORITIES))
+
+    total = int(overdue.sum())
+    return {
+        "success": True,
+        "overdue_count": total,
+        "overdue_hours": _hours(hours.sum()),
+        "histogram": [
+            {"range": label, "tasks": int(counts[i]), "hours": _hours(bin_hours[i])}
+            for i, label in enumerate(OVERDUE_LABELS)
+        ],
+        "by_priority": {name: int(by_priority[rank]) for rank, name in enumerate(PRIORITIES)},
+        "message": f"目前有 {total} 個過期任務"
+    }
+
+
+def _cumulative_hours(days: np.ndarray, hours: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """計算每個查詢日 (含) 以前的工時累計"""
+    order = np.argsort(days, kind="stable")
+    cumulative = np.concatenate(([0.0], np.cumsum(hours[order])))
+    return cumulative[np.searchsorted(days[order], query, side="right")]
+
+
+def get_burndown(days: int = 14, end_date: Optional[str] = None) -> Dict:
+    """
+    產生燃盡圖資料: 每天結束時剩餘的預估工時 (不含已取消任務)
+
+    Args:
+        days: 天數，預設 14 天
+        end_date: 最後一天 (格式: YYYY-MM-DD)，預設今天
+
+    Returns:
+        每日剩餘工時、當日完成工時與理想燃盡線
+    """
+    end = day_number(end_date) if end_date else today_number()
+    if end is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {end_date} (格式: YYYY-MM-DD)"
+        }
+    days = max(int(days), 1)
+
+    snapshot = task_snapshot()
+    active = snapshot.status != CANCELLED
+    hours = snapshot.hours[active]
+    query = np.arange(end - days + 1, end + 1, dtype=np.int64)
+    query_before = query - 1
+
+    created = _cumulative_hours(snapshot.created[active], hours, query)
+    completed = _cumulative_hours(snapshot.completed[active], hours, query)
+    completed_before = _cumulative_hours(snapshot.completed[active], hours, query_before)
+    remaining = created - completed
+    ideal = np.linspace(remaining[0], 0.0, days) if days > 1 else remaining.copy()
+
+    points: List[Dict] = [
+        {
+            "date": day_string(int(day)),
+            "remaining_hours": _hours(remaining[i]),
+            "completed_hours": _hours(completed[i] - completed_before[i]),
+            "ideal_hours": _hours(ideal[i])
+        }
+        for i, day in enumerate(query)
+    ]
+    return {
+        "success": True,
+        "start_date": points[0]["date"],
+        "end_date": points[-1]["date"],
+        "days": points
+    }
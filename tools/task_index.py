@@ -0,0 +1,229 @@
+"""任務索引
+依 (狀態, 優先級) 分桶、桶內依 (截止日, 建立順序) 排序的任務索引，
+由 create_task/update_task/delete_task 逐筆維護。
+list_tasks 的狀態/優先級/截止日篩選直接對應到桶與桶內的二分搜尋範圍，
+結果以合併排序的方式依 (優先級, 截止日) 順序產生，不需掃描與重新排序。
+同時維護狀態/優先級計數、預估工時總和，以及未結束任務依截止日排序的清單，
+get_task_statistics 不必走訪所有任務；過期數量以今天的日序二分搜尋，
+日期換日時自然前進。
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import bisect
+import heapq
+import itertools
+import threading
+
+from tools.records import NO_DUE_DAY, PRIORITIES, TaskRecord
+
+# 桶內項目: (截止日, 建立順序, 任務 ID)
+_Entry = Tuple[int, int, str]
+_Bucket = Tuple[str, int]
+
+# 不列入過期計算的狀態
+CLOSED_STATUSES = ("completed", "cancelled")
+
+
+class TaskIndex:
+    """
+    任務的狀態/優先級/截止日索引
+
+    - _buckets: (狀態, 優先級) → 依截止日排序的項目
+    - _entries: 任務 ID → 所在的桶、項目與預估工時，更新時用來移除舊位置
+    - _open_due: 未結束且有截止日的任務 (截止日, 任務 ID)，依截止日排序
+    - 建立順序在第一次加入索引時決定，同優先級同截止日的任務維持原本的先後
+    - version 在每次異動時遞增，供衍生資料 (例如分析快照) 判斷是否需要重建
+    """
+
+    def __init__(self):
+        self._buckets: Dict[_Bucket, List[_Entry]] = {}
+        self._entries: Dict[str, Tuple[_Bucket, _Entry, float]] = {}
+        self._order: Dict[str, int] = {}
+        self._status_counts: Dict[str, int] = {}
+        self._priority_counts = [0] * len(PRIORITIES)
+        self._hours = 0
+        self._open_due: List[Tuple[int, str]] = []
+        self._counter = itertools.count()
+        self._loader: Optional[Callable[[], Iterable[TaskRecord]]] = None
+        self._load_lock = threading.RLock()
+        self._loading = False
+        self.version = 0
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._entries)
+
+    def load_lazily(self, loader: Callable[[], Iterable[TaskRecord]]):
+        """
+        延後建立索引到第一次使用時
+
+        Args:
+            loader: 回傳所有任務的函式
+        """
+        self._loader = loader
+
+    def _load(self):
+        # 查詢可能在多個執行緒同時發生 (direct_query_agent)，建立期間其他執行緒需等待，
+        # 不可讀到空的或建立到一半的索引；建立中的執行緒重入時 (rebuild → add) 直接返回
+        if self._loader is None and not self._loading:
+            return
+        with self._load_lock:
+            loader = self._loader
+            if loader is None or self._loading:
+                return
+            self._loading = True
+            try:
+                self.rebuild(loader())
+            finally:
+                self._loading = False
+
+    def rebuild(self, tasks: Iterable[TaskRecord]):
+        """依現有任務重建索引"""
+        self._loader = None
+        self._buckets.clear()
+        self._entries.clear()
+        self._order.clear()
+        self._status_counts.clear()
+        self._priority_counts = [0] * len(PRIORITIES)
+        self._hours = 0
+        self._open_due.clear()
+        self.version += 1
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task: TaskRecord):
+        """將任務加入索引 (已存在則先移除舊位置)"""
+        self._load()
+        self.remove(task.id, forget=False)
+
+        order = self._order.get(task.id)
+        if order is None:
+            order = self._order[task.id] = next(self._counter)
+        bucket = (task.status, task.priority_rank)
+        entry = (task.due_day if task.due_day is not None else NO_DUE_DAY, order, task.id)
+        bisect.insort(self._buckets.setdefault(bucket, []), entry)
+        hours = task.estimated_hours or 0
+        self._entries[task.id] = (bucket, entry, hours)
+
+        self._status_counts[task.status] = self._status_counts.get(task.status, 0) + 1
+        self._priority_counts[task.priority_rank] += 1
+        self._hours += hours
+        if task.due_day is not None and task.status not in CLOSED_STATUSES:
+            bisect.insort(self._open_due, (task.due_day, task.id))
+        self.version += 1
+
+    def remove(self, task_id: str, forget: bool = True):
+        """
+        將任務自索引移除
+
+        Args:
+            task_id: 任務 ID
+            forget: 是否一併清除建立順序 (更新時保留)
+        """
+        self._load()
+        if forget:
+            self._order.pop(task_id, None)
+        located = self._entries.pop(task_id, None)
+        if located is None:
+            return
+
+        self.version += 1
+        bucket, entry, hours = located
+        entries = self._buckets[bucket]
+        pos = bisect.bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            entries.pop(pos)
+        if not entries:
+            del self._buckets[bucket]
+
+        status, rank = bucket
+        self._status_counts[status] -= 1
+        if not self._status_counts[status]:
+            del self._status_counts[status]
+        self._priority_counts[rank] -= 1
+        self._hours -= hours
+        if entry[0] != NO_DUE_DAY and status not in CLOSED_STATUSES:
+            pos = bisect.bisect_left(self._open_due, (entry[0], task_id))
+            if pos < len(self._open_due) and self._open_due[pos] == (entry[0], task_id):
+                self._open_due.pop(pos)
+
+    def status_counts(self) -> Dict[str, int]:
+        """各狀態的任務數量"""
+        self._load()
+        return dict(self._status_counts)
+
+    def priority_counts(self) -> Dict[str, int]:
+        """各優先級的任務數量"""
+        self._load()
+        return dict(zip(PRIORITIES, self._priority_counts))
+
+    def total_hours(self) -> float:
+        """所有任務的預估工時總和"""
+        self._load()
+        # 逐筆加減浮點數可能累積誤差
+        return self._hours if isinstance(self._hours, int) else round(self._hours, 6)
+
+    def overdue_count(self, today: int) -> int:
+        """
+        未結束且截止日早於今天的任務數量
+
+        Args:
+            today: 今天的日序
+        """
+        self._load()
+        return bisect.bisect_left(self._open_due, (today, ""))
+
+    def overdue(self, today: int) -> List[str]:
+        """
+        未結束且截止日早於今天的任務 ID (依截止日排序)
+
+        Args:
+            today: 今天的日序
+        """
+        self._load()
+        end = bisect.bisect_left(self._open_due, (today, ""))
+        return [task_id for _, task_id in self._open_due[:end]]
+
+    def statuses(self) -> List[str]:
+        """取得索引中出現過的狀態"""
+        self._load()
+        return sorted({status for status, _ in self._buckets})
+
+    def select(
+        self,
+        statuses: Iterable[str],
+        priority_rank: Optional[int] = None,
+        due_day: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        依條件依序產生任務 ID (優先級 → 截止日 → 建立順序)
+
+        Args:
+            statuses: 要包含的狀態
+            priority_rank: 優先級排序值 (選填)
+            due_day: 截止日的日序 (選填)
+
+        Yields:
+            任務 ID
+        """
+        self._load()
+        statuses = list(statuses)
+        ranks = range(len(PRIORITIES)) if priority_rank is None else (priority_rank,)
+        for rank in ranks:
+            runs = []
+            for status in statuses:
+                entries = self._buckets.get((status, rank))
+                if not entries:
+                    continue
+                if due_day is None:
+                    runs.append(entries)
+                else:
+                    lo = bisect.bisect_left(entries, (due_day, -1, ""))
+                    hi = bisect.bisect_left(entries, (due_day + 1, -1, ""))
+                    if lo < hi:
+                        runs.append(entries[lo:hi])
+            if len(runs) == 1:
+                merged = iter(runs[0])
+            else:
+                merged = heapq.merge(*runs)
+            for _, _, task_id in merged:
+                yield task_id
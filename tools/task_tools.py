@@ -6,6 +6,12 @@ from datetime import datetime, timedelta
 from enum import Enum
 import uuid
 
+from storage.factory import open_table
+from tools.cache import memoize
+from tools.records import MINUTES_PER_DAY, PRIORITIES, PRIORITY_RANK, TaskRecord, day_number, today_number
+from tools.reminder_tools import close_linked_reminders, linked_reminders, shift_reminder
+from tools.task_index import TaskIndex
+
 # 任務優先級
 class Priority(str, Enum):
     LOW = "low"
@@ -20,8 +26,8 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
-# 模擬任務資料庫
-TASKS_DATABASE = {}
+# 任務資料庫 (儲存後端由 Settings.STORAGE_BACKEND 決定)
+TASKS_DATABASE = open_table("tasks", TaskRecord)
 
 # 初始化示範資料
 def _init_sample_tasks():
@@ -29,7 +35,7 @@ def _init_sample_tasks():
     tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
     next_week = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
     
-    TASKS_DATABASE["TSK-001"] = {
+    TASKS_DATABASE["TSK-001"] = TaskRecord.from_dict({
         "id": "TSK-001",
         "title": "完成專案報告",
         "description": "撰寫 Q4 專案進度報告",
@@ -38,8 +44,8 @@ def _init_sample_tasks():
         "due_date": today,
         "estimated_hours": 3,
         "tags": ["工作", "報告"]
-    }
-    TASKS_DATABASE["TSK-002"] = {
+    })
+    TASKS_DATABASE["TSK-002"] = TaskRecord.from_dict({
         "id": "TSK-002",
         "title": "回覆客戶郵件",
         "description": "回覆客戶關於產品功能的詢問",
@@ -48,8 +54,8 @@ def _init_sample_tasks():
         "due_date": today,
         "estimated_hours": 1,
         "tags": ["工作", "溝通"]
-    }
-    TASKS_DATABASE["TSK-003"] = {
+    })
+    TASKS_DATABASE["TSK-003"] = TaskRecord.from_dict({
         "id": "TSK-003",
         "title": "準備簡報資料",
         "description": "準備下週客戶拜訪的簡報",
@@ -58,8 +64,8 @@ def _init_sample_tasks():
         "due_date": tomorrow,
         "estimated_hours": 4,
         "tags": ["工作", "簡報"]
-    }
-    TASKS_DATABASE["TSK-004"] = {
+    })
+    TASKS_DATABASE["TSK-004"] = TaskRecord.from_dict({
         "id": "TSK-004",
         "title": "學習新技術",
         "description": "研究 AI Agent 開發框架",
@@ -68,9 +74,38 @@ def _init_sample_tasks():
         "due_date": next_week,
         "estimated_hours": 8,
         "tags": ["學習", "技術"]
-    }
+    })
+
+if not TASKS_DATABASE:
+    _init_sample_tasks()
 
-_init_sample_tasks()
+# 狀態/優先級/截止日索引 (由 create_task/update_task/delete_task 維護)
+TASK_INDEX = TaskIndex()
+TASK_INDEX.load_lazily(TASKS_DATABASE.values)
+
+
+def _validate_fields(
+    priority: Optional[str] = None,
+    status: Optional[str] = None,
+    due_date: Optional[str] = None
+) -> Optional[Dict]:
+    """檢查優先級、狀態、截止日期格式，有誤時回傳錯誤結果"""
+    if priority and priority not in PRIORITY_RANK:
+        return {
+            "success": False,
+            "message": f"優先級錯誤: {priority} (可用: {'/'.join(p.value for p in Priority)})"
+        }
+    if status and status not in {s.value for s in TaskStatus}:
+        return {
+            "success": False,
+            "message": f"狀態錯誤: {status} (可用: {'/'.join(s.value for s in TaskStatus)})"
+        }
+    if due_date and day_number(due_date) is None:
+        return {
+            "success": False,
+            "message": f"日期格式錯誤: {due_date} (格式: YYYY-MM-DD)"
+        }
+    return None
 
 
 def create_task(
@@ -95,9 +130,13 @@ def create_task(
     Returns:
         新建立的任務資訊
     """
+    error = _validate_fields(priority=priority, due_date=due_date)
+    if error:
+        return error
+    
     task_id = f"TSK-{uuid.uuid4().hex[:6].upper()}"
     
-    task = {
+    task = TaskRecord.from_dict({
         "id": task_id,
         "title": title,
         "description": description,
@@ -107,9 +146,10 @@ def create_task(
         "estimated_hours": estimated_hours,
         "tags": tags or [],
         "created_at": datetime.now().isoformat()
-    }
+    })
     
     TASKS_DATABASE[task_id] = task
+    TASK_INDEX.add(task)
     
     priority_emoji = {"low": "🟢", "medium": "🟡", "high": "🟠", "urgent": "🔴"}
     
@@ -120,11 +160,13 @@ def create_task(
     }
 
 
+@memoize(TASKS_DATABASE)
 def list_tasks(
     status: Optional[str] = None,
     priority: Optional[str] = None,
     due_date: Optional[str] = None,
-    include_completed: bool = False
+    include_completed: bool = False,
+    limit: Optional[int] = None
 ) -> Dict:
     """
     列出任務清單
@@ -134,37 +176,34 @@ def list_tasks(
         priority: 篩選優先級 (low/medium/high/urgent)
         due_date: 篩選截止日期
         include_completed: 是否包含已完成任務，預設 False
+        limit: 最多回傳的任務數 (依優先級、截止日排序後的前幾個)，預設全部
     
     Returns:
         任務清單
     """
-    results = []
-    
-    for task in TASKS_DATABASE.values():
-        # 預設不顯示已完成和已取消的任務
-        if not include_completed and task["status"] in ["completed", "cancelled"]:
-            continue
-        
-        if status and task["status"] != status:
-            continue
-        if priority and task["priority"] != priority:
-            continue
-        if due_date and task["due_date"] != due_date:
-            continue
-        
-        results.append(task)
-    
-    # 按優先級和截止日期排序
-    priority_order = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
-    results.sort(key=lambda x: (
-        priority_order.get(x["priority"], 4),
-        x["due_date"] or "9999-99-99"
-    ))
+    statuses = [status] if status else TASK_INDEX.statuses()
+    # 預設不顯示已完成和已取消的任務
+    if not include_completed:
+        statuses = [s for s in statuses if s not in ["completed", "cancelled"]]
+    
+    priority_rank = PRIORITY_RANK.get(priority) if priority else None
+    due_day = day_number(due_date) if due_date else None
+    
+    task_ids = []
+    # 條件不合法時不會有任何符合的任務
+    if (priority_rank is not None or not priority) and (due_day is not None or not due_date):
+        # 索引依 (優先級, 截止日) 順序產生結果，不需重新排序
+        task_ids = list(TASK_INDEX.select(statuses, priority_rank, due_day))
+    total = len(task_ids)
+    if limit is not None:
+        task_ids = task_ids[:max(limit, 0)]
+    results = [TASKS_DATABASE[task_id] for task_id in task_ids]
     
     return {
         "success": True,
         "count": len(results),
-        "tasks": results
+        "total": total,
+        "tasks": [task.to_dict() for task in results]
     }
 
 
@@ -198,30 +237,63 @@ def update_task(
             "message": f"找不到任務 {task_id}"
         }
     
+    error = _validate_fields(priority=priority, status=status, due_date=due_date)
+    if error:
+        return error
+    
     task = TASKS_DATABASE[task_id]
+    previous_due_day = task.due_day
     
     if title:
-        task["title"] = title
+        task.title = title
     if description is not None:
-        task["description"] = description
+        task.description = description
     if priority:
-        task["priority"] = priority
+        task.priority_rank = PRIORITY_RANK[priority]
     if status:
-        task["status"] = status
+        task.status = status
         if status == "completed":
-            task["completed_at"] = datetime.now().isoformat()
+            task.completed_at = datetime.now().isoformat()
     if due_date:
-        task["due_date"] = due_date
+        task.due_day = day_number(due_date)
     if estimated_hours is not None:
-        task["estimated_hours"] = estimated_hours
+        task.estimated_hours = estimated_hours
     
-    task["updated_at"] = datetime.now().isoformat()
+    task.updated_at = datetime.now().isoformat()
+    TASKS_DATABASE[task_id] = task
+    TASK_INDEX.add(task)
     
-    return {
+    result = {
         "success": True,
         "task_id": task_id,
-        "message": f"已更新任務「{task['title']}」"
+        "message": f"已更新任務「{task.title}」"
     }
+    updated = _sync_reminders(task, previous_due_day)
+    if updated:
+        result["reminders_updated"] = updated
+    return result
+
+
+def _sync_reminders(task: TaskRecord, previous_due_day: Optional[int]) -> int:
+    """
+    依任務變更連動調整關聯提醒
+    
+    - 完成/取消: 關聯提醒一併完成/取消
+    - 截止日變更: 關聯提醒依相差天數移動
+    
+    Returns:
+        調整的提醒數量
+    """
+    if task.status in ("completed", "cancelled"):
+        return close_linked_reminders("task", task.id, task.status)
+    
+    if previous_due_day is None or task.due_day is None or task.due_day == previous_due_day:
+        return 0
+    
+    reminders = linked_reminders("task", task.id)
+    for reminder in reminders:
+        shift_reminder(reminder, (task.due_day - previous_due_day) * MINUTES_PER_DAY)
+    return len(reminders)
 
 
 def complete_task(task_id: str) -> Dict:
@@ -254,13 +326,19 @@ def delete_task(task_id: str) -> Dict:
         }
     
     task = TASKS_DATABASE.pop(task_id)
+    TASK_INDEX.remove(task_id)
     
-    return {
+    result = {
         "success": True,
-        "message": f"已刪除任務「{task['title']}」"
+        "message": f"已刪除任務「{task.title}」"
     }
+    cancelled = close_linked_reminders("task", task_id)
+    if cancelled:
+        result["reminders_updated"] = cancelled
+    return result
 
 
+@memoize(TASKS_DATABASE, extra=today_number)
 def get_task_statistics() -> Dict:
     """
     取得任務統計資訊
@@ -268,28 +346,22 @@ def get_task_statistics() -> Dict:
     Returns:
         任務統計資料 (供 CodeExecutor 分析使用)
     """
-    stats = {
-        "total": len(TASKS_DATABASE),
-        "by_status": {"todo": 0, "in_progress": 0, "completed": 0, "cancelled": 0},
-        "by_priority": {"low": 0, "medium": 0, "high": 0, "urgent": 0},
-        "total_estimated_hours": 0,
-        "overdue_count": 0
-    }
+    # 計數由 TASK_INDEX 隨每次異動維護，不需走訪所有任務
+    by_status = {"todo": 0, "in_progress": 0, "completed": 0, "cancelled": 0}
+    by_status.update(TASK_INDEX.status_counts())
+    by_priority = {"low": 0, "medium": 0, "high": 0, "urgent": 0}
+    by_priority.update(TASK_INDEX.priority_counts())
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    for task in TASKS_DATABASE.values():
-        stats["by_status"][task["status"]] = stats["by_status"].get(task["status"], 0) + 1
-        stats["by_priority"][task["priority"]] = stats["by_priority"].get(task["priority"], 0) + 1
-        stats["total_estimated_hours"] += task.get("estimated_hours", 0)
-        
-        # 檢查是否過期
-        if task["due_date"] and task["due_date"] < today and task["status"] not in ["completed", "cancelled"]:
-            stats["overdue_count"] += 1
-    
-    return stats
+    return {
+        "total": len(TASK_INDEX),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "total_estimated_hours": TASK_INDEX.total_hours(),
+        "overdue_count": TASK_INDEX.overdue_count(today_number())
+    }
 
 
+@memoize(TASKS_DATABASE)
 def get_tasks_for_analysis() -> List[Dict]:
     """
     取得任務清單供分析使用
@@ -299,12 +371,12 @@ def get_tasks_for_analysis() -> List[Dict]:
     """
     return [
         {
-            "id": t["id"],
-            "title": t["title"],
-            "priority": t["priority"],
-            "status": t["status"],
+            "id": t.id,
+            "title": t.title,
+            "priority": PRIORITIES[t.priority_rank],
+            "status": t.status,
             "due_date": t["due_date"],
-            "estimated_hours": t.get("estimated_hours", 0)
+            "estimated_hours": t.estimated_hours or 0
         }
         for t in TASKS_DATABASE.values()
     ]
\ No newline at end of file
@@ -4,33 +4,57 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import LoopAgent
 
+from config.settings import Settings
 from agents.critic_agent import critic_agent
 from agents.adjuster_agent import adjuster_agent
+from agents.rule_critic_agent import rule_critic_agent, rule_precheck_agent
+from agents.convergence_agent import convergence_agent, iteration_start_agent
+
+
+def _critic_agents() -> list:
+    """依 CRITIC_MODE 決定迴圈中的評審代理"""
+    mode = Settings.CRITIC_MODE.lower()
+    if mode == "rules":
+        return [rule_critic_agent]
+    if mode == "precheck":
+        return [rule_precheck_agent, critic_agent]
+    return [critic_agent]
+
 
 # 建立 LoopAgent 迭代優化迴圈
 optimization_loop = LoopAgent(
     name="schedule_optimization_loop",
     description="迭代優化任務排程，直到排程最佳化或達到最大迭代次數",
-    sub_agents=[critic_agent, adjuster_agent],
-    max_iterations=3  # 最多迭代 3 次
+    sub_agents=[iteration_start_agent] + _critic_agents() + [adjuster_agent, convergence_agent],
+    max_iterations=Settings.MAX_OPTIMIZATION_ITERATIONS
 )
 
 """
 LoopAgent 執行流程:
 
+評審代理依 Settings.CRITIC_MODE 決定:
+- rules: rule_critic_agent 以規則計算 critic_feedback，已最佳化時直接結束迴圈
+- precheck (預設): rule_precheck_agent 先以規則檢查，已最佳化時結束迴圈；
+  否則再由 critic_agent (LLM) 評估
+- llm: 只使用 critic_agent
+
 Iteration 1:
-    1. critic_agent 評估當前排程
-    2. adjuster_agent 根據評估結果調整
-    3. 如果 adjuster_agent 呼叫 exit_loop() → 結束
-    4. 否則 → 繼續 Iteration 2
+    1. iteration_start_agent 記錄開始時間、任務/日程狀態指紋與規則評分
+    2. critic_agent 評估當前排程
+    3. adjuster_agent 根據評估結果調整
+    4. convergence_agent 比較指紋與評分:
+       本輪沒有改變任何任務/日程，或評分沒有改善 (超過 OPTIMIZATION_STALL_TOLERANCE 輪持平) → 結束
+    5. 否則 → 繼續 Iteration 2
 
 Iteration 2:
     ... (同上)
 
-Iteration 3 (max_iterations):
+Iteration N (Settings.MAX_OPTIMIZATION_ITERATIONS):
     ... 強制結束
 
 每次迭代都會：
 - 讀取上一輪的 session state
 - 輸出新的調整結果到 session state
+- 在 optimization_trace 追加本輪的耗時 (latency_ms) 與評分變化 (score_delta)；
+  評審判定已最佳化或 adjuster_agent 呼叫 exit_loop 提前結束時，由結束迴圈的代理記錄最後一輪
 """
\ No newline at end of file
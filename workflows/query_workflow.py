@@ -4,9 +4,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from google.adk.agents import ParallelAgent
 
+from config.settings import Settings
 from agents.calendar_agent import calendar_agent
 from agents.task_agent import task_agent
 from agents.reminder_agent import reminder_agent
+from agents.direct_query_agent import direct_query_agent
 
 # 建立 ParallelAgent 並行查詢
 query_parallel = ParallelAgent(
@@ -15,6 +17,9 @@ query_parallel = ParallelAgent(
     sub_agents=[calendar_agent, task_agent, reminder_agent]
 )
 
+# 每日規劃流水線使用的查詢階段 (QUERY_MODE=direct: 直接呼叫工具；llm: 三個 LlmAgent 並行)
+query_stage = direct_query_agent if Settings.QUERY_MODE.lower() == "direct" else query_parallel
+
 """
 ParallelAgent 執行流程:
 
@@ -34,4 +39,9 @@ calendar_results task_results reminder_results
 優點:
 - 3 個查詢同時執行，而非依序執行
 - 總耗時 = max(各 agent 耗時)，而非 sum(各 agent 耗時)
+
+direct_query_agent (預設):
+- 在執行緒中同時呼叫 get_today_schedule / list_tasks + get_task_statistics /
+  get_upcoming_reminders，不經過 LLM
+- 寫入相同的 state key (精簡的 JSON)，省下三次模型往返
 """
\ No newline at end of file